@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Сравнение BatchPIDController с циклом по pion.cython_pid.PIDController.
+
+Сначала проверяется совпадение сигналов на случайных траекториях (общие и
+индивидуальные коэффициенты, свой dt у каждого дрона, ограничение сигнала)
+и работа антивиндапа, затем замеряется время шага для разного числа дронов.
+
+Запуск: python benchmarks/bench_batch_pid.py
+"""
+import numpy as np
+from pion.cython_pid import PIDController
+
+from common import measure, print_results
+from batch_pid import BatchPIDController
+from swarm_kernel import default_position_pid_matrix
+
+
+def check_equivalence(n: int = 50, d: int = 3, steps: int = 200) -> None:
+    rng = np.random.default_rng(0)
+    gains = rng.uniform(0.0, 1.0, (3, n, d))
+    scalar = [PIDController(*gains[:, agent].copy()) for agent in range(n)]
+    batch = BatchPIDController(*gains)
+    clipped = [PIDController(*default_position_pid_matrix(d)) for _ in range(n)]
+    batch_clipped = BatchPIDController.from_matrix(default_position_pid_matrix(d), n, output_limit=0.4)
+    targets = rng.uniform(-5, 5, (n, d))
+    positions = rng.uniform(-5, 5, (n, d))
+    for step in range(steps):
+        positions += rng.normal(0, 0.1, (n, d))
+        # Свой шаг у каждого дрона, в том числе нулевой
+        dt = rng.choice([0.0, 0.05, 0.1], n)
+        result = batch.compute_control(targets, positions, dt)
+        expected = np.array([scalar[agent].compute_control(targets[agent], positions[agent].copy(), float(dt[agent]))
+                             for agent in range(n)])
+        if not np.array_equal(result, expected):
+            raise AssertionError(f"Шаг {step}: расхождение {np.abs(result - expected).max()}")
+        result = batch_clipped.compute_control(targets, positions, 0.05)
+        expected = np.array([np.clip(clipped[agent].compute_control(targets[agent], positions[agent].copy(), 0.05),
+                                     -0.4, 0.4) for agent in range(n)])
+        if not np.array_equal(result, expected):
+            raise AssertionError(f"Шаг {step}: расхождение с ограничением {np.abs(result - expected).max()}")
+    print(f"Совпадение с PIDController: {n} дронов, {steps} шагов")
+
+
+def check_anti_windup(steps: int = 400, dt: float = 0.05) -> None:
+    """
+    Точка с насыщаемой скоростью идёт к цели: без антивиндапа интеграл
+    накапливается за время насыщения и даёт перелёт.
+    """
+    gains = np.array([[1.0], [0.5], [0.2]])
+    overshoot = {}
+    for name, kwargs in (("без антивиндапа", {}), ("с антивиндапом", {"output_limit": 0.4})):
+        pid = BatchPIDController(*gains, n_agents=1, **kwargs)
+        position = np.zeros((1, 1))
+        target = np.full((1, 1), 5.0)
+        peak = 0.0
+        for _ in range(steps):
+            velocity = np.clip(pid.compute_control(target, position, dt), -0.4, 0.4)
+            position += velocity * dt
+            peak = max(peak, float(position[0, 0]))
+        overshoot[name] = peak - 5.0
+    if overshoot["с антивиндапом"] >= overshoot["без антивиндапа"]:
+        raise AssertionError(f"Антивиндап не уменьшил перелёт: {overshoot}")
+    print("Перелёт при насыщении: " + ", ".join(f"{name} {value:.2f} м" for name, value in overshoot.items()))
+
+
+def run(agent_counts=(10, 100, 1000), number: int = 50) -> dict:
+    check_equivalence()
+    check_anti_windup()
+    rng = np.random.default_rng(1)
+    results = {}
+    for n in agent_counts:
+        matrix = default_position_pid_matrix(2)
+        scalar = [PIDController(*matrix) for _ in range(n)]
+        batch = BatchPIDController.from_matrix(matrix, n, output_limit=0.4)
+        targets = rng.uniform(-5, 5, (n, 2))
+        positions = rng.uniform(-5, 5, (n, 2))
+
+        def loop():
+            for agent in range(n):
+                np.clip(scalar[agent].compute_control(targets[agent], positions[agent], 0.05), -0.4, 0.4)
+
+        results[f"batch_pid/loop/{n}"] = measure(loop, number=number)
+        results[f"batch_pid/batch/{n}"] = measure(lambda: batch.compute_control(targets, positions, 0.05),
+                                                  number=number)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
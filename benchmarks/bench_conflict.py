@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Прогноз конфликтов по времени наибольшего сближения.
+
+Сцена: две шеренги дронов летят навстречу друг другу и проходят строй
+насквозь. Без прогноза отталкивание включается только внутри safety_radius,
+и при высокой скорости пары сближаются почти вплотную. Сравнивается
+минимальное расстояние и время перестроения при разных ограничениях
+скорости для нескольких размеров роя, затем замеряется стоимость
+swarm_interaction с прогнозом и без для разного числа соседей и такт
+симулятора.
+
+Запуск: python benchmarks/bench_conflict.py
+"""
+import numpy as np
+
+from common import measure, print_results
+from params import params
+from swarm_kernel import closest_approach, swarm_interaction
+from swarm_sim import SwarmSimulator
+from tune_params import apply_candidate
+
+# Прогноз выключен (как в params.py) и включён, остальные параметры — из params.py
+NO_SCREEN = dict(params, conflict_horizon=0.0)
+SCREENED = dict(params, conflict_horizon=2.0, conflict_weight=3.0)
+# Быстрый ПИД и разгон, чтобы дроны действительно летели с ограничением скорости
+FAST_PID = {"pid_kp": 0.3, "pid_kd": 0.2, "max_acceleration": 2.0}
+
+
+def crossing(n: int, speed: float, swarm_params: dict, seed: int = 0, duration: float = 40.0,
+             spacing: float = 2.5, gap: float = 16.0) -> dict:
+    """
+    Две шеренги по n / 2 дронов меняются местами.
+
+    :return: min_separation и formation_time (inf, если строй не собран)
+    """
+    tuned = apply_candidate(dict(FAST_PID, max_speed=max(swarm_params["max_speed"], speed)), base=swarm_params)
+    sim = SwarmSimulator(n, params=tuned, max_speed=speed, seed=seed)
+    rng = np.random.default_rng(seed)
+    half = n // 2
+    lateral = np.arange(half) * spacing
+    sim.state[:half, 0:2] = np.column_stack([np.zeros(half), lateral + rng.uniform(-0.3, 0.3, half)])
+    sim.state[half:, 0:2] = np.column_stack([np.full(n - half, gap), lateral + rng.uniform(-0.3, 0.3, n - half)])
+    targets = sim.state[:, 0:2].copy()
+    targets[:half, 0], targets[half:, 0] = gap, 0.0
+    sim.set_targets(targets)
+    formation_time = float("inf")
+    while sim.time < duration:
+        sim.step()
+        if formation_time == float("inf") and sim.target_errors().max() < 0.3:
+            formation_time = sim.time
+    return {"min_separation": sim.min_separation_seen, "formation_time": formation_time}
+
+
+def compare_speeds(fleet_sizes=(16, 64), speeds=(0.5, 1.0, 2.0)) -> None:
+    for n in fleet_sizes:
+        for speed in speeds:
+            line = []
+            for name, swarm_params in (("без прогноза", NO_SCREEN), ("с прогнозом", SCREENED)):
+                result = crossing(n, speed, swarm_params)
+                line.append(f"{name}: мин. {result['min_separation']:.2f} м, "
+                            f"построение {result['formation_time']:.1f} с")
+            print(f"{n} дронов, {speed} м/с — " + "; ".join(line))
+
+
+def make_neighbours(n: int, rng: np.random.Generator):
+    spread = 2 * np.sqrt(n)
+    return rng.uniform(-spread, spread, (n, 2)), rng.normal(0, 0.5, (n, 2))
+
+
+def run(peer_counts=(10, 100, 1000), agent_counts=(10, 100), number: int = 500) -> dict:
+    compare_speeds()
+    rng = np.random.default_rng(1)
+    state_vector = np.array([0.0, 0.0, 1.0, 1.0, 0.0, 0.0])
+    target_point = np.array([10.0, 0.0])
+    results = {}
+    for n in peer_counts:
+        positions, velocities = make_neighbours(n, rng)
+        offsets = state_vector[0:2] - positions
+        relative = state_vector[3:5] - velocities
+        results[f"conflict/closest_approach/{n}"] = measure(
+            lambda: closest_approach(offsets, relative, SCREENED["conflict_horizon"]), number=number)
+        results[f"conflict/swarm_interaction_plain/{n}"] = measure(
+            lambda: swarm_interaction(state_vector, positions, velocities, target_point, NO_SCREEN), number=number)
+        results[f"conflict/swarm_interaction_screened/{n}"] = measure(
+            lambda: swarm_interaction(state_vector, positions, velocities, target_point, SCREENED), number=number)
+    for n in agent_counts:
+        for name, swarm_params in (("plain", NO_SCREEN), ("screened", SCREENED)):
+            sim = SwarmSimulator(n, params=swarm_params)
+            sim.set_targets(sim.state[:, 0:2].mean(axis=0))
+            sim.run(2.0)
+            results[f"conflict/sim_tick_{name}/{n}"] = measure(sim.control_tick, number=1, repeat=5)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Нагрузка наземной станции: сотни дронов с рассылкой 20 Гц.
+
+Сначала через loopback проверяется приём обоих форматов и подсчёт потерь
+(часть бинарных пакетов не отправляется), затем замеряется добавление
+секунды трафика парка в FleetStore, расчёт сводки и отрисовка таблицы.
+Доля ядра — время обработки секунды трафика.
+
+Запуск: python benchmarks/bench_ground_station.py
+"""
+import io
+import time
+
+import numpy as np
+from rich.console import Console
+
+from common import measure, print_results
+from ground_station import FleetStore, GroundStation, fleet_aggregates, parse_datagrams, render_fleet
+from swarm_protocol import BinaryStateEncoder, decode_batch, open_broadcast_socket
+from swarm_server import DDatagram
+
+RATE = 20
+PORT = 47020
+
+
+def fleet_payloads(n: int, rng: np.random.Generator, drop: float = 0.0):
+    """
+    Секунда трафика парка: n дронов с бинарными пакетами (с пропусками drop)
+    и n других дронов с датаграммами protobuf.
+    """
+    positions = np.column_stack([rng.uniform(0, 2 * np.sqrt(2 * n), (2 * n, 2)), np.ones(2 * n)])
+    velocities = rng.normal(0, 0.2, (2 * n, 3))
+    encoders = [BinaryStateEncoder(1000 + agent) for agent in range(n)]
+    binary, protobuf = [], []
+    for _ in range(RATE):
+        for agent in range(n):
+            payload = encoders[agent].encode(positions[agent], velocities[agent])
+            if rng.random() >= drop:
+                binary.append(payload)
+            datagram = DDatagram(id=2000 + agent)
+            datagram.data = [0.0, *positions[n + agent], *velocities[n + agent], 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+            protobuf.append(datagram.export_serialized())
+    return binary, protobuf
+
+
+def check_loopback(n: int = 50, drop: float = 0.1) -> None:
+    rng = np.random.default_rng(0)
+    binary, protobuf = fleet_payloads(n, rng, drop=drop)
+    station = GroundStation(PORT, params={"safety_radius": 1.0})
+    sender = open_broadcast_socket(0)
+    try:
+        received = 0
+        for start in range(0, len(protobuf), n):
+            for payload in binary[start:start + n]:
+                sender.sendto(payload, ("127.0.0.1", PORT + 1))
+            for payload in protobuf[start:start + n]:
+                sender.sendto(payload, ("127.0.0.1", PORT))
+            received += station.poll(0.01)
+        deadline = time.monotonic() + 1.0
+        while received < len(binary) + len(protobuf) and time.monotonic() < deadline:
+            received += station.poll(0.05)
+        if len(station.store) != 2 * n or received != len(binary) + len(protobuf):
+            raise AssertionError(f"Принято {received} пакетов от {len(station.store)} дронов")
+        loss = station.store.loss()
+        binary_loss = loss[~np.isnan(loss)]
+        if len(binary_loss) != n or abs(binary_loss.mean() - drop) > 0.05:
+            raise AssertionError(f"Потери {binary_loss.mean():.3f} при пропуске {drop}")
+        Console(file=io.StringIO(), width=120).print(station.render())
+        print(f"Loopback: {received} пакетов от {len(station.store)} дронов, "
+              f"потери {binary_loss.mean():.1%} при пропуске {drop:.0%}")
+    finally:
+        sender.close()
+        station.close()
+
+
+def run(fleet_sizes=(100, 300, 1000), number: int = 5) -> dict:
+    check_loopback()
+    rng = np.random.default_rng(1)
+    results = {}
+    for n in fleet_sizes:
+        binary, protobuf = fleet_payloads(n, rng, drop=0.05)
+        store = FleetStore()
+        # Пачки по 5 мс трафика, как их вычитывает poll при такой нагрузке
+        batch = max(1, len(binary) // (RATE * 10))
+
+        def ingest_binary():
+            now = time.monotonic()
+            for start in range(0, len(binary), batch):
+                records = decode_batch(binary[start:start + batch])
+                store.ingest(records["id"].tolist(), records["position"], records["velocity"], now,
+                             seq=records["seq"], sent_at=records["timestamp"])
+
+        def ingest_protobuf():
+            now = time.monotonic()
+            for start in range(0, len(protobuf), batch):
+                ids, positions, velocities = parse_datagrams(protobuf[start:start + batch])
+                store.ingest(ids, positions, velocities, now)
+
+        results[f"ground_station/ingest_binary_1s/{n}"] = measure(ingest_binary, number=number)
+        results[f"ground_station/ingest_protobuf_1s/{n}"] = measure(ingest_protobuf, number=number)
+        # Все дроны активны: давность отсчитывается от последнего добавления
+        results[f"ground_station/aggregates/{n}"] = measure(
+            lambda: fleet_aggregates(store, float(np.nanmax(store.last_seen)), 1.0), number=number * 4)
+        store.last_seen[:len(store)] = time.monotonic()
+        console = Console(file=io.StringIO(), width=120)
+        results[f"ground_station/render/{n}"] = measure(lambda: console.print(render_fleet(store, 1.0)),
+                                                        number=number)
+        # Секунда работы: весь трафик плюс отрисовка 4 раза в секунду
+        busy = (results[f"ground_station/ingest_binary_1s/{n}"]["min_us"]
+                + results[f"ground_station/ingest_protobuf_1s/{n}"]["min_us"]
+                + 4 * results[f"ground_station/render/{n}"]["min_us"]) / 1e6
+        print(f"{2 * n} дронов по {RATE} Гц: занято {busy:.1%} ядра")
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
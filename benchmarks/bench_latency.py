@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Задержка «приём пакета соседа → команда скорости» для Swarmc (потоки) и AsyncSwarmc.
+
+Соседи шлют бинарные пакеты состояния на loopback, параллельно работает
+поток, имитирующий MAVLink-цикл Pion с dt = 0.001, чтобы была конкуренция
+за GIL. Вместо Pion используется FakeDrone.
+
+Запуск: python benchmarks/bench_latency.py
+"""
+import asyncio
+import socket
+import threading
+import time
+
+import numpy as np
+
+from common import FakeDrone
+from async_swarm import AsyncSwarmc
+from main_radxa import Swarmc
+from params import params
+from swarm_protocol import BinaryStateEncoder
+
+DURATION = 5.0
+PEERS = 30
+PEER_INTERVAL = 0.05
+CONTROL_PERIOD = 0.1
+
+
+def mavlink_load(stop: threading.Event) -> None:
+    """
+    Имитация потока Pion: небольшая работа на numpy каждые 1 мс.
+    """
+    state = np.zeros(6)
+    while not stop.is_set():
+        state = state + np.dot(np.eye(6), state) * 1e-3
+        time.sleep(0.001)
+
+
+def peers_sender(port: int, stop: threading.Event) -> None:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    encoders = [BinaryStateEncoder(1000 + i) for i in range(PEERS)]
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-3, 3, (PEERS, 3))
+    while not stop.is_set():
+        for encoder, position in zip(encoders, positions):
+            sock.sendto(encoder.encode(position, (0.0, 0.0, 0.0)), ("127.0.0.1", port))
+        time.sleep(PEER_INTERVAL)
+    sock.close()
+
+
+def run_with_load(port: int, body) -> None:
+    stop = threading.Event()
+    threads = [threading.Thread(target=mavlink_load, args=(stop,), daemon=True),
+               threading.Thread(target=peers_sender, args=(port, stop), daemon=True)]
+    for thread in threads:
+        thread.start()
+    try:
+        body()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+
+def measure_threads(port: int) -> dict:
+    drone = FakeDrone(mavlink_port=port)
+    swarm = Swarmc(control_object=drone, broadcast_port=port - 1, state_port=port, ip="localhost",
+                   broadcast_interval=PEER_INTERVAL, time_sleep_update_velocity=CONTROL_PERIOD,
+                   params=params, binary_protocol=True)
+
+    def body():
+        swarm.start()
+        tracking = threading.Thread(target=swarm.smart_point_tacking, daemon=True)
+        tracking.start()
+        time.sleep(DURATION)
+        drone.tracking = False
+        tracking.join()
+
+    run_with_load(port, body)
+    swarm.stop()
+    return swarm.latency_probe.stats()
+
+
+def measure_async(port: int) -> dict:
+    drone = FakeDrone()
+    swarm = AsyncSwarmc(control_object=drone, unique_id=1, broadcast_port=port - 1, state_port=port,
+                        broadcast_interval=PEER_INTERVAL, time_sleep_update_velocity=CONTROL_PERIOD,
+                        params=params, broadcast_address="127.0.0.1")
+
+    async def session():
+        runner = asyncio.get_running_loop().create_task(swarm.run())
+        await asyncio.sleep(0.1)
+        swarm.start_tracking()
+        await asyncio.sleep(DURATION)
+        swarm.stop()
+        await runner
+
+    run_with_load(port, lambda: asyncio.run(session()))
+    return swarm.latency_probe.stats()
+
+
+def main() -> None:
+    results = {"threads": measure_threads(37121), "asyncio": measure_async(37221)}
+    print(f"{'design':>8} {'samples':>8} {'p50, ms':>8} {'p99, ms':>8} {'max, ms':>8}")
+    for name, stats in results.items():
+        print(f"{name:>8} {stats['count']:>8} {stats.get('p50', float('nan')) * 1e3:>8.2f} "
+              f"{stats.get('p99', float('nan')) * 1e3:>8.2f} {stats.get('max', float('nan')) * 1e3:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
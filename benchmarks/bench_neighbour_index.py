@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Стоимость такта роевой составляющей: полный обход env против UniformGridIndex.
+
+Раскладки:
+    - dense-local: 8 соседей в радиусе взаимодействия, остальные разбросаны
+      по площади, растущей с числом дронов;
+    - sparse-global: равномерное распределение с постоянной плотностью
+      (0.25 дрона на м^2), площадь растёт вместе с числом дронов.
+
+Запуск: python benchmarks/bench_neighbour_index.py
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from common import measure, print_results
+from neighbour_index import UniformGridIndex
+from params import params
+from swarm_kernel import compute_swarm_velocity_vec, pack_env
+
+INTERACTION_RADIUS = max(params["safety_radius"] + 0.1, params["unstable_radius"])
+STATE_VECTOR = np.array([0.0, 0.0, 1.0, 0.1, 0.0, 0.0])
+TARGET_POINT = np.array([4.0, 4.0])
+
+
+def dense_local(n: int, rng: np.random.Generator) -> np.ndarray:
+    local = min(n, 8)
+    angles = rng.uniform(0, 2 * np.pi, local)
+    radii = rng.uniform(0.3, INTERACTION_RADIUS, local)
+    near = np.column_stack([radii * np.cos(angles), radii * np.sin(angles)])
+    side = 20.0 * np.sqrt(n)
+    far = rng.uniform(-side, side, (n - local, 2))
+    far[np.linalg.norm(far, axis=1) < 3 * INTERACTION_RADIUS] += 3 * INTERACTION_RADIUS
+    return np.vstack([near, far])
+
+
+def sparse_global(n: int, rng: np.random.Generator) -> np.ndarray:
+    side = np.sqrt(n / 0.25) / 2
+    return rng.uniform(-side, side, (n, 2))
+
+
+def build(points: np.ndarray):
+    env = {}
+    index = UniformGridIndex(cell_size=INTERACTION_RADIUS, d=2)
+    for i, (x, y) in enumerate(points):
+        data = [float(i), x, y, 1.0, 0.0, 0.0, 0.0]
+        env[i] = SimpleNamespace(data=data)
+        index.update(i, data[1:3], data[4:6])
+    return env, index
+
+
+def tick_full(env):
+    positions, velocities = pack_env(env, 2)
+    return compute_swarm_velocity_vec(STATE_VECTOR, positions, velocities, TARGET_POINT, params)
+
+
+def tick_index(index):
+    positions, velocities = index.query(STATE_VECTOR[0:2], INTERACTION_RADIUS)
+    return compute_swarm_velocity_vec(STATE_VECTOR, positions, velocities, TARGET_POINT, params)
+
+
+def run(peer_counts=(10, 100, 1000), number: int = 500) -> dict:
+    rng = np.random.default_rng(0)
+    results = {}
+    for name, layout in (("dense-local", dense_local), ("sparse-global", sparse_global)):
+        for n in peer_counts:
+            env, index = build(layout(n, rng))
+            if not np.allclose(tick_full(env), tick_index(index)):
+                raise AssertionError(f"{name}, {n}: результат индекса отличается от полного обхода")
+            results[f"neighbour_index/{name}/full/{n}"] = measure(lambda: tick_full(env), number=number)
+            results[f"neighbour_index/{name}/index/{n}"] = measure(lambda: tick_index(index), number=number)
+            results[f"neighbour_index/{name}/update/{n}"] = measure(
+                lambda: index.update(0, rng.uniform(-1, 1, 2), (0.0, 0.0)), number=number)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Таблица соседей: пакетное применение пакетов и вытеснение по TTL.
+
+Проверяется, что при постоянной смене состава роя (дроны появляются и
+пропадают) таблица не растёт больше capacity, а умершие соседи удаляются
+через ttl. Время модельное, часы подменяются.
+
+Экстраполяция соседей проверяется на рое с равномерным движением, задержкой
+в сети и несинхронизированными часами отправителей: ошибка позиции на такте
+сравнивается с ошибкой без экстраполяции.
+
+Запуск: python benchmarks/bench_peer_table.py
+"""
+from types import SimpleNamespace
+
+import numpy as np
+
+from common import measure, print_results
+from neighbour_index import UniformGridIndex
+from peer_table import PeerTable
+
+
+class ManualClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_state(peer_id: int, rng: np.random.Generator) -> SimpleNamespace:
+    x, y = rng.uniform(-20, 20, 2)
+    return SimpleNamespace(id=peer_id, data=[float(peer_id), x, y, 1.0, 0.0, 0.0, 0.0])
+
+
+def check_churn(rng: np.random.Generator, capacity: int = 256, ttl: float = 1.0) -> None:
+    clock = ManualClock()
+    table = PeerTable(capacity=capacity, ttl=ttl, index=UniformGridIndex(1.1), clock=clock)
+    # 10 000 дронов, каждый живёт 2 с; такт 0.1 с, 20 новых дронов за такт
+    for tick in range(500):
+        clock.now = tick * 0.1
+        first = tick * 20
+        alive = range(max(0, first - 380), first + 20)
+        for peer_id in alive:
+            table.submit(make_state(peer_id, rng))
+        table.ingest_pending()
+        table.evict_stale()
+        if len(table) > capacity or len(table.index) != len(table):
+            raise AssertionError(f"Такт {tick}: размер таблицы {len(table)}, индекса {len(table.index)}")
+    clock.now += ttl + 0.1
+    table.evict_stale()
+    if len(table) or len(table.index):
+        raise AssertionError("Устаревшие соседи не удалены")
+
+
+def check_extrapolation(rng: np.random.Generator,
+                        n_peers: int = 50,
+                        broadcast_interval: float = 0.5,
+                        tick: float = 0.1,
+                        max_extrapolation: float = 1.0) -> None:
+    clock = ManualClock()
+    wall_offset = 1000.0
+    index = UniformGridIndex(2.0)
+    table = PeerTable(capacity=n_peers, ttl=10.0, index=index, clock=clock,
+                      max_extrapolation=max_extrapolation, estimate_clock_offset=True,
+                      wall_clock=lambda: clock.now + wall_offset)
+    start = rng.uniform(-10, 10, (n_peers, 2))
+    velocity = rng.uniform(-0.5, 0.5, (n_peers, 2))
+    clock_offsets = rng.uniform(-100, 100, n_peers)
+    phases = rng.uniform(0, broadcast_interval, n_peers)
+    in_flight = []
+    errors = {"extrapolated": 0.0, "raw": 0.0}
+    for step in range(1, 200):
+        previous, clock.now = clock.now, step * tick
+        # Пакеты, отправленные за такт, приходят с задержкой 5..50 мс
+        for peer in range(n_peers):
+            for sent in np.arange(phases[peer], clock.now, broadcast_interval):
+                if previous <= sent < clock.now:
+                    in_flight.append((sent + rng.uniform(0.005, 0.05), peer, sent))
+        for arrived, peer, sent in sorted(in_flight):
+            if arrived <= clock.now:
+                x, y = start[peer] + velocity[peer] * sent
+                state = SimpleNamespace(id=peer, timestamp=sent + wall_offset + clock_offsets[peer],
+                                        data=[float(peer), x, y, 1.0, *velocity[peer], 0.0])
+                table.submit(state, received_at=arrived)
+        in_flight = [packet for packet in in_flight if packet[0] > clock.now]
+        table.ingest_pending()
+        if step * tick < 2 * broadcast_interval:
+            continue
+        true_positions = start + velocity * clock.now
+        for key, at in (("extrapolated", clock.now), ("raw", None)):
+            positions, _ = index.query((0.0, 0.0), 100.0, at=at, max_age=max_extrapolation)
+            nearest = np.linalg.norm(positions[:, None, :] - true_positions[None, :, :], axis=2).min(axis=1)
+            errors[key] = max(errors[key], float(nearest.max()))
+    print(f"Ошибка позиции соседа: без экстраполяции {errors['raw']:.3f} м, "
+          f"с экстраполяцией {errors['extrapolated']:.3f} м")
+    if errors["extrapolated"] > 0.05 or errors["extrapolated"] > errors["raw"] / 5:
+        raise AssertionError(f"Экстраполяция не уменьшила ошибку: {errors}")
+
+
+def run(batch_sizes=(10, 100, 1000), number: int = 200) -> dict:
+    rng = np.random.default_rng(0)
+    check_churn(rng)
+    check_extrapolation(rng)
+    results = {}
+    for batch in batch_sizes:
+        clock = ManualClock()
+        table = PeerTable(capacity=max(256, batch), ttl=1.0, index=UniformGridIndex(1.1), clock=clock)
+        states = [make_state(i, rng) for i in range(batch)]
+
+        def tick():
+            clock.now += 0.1
+            for state in states:
+                table.submit(state)
+            table.ingest_pending()
+            table.evict_stale()
+
+        results[f"peer_table/tick/{batch}"] = measure(tick, number=number)
+        results[f"peer_table/evict_stale/{batch}"] = measure(table.evict_stale, number=number)
+        results[f"peer_table/query_extrapolated/{batch}"] = measure(
+            lambda: table.index.query((0.0, 0.0), 1.1, at=clock.now, max_age=1.0), number=number)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Сравнение protobuf-датаграммы SwarmCommunicator с бинарным форматом swarm_protocol.
+
+Выводит время кодирования/декодирования одного пакета и объём трафика на
+одного соседа в секунду при broadcast_interval = 0.05 с.
+
+Запуск: python benchmarks/bench_protocol.py
+"""
+import numpy as np
+
+from common import measure, print_results
+from swarm_protocol import BinaryStateEncoder, decode_batch, decode_state
+from swarm_server import DDatagram
+
+BROADCAST_INTERVAL = 0.05
+UDP_IPV4_OVERHEAD = 28
+UNIQUE_ID = 123456789
+BATCH = 100
+
+
+def run(number: int = 20000) -> dict:
+    position = np.array([1.2, -3.4, 1.5])
+    velocity = np.array([0.1, -0.2, 0.0])
+
+    pb_encoder = DDatagram(id=UNIQUE_ID)
+    pb_decoder = DDatagram(id=UNIQUE_ID)
+    # [ip, x, y, z, vx, vy, vz, roll, pitch, yaw, t_speed]
+    pb_data = [57.0, *position, *velocity, 0.01, 0.02, 1.57, 0.1, -0.2, 0.0, 0.0]
+
+    def pb_encode():
+        pb_encoder.data = pb_data
+        return pb_encoder.export_serialized()
+
+    pb_payload = pb_encode()
+    bin_encoder = BinaryStateEncoder(UNIQUE_ID)
+    bin_payload = bin_encoder.encode(position, velocity)
+    batch = [bin_payload] * BATCH
+
+    results = {
+        "protocol/protobuf/encode": measure(pb_encode, number=number),
+        "protocol/protobuf/decode": measure(lambda: pb_decoder.read_serialized(pb_payload), number=number),
+        "protocol/binary/encode": measure(lambda: bin_encoder.encode(position, velocity), number=number),
+        "protocol/binary/decode": measure(lambda: decode_state(bin_payload), number=number),
+        "protocol/binary/decode_batch_per_packet": {
+            key: value / BATCH if key != "number" else value
+            for key, value in measure(lambda: decode_batch(batch), number=number // BATCH).items()
+        },
+    }
+    for name, size in (("protobuf", len(pb_payload)), ("binary", len(bin_payload))):
+        for key in ("encode", "decode"):
+            results[f"protocol/{name}/{key}"]["bytes"] = size
+            results[f"protocol/{name}/{key}"]["bytes_per_peer_per_s"] = (
+                (size + UDP_IPV4_OVERHEAD) / BROADCAST_INTERVAL)
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    print_results(results)
+    for name in ("protobuf", "binary"):
+        values = results[f"protocol/{name}/encode"]
+        print(f"{name}: {values['bytes']} B/пакет, {values['bytes_per_peer_per_s']:.0f} B/сосед/с")
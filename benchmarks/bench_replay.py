@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Запись входа Swarmc и её воспроизведение без дрона и сети.
+
+Swarmc с FakeDrone и подставными часами летит к цели среди соседей:
+бинарные пакеты соседей (10 Гц со случайной задержкой), датаграммы
+protobuf и одна команда GOTO подаются в process_incoming_state, такт
+20 Гц пишется в файл записи. Затем проверяется, что воспроизведение
+повторяет команды полёта, два воспроизведения совпадают бит в бит, команда
+из записи пропущена, изменение параметров видно в сравнении, а режим
+реального времени выдерживает длительность записи. Замеряется такт при
+воспроизведении и полное воспроизведение на такт.
+
+Запуск: python benchmarks/bench_replay.py
+"""
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from common import FakeDrone, print_results
+from main_radxa import Swarmc
+from params import params
+from swarm_capture import KIND_BINARY, KIND_PROTOBUF, KIND_TICK, load_capture, summary
+from swarm_protocol import BinaryStateEncoder, decode_state
+from swarm_replay import ReplayClock, compare, replay, report
+from swarm_server import DDatagram
+from swarm_server.commands import CMD
+
+RATE = 20
+PEER_RATE = 10
+WALL_OFFSET = 1.7e9
+# Прогноз конфликтов включён: сравнение с conflict_horizon = 0 должно его заметить
+FLIGHT_PARAMS = dict(params, conflict_horizon=2.0)
+
+
+def protobuf_state(peer_id: int, position, velocity, command: int = 0, data=None):
+    """
+    Датаграмма в том виде, в котором её отдаёт приём SwarmCommunicator.
+    """
+    datagram = DDatagram(id=peer_id)
+    datagram.command = command
+    datagram.data = data if data is not None else [0.0, *position, *velocity, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+    _, state = DDatagram(id=0).read_serialized(datagram.export_serialized())
+    return state
+
+
+def record_flight(path: str, peers: int, duration: float, seed: int = 0) -> None:
+    """
+    Полёт к цели среди peers соседей на круговых траекториях с записью входа.
+    """
+    rng = np.random.default_rng(seed)
+    clock = ReplayClock()
+    clock.now, clock.wall_offset = 100.0, WALL_OFFSET
+    drone = FakeDrone()
+    drone.target_point = np.array([6.0, 4.0, 1.0, 0.0])
+    swarm = Swarmc(control_object=drone, broadcast_port=0, ip="localhost", params=FLIGHT_PARAMS, peer_ttl=1.0,
+                   capture_path=path, clock=clock, wall_clock=clock.wall)
+    centres = rng.uniform(-4.0, 10.0, (peers, 2))
+    phases = rng.uniform(0, 2 * np.pi, peers)
+    encoders = [BinaryStateEncoder(10 + peer) for peer in range(peers)]
+    # Пакеты соседей по времени приёма: (время, сосед); последние два соседа — protobuf
+    arrivals = sorted((t + rng.uniform(0.0, 0.02), peer)
+                      for peer in range(peers)
+                      for t in np.arange(rng.uniform(0, 1 / PEER_RATE), duration, 1 / PEER_RATE))
+    goto_at = duration / 2
+    start = clock.now
+    swarm._pid_position_controller = swarm.new_position_controller()
+    swarm.capture.session(clock.now)
+    drone.tracking = True
+    next_arrival = 0
+    dt = 1 / RATE
+    try:
+        for step in range(int(duration * RATE)):
+            elapsed = step * dt
+            while next_arrival < len(arrivals) and arrivals[next_arrival][0] < elapsed:
+                arrived, peer = arrivals[next_arrival]
+                next_arrival += 1
+                clock.now = start + arrived
+                angle = phases[peer] + 0.3 * arrived
+                position = (*(centres[peer] + 2.0 * np.array([np.cos(angle), np.sin(angle)])), 1.0)
+                velocity = (-0.6 * np.sin(angle), 0.6 * np.cos(angle), 0.0)
+                if peer >= peers - 2:
+                    swarm.process_incoming_state(protobuf_state(10 + peer, position, velocity))
+                    continue
+                payload = encoders[peer].encode(position, velocity, timestamp=clock.wall() - 0.005)
+                swarm.process_incoming_state(decode_state(payload), payload=payload)
+            if goto_at is not None and elapsed >= goto_at:
+                clock.now = start + elapsed - 0.01
+                swarm.process_incoming_state(protobuf_state(1, (0, 0, 0), (0, 0, 0), command=CMD.GOTO.value,
+                                                            data=[2.0, 8.0, 1.0, 0.0]))
+                goto_at = None
+            clock.now = start + elapsed
+            swarm.update_swarm_control(drone.target_point, dt)
+            drone.position[0:3] += drone.t_speed[0:3] * dt
+            drone.position[3:6] = drone.t_speed[0:3]
+    finally:
+        swarm.capture.close()
+        swarm.broadcast_client.socket.close()
+        swarm.broadcast_server.socket.close()
+
+
+def check_replay(path: str) -> dict:
+    capture = load_capture(path)
+    print(summary(capture))
+    first, second = replay(capture), replay(capture)
+    if not np.array_equal(first["command"], second["command"]):
+        raise AssertionError("Воспроизведения расходятся")
+    if first["skipped_commands"] != 1 or first["invalid"]:
+        raise AssertionError(f"Пропущено команд {first['skipped_commands']}, битых {first['invalid']}")
+    if first["datagrams"] != capture.count(KIND_BINARY) + capture.count(KIND_PROTOBUF) - 1:
+        raise AssertionError(f"Подано {first['datagrams']} датаграмм")
+    with_flight = compare(first, first, reference="recorded_command")
+    if with_flight["max_command_error"] > 1e-6:
+        raise AssertionError(report(with_flight, "С полётом"))
+    print(report(with_flight, "С полётом"))
+    # Другая «версия»: прогноз конфликтов выключен
+    changed = compare(replay(capture, overrides={"conflict_horizon": 0.0}), first)
+    if not changed["differing_ticks"]:
+        raise AssertionError("Изменение параметров не видно в сравнении")
+    print(report(changed, "conflict_horizon = 0 против записи"))
+    return first
+
+
+def check_realtime(path: str) -> None:
+    capture = load_capture(path)
+    started = time.monotonic()
+    result = replay(capture, realtime=True)
+    elapsed = time.monotonic() - started
+    if abs(elapsed - capture.duration) > 0.2 or len(result["command"]) != capture.count(KIND_TICK):
+        raise AssertionError(f"Запись {capture.duration:.2f} с воспроизведена за {elapsed:.2f} с")
+    print(f"Реальное время: запись {capture.duration:.2f} с воспроизведена за {elapsed:.2f} с")
+
+
+def run(peer_counts=(10, 100), duration: float = 20.0) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        short = os.path.join(directory, "short.bin")
+        record_flight(short, 5, 2.0)
+        check_realtime(short)
+        for n in peer_counts:
+            path = os.path.join(directory, f"capture_{n}.bin")
+            record_flight(path, n, duration)
+            print(f"{n} соседей, {duration:.0f} с: файл {os.path.getsize(path) / 1024:.0f} КБ")
+            result = check_replay(path)
+            ticks = len(result["command"])
+            started = time.perf_counter()
+            replay(load_capture(path))
+            per_tick_us = (time.perf_counter() - started) / ticks * 1e6
+            duration_us = result["duration"] * 1e6
+            results[f"replay/update_swarm_control/{n}"] = {"min_us": float(duration_us.min()),
+                                                           "mean_us": float(duration_us.mean()),
+                                                           "number": ticks}
+            results[f"replay/full_per_tick/{n}"] = {"min_us": per_tick_us, "mean_us": per_tick_us,
+                                                    "number": ticks}
+            print(f"{n} соседей: воспроизведение в {1e6 / RATE / per_tick_us:.0f} раз быстрее реального времени")
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
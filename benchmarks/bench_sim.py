@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Сквозное время такта в headless-симуляторе: все дроны, ПИД + рой + шина.
+
+Дополнительно сравниваются фиксированная и адаптивная рассылка на сцене, где
+большая часть роя висит на месте, а каждый пятый дрон пролетает через строй:
+число пакетов и наибольшая ошибка позиции, которую видят соседи (с
+экстраполяцией соседей, max_extrapolation = 1 с).
+
+Запуск: python benchmarks/bench_sim.py
+"""
+from common import measure, print_results
+from params import params
+from swarm_sim import SwarmSimulator
+
+EXTRAPOLATED = dict(params, max_extrapolation=1.0)
+
+
+def compare_broadcast(n_agents: int = 100, sim_time: float = 30.0) -> dict:
+    summaries = {}
+    for name, adaptive in (("fixed", False), ("adaptive", True)):
+        sim = SwarmSimulator(n_agents, params=dict(EXTRAPOLATED, adaptive_broadcast=adaptive), spacing=2.5)
+        targets = sim.state[:, 0:2].copy()
+        targets[::5, 1] += 10.0
+        sim.set_targets(targets)
+        summaries[name] = sim.run(sim_time)
+    for name, summary in summaries.items():
+        print(f"рассылка {name}: пакетов {summary['packets']} "
+              f"(экономия {summary['packets_saved']:.0%}), "
+              f"ошибка у соседей {summary['neighbour_error_max']:.3f} м, "
+              f"минимальное расстояние {summary['min_separation']:.3f} м")
+    return summaries
+
+
+def run(agent_counts=(10, 100, 1000), sim_time: float = 2.0) -> dict:
+    results = {}
+    for n in agent_counts:
+        sim = SwarmSimulator(n)
+        sim.set_targets(sim.state[:, 0:2].mean(axis=0))
+        sim.run(sim_time)
+        results[f"sim/control_tick/{n}"] = measure(sim.control_tick, number=1, repeat=5)
+        results[f"sim/control_tick/{n}"]["per_agent_us"] = results[f"sim/control_tick/{n}"]["min_us"] / n
+    compare_broadcast()
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Сравнение векторизованного swarm_kernel с compute_swarm_velocity_pid из pion.
+
+Сначала проверяется совпадение результатов на случайных роях, затем замеряется
+время одного вызова для разного числа соседей.
+
+Запуск: python benchmarks/bench_swarm_kernel.py
+"""
+import contextlib
+import io
+from types import SimpleNamespace
+
+import numpy as np
+
+from common import measure, print_results
+from params import params
+from swarm_kernel import compute_swarm_velocity_vec, pack_env
+
+try:
+    from pion.functions import compute_swarm_velocity_pid
+except ImportError:  # в новых версиях pion функции вынесены в pionfunc
+    from pionfunc.functions import compute_swarm_velocity_pid
+
+
+def make_env(n: int, rng: np.random.Generator, spread: float = 3.0) -> dict:
+    """
+    Создаёт env из n соседей в квадрате [-spread, spread]^2.
+
+    Часть соседей неподвижна, чтобы срабатывал вектор выведения из равновесия.
+    """
+    env = {}
+    for i in range(n):
+        xyz = rng.uniform(-spread, spread, 3)
+        speed = rng.uniform(-0.3, 0.3, 3) if rng.random() < 0.5 else np.zeros(3)
+        env[i] = SimpleNamespace(data=[float(i), *xyz, *speed, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    return env
+
+
+def reference(state_vector, env, target_point):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return compute_swarm_velocity_pid(state_vector, env, target_point, params=params)
+
+
+def check_equivalence(trials: int = 500) -> None:
+    rng = np.random.default_rng(0)
+    for _ in range(trials):
+        env = make_env(int(rng.integers(0, 40)), rng)
+        state_vector = np.hstack([rng.uniform(-3, 3, 3), rng.uniform(-0.4, 0.4, 3)])
+        target_point = rng.uniform(-5, 5, 2)
+        expected = reference(state_vector, env, target_point)
+        positions, velocities = pack_env(env, 2)
+        # Прогноза конфликтов в pion нет
+        result = compute_swarm_velocity_vec(state_vector, positions, velocities, target_point,
+                                            dict(params, conflict_horizon=0.0))
+        if not np.allclose(result, expected, rtol=1e-9, atol=1e-12):
+            raise AssertionError(f"Расхождение: {result} != {expected}")
+    print(f"Совпадение с compute_swarm_velocity_pid: {trials} случайных роёв")
+
+
+def run(peer_counts=(10, 30, 100, 1000), number: int = 200) -> dict:
+    check_equivalence()
+    rng = np.random.default_rng(1)
+    state_vector = np.array([0.0, 0.0, 1.0, 0.1, 0.0, 0.0])
+    target_point = np.array([4.0, 4.0])
+    results = {}
+    for n in peer_counts:
+        env = make_env(n, rng, spread=np.sqrt(n))
+        results[f"swarm_kernel/loop/{n}"] = measure(
+            lambda: reference(state_vector, env, target_point), number=number)
+        results[f"swarm_kernel/vec/{n}"] = measure(
+            lambda: compute_swarm_velocity_vec(state_vector, *pack_env(env, 2), target_point, params),
+            number=number)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Такт Swarmc.update_swarm_control (ПИД + роевая составляющая) и вызов PIDController.
+
+Swarmc создаётся с FakeDrone и не запускается (start() не вызывается), соседи
+подаются через process_incoming_state, как из потока приёма.
+
+Такт замеряется в двух режимах: с пересчётом роевой составляющей на каждом
+такте и многочастотный такт без новых данных соседей (только ПИД и кэш).
+Перед замерами проверяется, что однократный такт совпадает с
+swarm_velocity_command в режимах d = 2 и d = 3, что в режиме d = 3 сосед над
+дроном ближе vertical_safety_radius отталкивает его по высоте и что такт без
+пересчёта роевой составляющей не выделяет память (tracemalloc), в том числе
+с телеметрией.
+
+Запуск: python benchmarks/bench_swarmc.py
+"""
+import os
+import tempfile
+import tracemalloc
+from typing import Any, Optional
+
+import numpy as np
+from pion.cython_pid import PIDController
+
+from common import FakeDrone, measure, print_results
+from main_radxa import Swarmc
+from metrics import SwarmMetrics
+from params import params
+from swarm_kernel import compute_swarm_velocity_vec, default_position_pid_matrix
+from swarm_protocol import BinaryStateEncoder, decode_state
+
+PORT = 37320
+SINGLE_RATE = dict(params, swarm_rate=None, max_extrapolation=0.0)
+
+
+def swarm_velocity_command(pid_controller: Any,
+                           target_point: np.ndarray,
+                           state_vector: np.ndarray,
+                           positions: np.ndarray,
+                           velocities: np.ndarray,
+                           dt: float,
+                           max_speed: float,
+                           params: Optional[dict] = None) -> np.ndarray:
+    """
+    Эталон такта Swarmc без кэша и буферов: ПИД до целевой точки плюс роевая составляющая.
+
+    :param pid_controller: ПИД-регулятор позиции с методом compute_control
+    :param target_point: Целевая точка размерности d
+    :param state_vector: Вектор состояния дрона [x, y, z, vx, vy, vz]
+    :param positions: Позиции соседей (N, d)
+    :param velocities: Скорости соседей (N, d)
+    :param dt: Шаг времени
+    :param max_speed: Ограничение ПИД-сигнала по каждой оси
+    :param params: Параметры роя, см. params.py
+
+    :return: Вектор скорости размерности d
+    :rtype: np.ndarray
+    """
+    d = positions.shape[1]
+    signal = pid_velocity_signal(pid_controller, target_point, state_vector, dt, max_speed, d)
+    swarm_part = compute_swarm_velocity_vec(state_vector, positions, velocities, target_point, params=params)
+    return signal + swarm_part
+
+
+def pid_velocity_signal(pid_controller: Any,
+                        target_point: np.ndarray,
+                        state_vector: np.ndarray,
+                        dt: float,
+                        max_speed: float,
+                        d: int = 2) -> np.ndarray:
+    """
+    ПИД-сигнал скорости до целевой точки, ограниченный max_speed по каждой оси.
+    """
+    return np.clip(
+        pid_controller.compute_control(
+            target_position=np.array(target_point, dtype=np.float64),
+            current_position=np.asarray(state_vector[0:d], dtype=np.float64),
+            dt=dt),
+        -max_speed,
+        max_speed)
+
+
+def make_swarmc(n_peers: int, rng: np.random.Generator, swarm_params: dict = SINGLE_RATE, d: int = 2,
+                telemetry_path: Optional[str] = None) -> Swarmc:
+    swarm = Swarmc(control_object=FakeDrone(mavlink_port=PORT), broadcast_port=PORT,
+                   ip="localhost", params=swarm_params, peer_ttl=3600., peer_capacity=max(256, n_peers), d=d,
+                   telemetry_path=telemetry_path, telemetry_capacity=1024)
+    swarm._pid_position_controller = swarm.new_position_controller()
+    spread = max(3.0, np.sqrt(n_peers))
+    for i in range(n_peers):
+        # В режиме d = 3 соседи разнесены и по высоте
+        altitude = 1.0 + (rng.uniform(-1.5, 1.5) if d == 3 else 0.0)
+        payload = BinaryStateEncoder(10_000 + i).encode(
+            (*rng.uniform(-spread, spread, 2), altitude), (*rng.uniform(-0.3, 0.3, 2), 0.0))
+        swarm.process_incoming_state(decode_state(payload))
+    return swarm
+
+
+def add_peer(swarm: Swarmc, peer_id: int, position, velocity=(0.0, 0.0, 0.0)) -> None:
+    swarm.process_incoming_state(decode_state(BinaryStateEncoder(peer_id).encode(position, velocity)))
+
+
+def close(swarm: Swarmc) -> None:
+    swarm.broadcast_client.socket.close()
+    swarm.broadcast_server.socket.close()
+    if swarm.telemetry is not None:
+        swarm.telemetry.close()
+
+
+def check_single_rate(n_peers: int = 50) -> None:
+    """
+    Такт без кэша должен давать ту же команду, что и swarm_velocity_command.
+    """
+    for d, target in ((2, np.array([1.0, 1.0])), (3, np.array([1.0, 1.0, 2.0]))):
+        swarm = make_swarmc(n_peers, np.random.default_rng(1), d=d)
+        swarm.refresh_peers()
+        positions, velocities = swarm.neighbour_index.query(swarm.control_object.xyz[0:d], swarm.interaction_radius)
+        pid = PIDController(*swarm.position_pid_matrix)
+        for step in range(3):
+            expected = swarm_velocity_command(pid, target, swarm.control_object.position, positions, velocities,
+                                              0.1, swarm.max_speed, params=swarm.params)
+            swarm.update_swarm_control(target, 0.1)
+            assert np.array_equal(swarm.control_object.t_speed[0:d], expected), \
+                (d, step, swarm.control_object.t_speed, expected)
+        assert not swarm.control_object.t_speed[d:].any(), swarm.control_object.t_speed
+        close(swarm)
+
+
+def check_altitude_separation() -> None:
+    """
+    Сосед на 1.2 м выше: вне safety_radius, но внутри vertical_safety_radius.
+    """
+    pushes = {}
+    for d in (2, 3):
+        swarm = make_swarmc(0, np.random.default_rng(0), d=d)
+        add_peer(swarm, 1, (0.0, 0.0, 2.2))
+        swarm.update_swarm_control(swarm.control_object.position[0:d].copy(), 0.1)
+        pushes[d] = swarm.control_buffers.swarm_part.copy()
+        close(swarm)
+    assert not pushes[2].any() and pushes[3][2] < -0.1, pushes
+    print(f"Сосед выше на 1.2 м: d = 2 — {pushes[2]}, d = 3 — {np.round(pushes[3], 3)}")
+
+
+def allocated_per_tick(tick, ticks: int = 200):
+    """
+    Память, выделяемая за такт: пик tracemalloc сверх уровня до серии тактов
+    за вычетом такой же серии пустых вызовов, и прирост после серии.
+
+    :return: Байты пика и прироста
+    """
+    for _ in range(10):
+        tick()
+
+    def series(function):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(ticks):
+            function()
+        current, peak = tracemalloc.get_traced_memory()
+        return peak - before, current - before
+
+    tracemalloc.start()
+    try:
+        baseline, _ = series(lambda: None)
+        peak, grown = series(tick)
+    finally:
+        tracemalloc.stop()
+    return peak - baseline, grown
+
+
+def check_allocations(peer_counts=(0, 100)) -> None:
+    """
+    Такт многочастотного режима между пакетами соседей не выделяет память,
+    с телеметрией и без неё.
+    """
+    rng = np.random.default_rng(2)
+    with tempfile.TemporaryDirectory() as directory:
+        for d, target in ((2, np.array([3.0, 1.0])), (3, np.array([3.0, 1.0, 2.0]))):
+            for n in peer_counts:
+                for telemetry_path in (None, os.path.join(directory, f"telemetry_{d}_{n}.bin")):
+                    swarm = make_swarmc(n, rng, swarm_params=dict(params, swarm_rate=1e-9), d=d,
+                                        telemetry_path=telemetry_path)
+                    swarm.swarm_term.max_age = float("inf")
+                    # Дрон движется: ограничения ускорения и скорости срабатывают на каждом такте
+                    swarm.control_object.position[3:5] = 0.6, 0.2
+                    cached = allocated_per_tick(lambda: swarm.update_swarm_control(target, 0.1))
+                    close(swarm)
+                    if cached != (0, 0):
+                        raise AssertionError(f"Такт из кэша выделяет память (телеметрия {telemetry_path}): "
+                                             f"пик {cached[0]} Б, прирост {cached[1]} Б")
+                swarm = make_swarmc(n, rng, d=d)
+                full = allocated_per_tick(lambda: swarm.update_swarm_control(target, 0.1))
+                close(swarm)
+                print(f"d = {d}, {n} соседей: такт из кэша 0 Б (и с телеметрией), с пересчётом {full[0]} Б")
+
+
+def run(peer_counts=(0, 10, 100, 1000), number: int = 1000) -> dict:
+    check_single_rate()
+    check_altitude_separation()
+    check_allocations()
+    rng = np.random.default_rng(0)
+    results = {}
+    for n in peer_counts:
+        swarm = make_swarmc(n, rng)
+        target = np.array([1.0, 1.0])
+        results[f"swarmc/update_swarm_control/{n}"] = measure(
+            lambda: swarm.update_swarm_control(target, 0.1), number=number)
+        close(swarm)
+
+        # Многочастотный такт между пакетами соседей: роевая составляющая из кэша
+        swarm = make_swarmc(n, rng, swarm_params=dict(params, swarm_rate=1e-9))
+        swarm.swarm_term.max_age = float("inf")
+        swarm.update_swarm_control(target, 0.1)
+        results[f"swarmc/update_swarm_control_cached/{n}"] = measure(
+            lambda: swarm.update_swarm_control(target, 0.1), number=number)
+        close(swarm)
+
+    pid = PIDController(*default_position_pid_matrix(2))
+    target = np.array([1.0, 1.0])
+    current = np.array([0.0, 0.5])
+    results["pid/compute_control"] = measure(
+        lambda: pid.compute_control(target_position=target, current_position=current, dt=0.1),
+        number=number * 10)
+
+    # Цена одного замера инструментации: бюджет — 1% от такта 0.1 с
+    metrics = SwarmMetrics()
+    results["metrics/observe"] = measure(lambda: metrics.observe("stage", 1e-4), number=number * 10)
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Запись телеметрии такта в кольцевой файл и чтение полёта обратно.
+
+Сначала проверяется, что после переполнения кольца и повторного открытия
+файла читатель возвращает последние capacity записей по порядку и с теми же
+значениями, затем замеряется время одной записи.
+
+Запуск: python benchmarks/bench_telemetry.py
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from common import measure, print_results
+from telemetry import TelemetryRecorder, load_telemetry
+
+XYZ = np.array([1.0, 2.0, 1.5])
+TARGET = np.array([5.0, 5.0])
+PID = np.array([0.2, 0.2])
+SWARM = np.array([-0.05, 0.01])
+T_SPEED = np.array([0.15, 0.21, 0.0, 0.0])
+
+
+def check_ring(path: str, capacity: int = 100) -> None:
+    recorder = TelemetryRecorder(path, capacity)
+    for i in range(150):
+        recorder.record(float(i), XYZ + i, TARGET, PID, SWARM, T_SPEED, i % 7)
+    recorder.close()
+    # Перезапуск сервиса: запись продолжается с того же места
+    recorder = TelemetryRecorder(path, capacity)
+    for i in range(150, 230):
+        recorder.record(float(i), XYZ + i, TARGET, PID, SWARM, T_SPEED, i % 7)
+    recorder.close()
+    flight = load_telemetry(path)
+    expected = np.arange(130, 230)
+    if not np.array_equal(flight["seq"], expected) or not np.array_equal(flight["time"], expected):
+        raise AssertionError(f"Неверный порядок записей: {flight['seq'][:5]}...")
+    if not np.allclose(flight["xyz"], XYZ + expected[:, None]) or flight["target"][0, 2] != 0.0:
+        raise AssertionError("Значения записей не совпадают")
+    if not np.allclose(flight["t_speed"][-1], T_SPEED) or flight["peers"][-1] != 229 % 7:
+        raise AssertionError("Команда или число соседей не совпадают")
+
+
+def run(number: int = 10000) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        check_ring(os.path.join(directory, "ring.bin"))
+        recorder = TelemetryRecorder(os.path.join(directory, "telemetry.bin"))
+        results = {"telemetry/record": measure(
+            lambda: recorder.record(1.0, XYZ, TARGET, PID, SWARM, T_SPEED, 10), number=number)}
+        recorder.close()
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
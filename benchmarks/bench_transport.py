@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Нагрузка приёма на дрон: рассылка на весь рой против групп multicast по ячейкам.
+
+На loopback поднимается N конечных точек — дронов на сетке с шагом SPACING.
+Широковещание на loopback не доставляется, поэтому плоская схема — одна
+группа на весь рой: каждый дрон принимает все пакеты, как при broadcast.
+В схеме с ячейками дрон подписан на блок 3×3 ячеек со стороной, равной
+радиусу взаимодействия. За раунд каждый дрон отправляет один пакет;
+считается, сколько пакетов принял каждый дрон и сколько времени занял приём,
+и проверяется, что все соседи в радиусе взаимодействия услышаны.
+
+Перед замерами проверяются две подсети (разные порты на loopback),
+связанные ретрансляторами через UDP-туннель, и Swarmc с
+state_transport = "multicast".
+
+Запуск: python benchmarks/bench_transport.py
+"""
+import math
+import time
+
+import numpy as np
+
+from common import FakeDrone, print_results
+from main_radxa import Swarmc
+from params import params
+from swarm_kernel import interaction_radius
+from swarm_protocol import BinaryStateEncoder
+from swarm_transport import (SEQ_ID_OFFSET, SEQ_ID_STRUCT, MulticastCellTransport, MulticastSide, StateRelay,
+                             TunnelSide, area_cells)
+
+INTERFACE = "127.0.0.1"
+PORT = 47400
+RATE = 20
+SPACING = 2.5
+# Прогноз конфликтов включён явно: от conflict_horizon зависит радиус
+# взаимодействия, а с ним размер ячеек и расстановка дронов в проверках
+SWARM_PARAMS = dict(params, conflict_horizon=2.0)
+# Радиус Swarmc при max_speed = 1 м/с
+RADIUS = interaction_radius(SWARM_PARAMS, 1.0 + SWARM_PARAMS["max_speed"])
+SCHEMES = {"flat": 1e9, "cells": RADIUS}
+
+
+def grid(n: int) -> np.ndarray:
+    side = math.ceil(math.sqrt(n))
+    index = np.arange(n)
+    return np.column_stack([index % side, index // side]) * SPACING + 0.3
+
+
+def drain(transport) -> list:
+    ids = []
+    while True:
+        received = transport.receive()
+        if received is None:
+            return ids
+        ids.append(SEQ_ID_STRUCT.unpack_from(received[0], SEQ_ID_OFFSET)[1])
+
+
+def receive_round(transports, positions, encoders, batch: int = 16):
+    """
+    Раунд рассылки: дроны отправляют пачками по batch, после каждой пачки все
+    дроны вычитывают сокеты (очередь сокета ограничена).
+
+    :return: Принятые каждым дроном id и время приёма каждого дрона (с)
+    """
+    heard = [[] for _ in transports]
+    busy = np.zeros(len(transports))
+    for start in range(0, len(transports), batch):
+        for agent in range(start, min(start + batch, len(transports))):
+            transports[agent].send(encoders[agent].encode((*positions[agent], 1.0), (0.0, 0.0, 0.0)))
+        for agent, transport in enumerate(transports):
+            started = time.perf_counter()
+            heard[agent].extend(drain(transport))
+            busy[agent] += time.perf_counter() - started
+    return heard, busy
+
+
+def check_neighbours(heard, positions) -> None:
+    offsets = positions[:, None, :] - positions[None, :, :]
+    within = np.einsum("ijk,ijk->ij", offsets, offsets) <= RADIUS * RADIUS
+    for agent, ids in enumerate(heard):
+        missing = set(np.flatnonzero(within[agent]).tolist()) - set(ids)
+        if missing:
+            raise AssertionError(f"Дрон {agent} не услышал соседей {sorted(missing)[:5]}")
+
+
+def measure_scheme(n: int, cell_size: float, port: int, rounds: int = 3) -> dict:
+    positions = grid(n)
+    transports = [MulticastCellTransport(port, cell_size, interface=INTERFACE, timeout=0.0) for _ in range(n)]
+    try:
+        for transport, position in zip(transports, positions):
+            transport.update_position(position)
+        encoders = [BinaryStateEncoder(agent) for agent in range(n)]
+        packets, busy_rounds = [], []
+        for _ in range(rounds):
+            heard, busy = receive_round(transports, positions, encoders)
+            check_neighbours(heard, positions)
+            packets.append(np.array([len(ids) for ids in heard]))
+            busy_rounds.append(busy.mean())
+        return {"packets": np.mean(packets, axis=0), "busy": np.array(busy_rounds)}
+    finally:
+        for transport in transports:
+            transport.close()
+
+
+def check_relay() -> None:
+    """
+    Подсети A и B (разные порты) связаны двумя ретрансляторами через туннель:
+    дроны у границы слышат друг друга только через них, каждый пакет — один раз.
+    """
+    port_a, port_b, tunnel_a, tunnel_b = PORT + 10, PORT + 20, PORT + 30, PORT + 31
+    cells = area_cells((-20.0, -20.0), (20.0, 20.0), RADIUS)
+    drone_a = MulticastCellTransport(port_a, RADIUS, interface=INTERFACE, timeout=0.0)
+    drone_b = MulticastCellTransport(port_b, RADIUS, interface=INTERFACE, timeout=0.0)
+    encoder_a, encoder_b = BinaryStateEncoder(1), BinaryStateEncoder(2)
+    relays = []
+    try:
+        drone_a.send(encoder_a.encode((-0.5, 0.3, 1.0), (0.0, 0.0, 0.0)))
+        drone_b.send(encoder_b.encode((1.5, 0.3, 1.0), (0.0, 0.0, 0.0)))
+        if 1 in drain(drone_b) or 2 in drain(drone_a):
+            raise AssertionError("Подсети не разделены")
+        relays = [StateRelay([MulticastSide(port_a, RADIUS, cells, interface=INTERFACE),
+                              TunnelSide(tunnel_a, [(INTERFACE, tunnel_b)], bind=INTERFACE)]),
+                  StateRelay([MulticastSide(port_b, RADIUS, cells, interface=INTERFACE),
+                              TunnelSide(tunnel_b, [(INTERFACE, tunnel_a)], bind=INTERFACE)])]
+        drone_a.send(encoder_a.encode((-0.5, 0.3, 1.0), (0.0, 0.0, 0.0)))
+        drone_b.send(encoder_b.encode((1.5, 0.3, 1.0), (0.0, 0.0, 0.0)))
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline:
+            if not sum(relay.poll(0.02) for relay in relays):
+                break
+        heard_a, heard_b = sorted(drain(drone_a)), sorted(drain(drone_b))
+        if heard_a != [1, 2] or heard_b != [1, 2]:
+            raise AssertionError(f"Через ретрансляторы: A слышит {heard_a}, B слышит {heard_b}")
+        forwarded = sum(relay.forwarded for relay in relays)
+        duplicates = sum(relay.duplicates for relay in relays)
+        print(f"Ретрансляторы: переслано {forwarded}, отброшено повторов {duplicates}; "
+              f"A слышит {heard_a}, B слышит {heard_b}")
+    finally:
+        for closable in (drone_a, drone_b, *relays):
+            closable.close()
+
+
+def check_swarmc() -> None:
+    """
+    Swarmc с state_transport = "multicast" слышит соседа своей ячейки и не слышит дальнего.
+    """
+    swarm = Swarmc(control_object=FakeDrone(mavlink_port=PORT + 40), broadcast_port=PORT + 40, ip="localhost",
+                   params=dict(SWARM_PARAMS, state_transport="multicast", multicast_interface=INTERFACE),
+                   peer_ttl=3600.)
+    swarm.start()
+    near = MulticastCellTransport(swarm.state_port, swarm.interaction_radius, interface=INTERFACE, timeout=0.0)
+    far = MulticastCellTransport(swarm.state_port, swarm.interaction_radius, interface=INTERFACE, timeout=0.0)
+    try:
+        heard = set()
+        deadline = time.monotonic() + 2.0
+        while time.monotonic() < deadline and swarm.numeric_id not in heard:
+            near.send(BinaryStateEncoder(1).encode((2.0, 0.5, 1.0), (0.0, 0.0, 0.0)))
+            far.send(BinaryStateEncoder(2).encode((50.0, 50.0, 1.0), (0.0, 0.0, 0.0)))
+            time.sleep(0.1)
+            heard.update(drain(near))
+        swarm.refresh_peers()
+        peers = set(swarm.peer_table.ids())
+        if peers != {1} or swarm.numeric_id not in heard:
+            raise AssertionError(f"Swarmc слышит {peers}, ближний сосед слышит {heard}")
+        print(f"Swarmc (multicast): соседи {sorted(peers)}, ближний сосед слышит Swarmc")
+    finally:
+        swarm.stop()
+        near.close()
+        far.close()
+
+
+def run(fleet_sizes=(64, 256, 512)) -> dict:
+    check_relay()
+    check_swarmc()
+    results = {}
+    for n in fleet_sizes:
+        for offset, (scheme, cell_size) in enumerate(SCHEMES.items()):
+            load = measure_scheme(n, cell_size, PORT + offset)
+            busy_us = load["busy"] * 1e6
+            results[f"transport/{scheme}_receive/{n}"] = {"min_us": float(busy_us.min()),
+                                                          "mean_us": float(busy_us.mean()),
+                                                          "number": len(busy_us)}
+            print(f"{n} дронов, {scheme}: пакетов на дрон за раунд — в среднем {load['packets'].mean():.0f}, "
+                  f"макс. {load['packets'].max():.0f}; при {RATE} Гц приём занимает "
+                  f"{busy_us.min() * RATE / 1e6:.2%} ядра")
+    return results
+
+
+if __name__ == "__main__":
+    print_results(run())
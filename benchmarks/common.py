@@ -0,0 +1,109 @@
+"""
+Общие части бенчмарков: путь к скриптам, фейковый дрон, замеры и JSON-отчёты.
+"""
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from typing import Callable, Dict
+
+import numpy as np
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+SCRIPTS_DIR = os.path.join(ROOT_DIR, "src", "swarmpion", "scripts")
+
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+
+class FakeDrone:
+    """
+    Объект управления без MAVLink: хранит состояние и принимает t_speed.
+
+    Повторяет поля Pion, которые используют SwarmCommunicator и Swarmc.
+    """
+
+    def __init__(self, name: str = "fake", mavlink_port: int = 0) -> None:
+        self.name = name
+        self.ip = "127.0.0.1"
+        self.mavlink_port = mavlink_port
+        self.position = np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0])
+        self.attitude = np.zeros(6)
+        self.t_speed = np.zeros(4)
+        self.target_point = np.array([5.0, 5.0, 1.0, 0.0])
+        self.tracking = False
+        self.point_reached = False
+        self.threads = []
+
+    @property
+    def xyz(self) -> np.ndarray:
+        return self.position[0:3]
+
+    def set_v(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        self.tracking = False
+
+    def stop_moving(self) -> None:
+        self.tracking = False
+
+
+def measure(function: Callable[[], object], number: int = 1000, repeat: int = 5) -> Dict[str, float]:
+    """
+    Замер времени вызова: лучший и средний результат по repeat сериям.
+
+    :return: Время одного вызова в микросекундах
+    """
+    runs = np.array(timeit.repeat(function, number=number, repeat=repeat)) / number
+    return {"min_us": float(runs.min() * 1e6), "mean_us": float(runs.mean() * 1e6), "number": number}
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "-C", ROOT_DIR, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_results(path: str, results: Dict[str, Dict[str, float]]) -> None:
+    """
+    Сохраняет результаты вместе с ревизией и окружением.
+    """
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2, ensure_ascii=False)
+
+
+def compare_results(old_path: str, results: Dict[str, Dict[str, float]], key: str = "min_us") -> None:
+    """
+    Печатает отношение нового времени к старому по общим кейсам.
+    """
+    with open(old_path) as file:
+        old = json.load(file)
+    print(f"\nСравнение с {old_path} ({old['meta']['revision']}), метрика {key}:")
+    for name, values in results.items():
+        before = old["results"].get(name, {}).get(key)
+        if before is None or key not in values:
+            continue
+        print(f"  {name:<45} {before:>10.2f} -> {values[key]:>10.2f}  x{values[key] / before:.2f}")
+
+
+def print_results(results: Dict[str, Dict[str, float]]) -> None:
+    for name, values in results.items():
+        print(f"{name:<45} {values['min_us']:>10.2f} us")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Запуск набора бенчмарков горячего пути и запись результатов в JSON.
+
+Все кейсы работают без сети и дрона: вместо Pion используется FakeDrone,
+вместо UDP — шина симулятора. bench_latency.py в набор не входит, так как
+гоняет трафик через loopback в реальном времени.
+
+Примеры:
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --only swarmc sim
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+"""
+import argparse
+import os
+
+from common import ROOT_DIR, compare_results, git_revision, print_results, write_results
+
+import bench_batch_pid
+import bench_conflict
+import bench_ground_station
+import bench_neighbour_index
+import bench_peer_table
+import bench_protocol
+import bench_replay
+import bench_sim
+import bench_swarm_kernel
+import bench_swarmc
+import bench_telemetry
+import bench_transport
+
+SUITES = {
+    "swarmc": bench_swarmc.run,
+    "swarm_kernel": bench_swarm_kernel.run,
+    "neighbour_index": bench_neighbour_index.run,
+    "peer_table": bench_peer_table.run,
+    "protocol": bench_protocol.run,
+    "sim": bench_sim.run,
+    "telemetry": bench_telemetry.run,
+    "batch_pid": bench_batch_pid.run,
+    "ground_station": bench_ground_station.run,
+    "conflict": bench_conflict.run,
+    "transport": bench_transport.run,
+    "replay": bench_replay.run,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарки sPion")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), help="Запустить только эти наборы")
+    parser.add_argument("--output", default=None,
+                        help="Файл результатов, по умолчанию benchmarks/results/<ревизия>.json")
+    parser.add_argument("--compare", default=None, help="JSON предыдущего запуска для сравнения")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only or SUITES:
+        print(f"== {name}")
+        suite_results = SUITES[name]()
+        print_results(suite_results)
+        results.update(suite_results)
+
+    output = args.output or os.path.join(ROOT_DIR, "benchmarks", "results", f"{git_revision()}.json")
+    write_results(output, results)
+    print(f"\nРезультаты записаны в {output}")
+    if args.compare:
+        compare_results(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
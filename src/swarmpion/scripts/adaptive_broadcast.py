@@ -0,0 +1,81 @@
+"""
+Адаптивная частота рассылки состояния.
+
+Неподвижный дрон без соседей рядом рассылает состояние редко, быстрый или
+окружённый соседями внутри unstable_radius — часто. Срочность
+u = min(1, max(speed / speed_ref, nearby / density_ref)) переводит интервал
+от max_interval (u = 0) к min_interval (u = 1) по логарифмической шкале.
+
+Общий бюджет эфира задаётся в пакетах в секунду на весь рой. Каждый дрон
+знает число соседей по таблице и не рассылает чаще своей доли
+airtime_budget / (peers + 1), поэтому суммарная нагрузка не превышает бюджет,
+если все дроны следуют тому же правилу.
+"""
+from typing import Optional, Union
+
+import numpy as np
+
+Number = Union[float, np.ndarray]
+
+
+class AdaptiveBroadcaster:
+    """
+    Расчёт интервала рассылки по скорости, плотности соседей и бюджету эфира.
+
+    Методы принимают как скаляры, так и массивы numpy (для симулятора).
+    """
+
+    def __init__(self,
+                 min_interval: float = 0.1,
+                 max_interval: float = 1.0,
+                 speed_ref: float = 0.5,
+                 density_ref: float = 3.0,
+                 airtime_budget: Optional[float] = None) -> None:
+        """
+        :param min_interval: Интервал при наибольшей срочности (в секундах)
+        :param max_interval: Интервал неподвижного дрона без соседей рядом
+        :param speed_ref: Скорость, при которой рассылка идёт с min_interval (м/с)
+        :param density_ref: Число соседей внутри unstable_radius, при котором
+            рассылка идёт с min_interval
+        :param airtime_budget: Бюджет эфира на весь рой, пакетов в секунду;
+            None — без ограничения
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Нужно 0 < min_interval <= max_interval")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.speed_ref = speed_ref
+        self.density_ref = density_ref
+        self.airtime_budget = airtime_budget
+
+    def urgency(self, speed: Number, nearby: Number) -> Number:
+        return np.clip(np.maximum(np.asarray(speed) / self.speed_ref,
+                                  np.asarray(nearby) / self.density_ref), 0.0, 1.0)
+
+    def interval(self, speed: Number, nearby: Number, peers: Number = 0) -> Number:
+        """
+        Интервал до следующей рассылки.
+
+        :param speed: Модуль скорости дрона
+        :param nearby: Число соседей внутри unstable_radius
+        :param peers: Число всех слышимых соседей (для доли бюджета эфира)
+        :return: Интервал в секундах
+        """
+        ratio = self.min_interval / self.max_interval
+        interval = self.max_interval * ratio ** self.urgency(speed, nearby)
+        if self.airtime_budget:
+            interval = np.maximum(interval, (np.asarray(peers) + 1) / self.airtime_budget)
+        return interval if isinstance(interval, np.ndarray) and interval.ndim else float(interval)
+
+
+def adaptive_broadcaster(params: dict) -> Optional[AdaptiveBroadcaster]:
+    """
+    Адаптивная рассылка из параметров роя, None — если она выключена.
+    """
+    if not params.get("adaptive_broadcast"):
+        return None
+    return AdaptiveBroadcaster(min_interval=params.get("broadcast_min_interval", 0.1),
+                               max_interval=params.get("broadcast_max_interval", 1.0),
+                               speed_ref=params.get("broadcast_speed_ref", 0.5),
+                               density_ref=params.get("broadcast_density_ref", 3.0),
+                               airtime_budget=params.get("airtime_budget"))
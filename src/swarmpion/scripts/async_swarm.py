@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Вариант Swarmc на asyncio: один event loop на дрон.
+
+Приём пакетов роя идёт через DatagramProtocol без опроса очереди, такт
+управления — задача того же loop, а блокирующие вызовы объекта Pion
+(взлёт, посадка, goto и т.п.) выполняются в отдельном потоке-исполнителе.
+"""
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+import numpy as np
+from pion import Pion
+from swarm_server import CMD, DDatagram
+
+try:
+    from pion.functions import get_numeric_id, get_unique_instance_id
+except ImportError:  # в новых версиях pion функции вынесены в pionfunc
+    from pionfunc.functions import get_numeric_id, get_unique_instance_id
+
+from batch_pid import BatchPIDController
+from main_radxa import get_local_ip
+from neighbour_index import UniformGridIndex
+from params import params as default_params
+from peer_table import PeerTable, RecentPeers
+from adaptive_broadcast import adaptive_broadcaster
+from telemetry import TelemetryRecorder
+from rate_loop import FixedRateLoop, LatencyProbe
+from swarm_kernel import (STATE_DATA_LEN, ControlBuffers, SwarmTermCache, control_periods, control_step,
+                          interaction_radius, position_pid_matrix, swarm_term_max_age)
+from swarm_protocol import (FLAG_POINT_REACHED, FLAG_TRACKING, BinaryStateEncoder,
+                            decode_state, open_broadcast_socket)
+
+
+class SwarmDatagramProtocol(asyncio.DatagramProtocol):
+    """
+    Протокол приёма датаграмм роя.
+
+    Каждая датаграмма сразу передаётся в обработчик вместе со временем приёма.
+    """
+
+    def __init__(self, on_datagram: Callable[[bytes, Tuple[str, int], float], None]) -> None:
+        self.on_datagram = on_datagram
+        self.transport: Optional[asyncio.DatagramTransport] = None
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: Tuple[str, int]) -> None:
+        self.on_datagram(data, addr, time.perf_counter())
+
+    def error_received(self, exc: Exception) -> None:
+        print("Ошибка приёма датаграммы:", exc)
+
+
+class AsyncSwarmc:
+    """
+    Роевой коммуникатор на asyncio с тем же законом управления, что и Swarmc.
+
+    Состояние соседей принимается в бинарном формате на state_port, команды —
+    датаграммами protobuf на broadcast_port.
+    """
+
+    def __init__(self,
+                 control_object: Any,
+                 unique_id: Optional[int] = None,
+                 broadcast_port: int = 37020,
+                 state_port: Optional[int] = None,
+                 broadcast_interval: float = 0.05,
+                 max_speed: float = 1.,
+                 time_sleep_update_velocity: float = 0.1,
+                 params: Optional[dict] = None,
+                 d: int = 2,
+                 broadcast_address: str = "<broadcast>",
+                 peer_ttl: Optional[float] = None,
+                 peer_capacity: int = 256,
+                 telemetry_path: Optional[str] = None,
+                 ip: Optional[str] = None,
+                 instance_number: Optional[Any] = None) -> None:
+        """
+        :param control_object: Объект управления дроном
+        :param unique_id: Уникальный идентификатор дрона в рое, по умолчанию из ip как у Swarmc
+        :param broadcast_port: Порт команд
+        :param state_port: Порт бинарного состояния, по умолчанию broadcast_port + 1
+        :param broadcast_interval: Интервал рассылки состояния (в секундах)
+        :param max_speed: Ограничение ПИД-сигнала
+        :param time_sleep_update_velocity: Период такта управления (в секундах)
+        :param params: Параметры роя, по умолчанию params.py
+        :param d: Размерность пространства
+        :param broadcast_address: Адрес рассылки состояния
+        :param peer_ttl: Время жизни соседа без пакетов, по умолчанию max(1, 4 * broadcast_interval)
+        :param peer_capacity: Максимальное число соседей в таблице
+        :param telemetry_path: Файл телеметрии такта (telemetry.py), None — без записи
+        :param ip: Адрес дрона для идентификатора, по умолчанию control_object.ip
+        :param instance_number: Номер экземпляра на одном адресе
+        """
+        self.control_object = control_object
+        if not unique_id:
+            # Как в SwarmCommunicator: target_id команд и id соседей совпадают со Swarmc
+            local_ip = ip if ip is not None else control_object.ip
+            unique_id = (get_unique_instance_id(local_ip, instance_number=instance_number)
+                         if ip != "localhost" else control_object.mavlink_port)
+        self.unique_id = unique_id
+        self.numeric_id = get_numeric_id(unique_id)
+        self.group_id = 0
+        self.broadcast_port = broadcast_port
+        self.state_port = state_port if state_port is not None else broadcast_port + 1
+        self.broadcast_interval = broadcast_interval
+        self.broadcast_address = broadcast_address
+        self.max_speed = max_speed
+        self.time_sleep_update_velocity = time_sleep_update_velocity
+        self.params = params if params is not None else default_params
+        self.d = d
+        self.env = {}
+        self.position_pid_matrix = position_pid_matrix(self.params, d)
+        self._pid_position_controller: Optional[BatchPIDController] = None
+        self.control_buffers = ControlBuffers(d)
+        # Наибольшая скорость дрона: ПИД-сигнал плюс роевая составляющая
+        self.interaction_radius = interaction_radius(self.params, max_speed + self.params["max_speed"], d)
+        self.neighbour_index = UniformGridIndex(cell_size=self.interaction_radius, d=d,
+                                                speed_limit=max_speed + self.params["max_speed"])
+        self.broadcaster = adaptive_broadcaster(self.params)
+        if peer_ttl is None:
+            slowest = self.broadcaster.max_interval if self.broadcaster else broadcast_interval
+            peer_ttl = max(1.0, 4 * slowest)
+        self.peer_table = PeerTable(capacity=peer_capacity, ttl=peer_ttl, index=self.neighbour_index,
+                                    max_extrapolation=self.params.get("max_extrapolation", 0.0),
+                                    estimate_clock_offset=self.params.get("estimate_clock_offset", False))
+        # env ограничивается при приёме, как в Swarmc: и вне слежения за точкой
+        self.recent_peers = RecentPeers(peer_capacity, peer_ttl)
+        self.control_period, swarm_period = control_periods(self.params, time_sleep_update_velocity)
+        self.swarm_term = SwarmTermCache(min_period=swarm_period or 0.0,
+                                         max_age=swarm_term_max_age(swarm_period, broadcast_interval,
+                                                                    self.peer_table.max_extrapolation))
+        self._swarm_neighbours = self.swarm_neighbours
+        self.control_loop = FixedRateLoop(period=self.control_period)
+        self.latency_probe = LatencyProbe()
+        self.telemetry = TelemetryRecorder(telemetry_path) if telemetry_path else None
+        self.state_encoder = BinaryStateEncoder(self.numeric_id)
+        self.decoder = DDatagram(id=self.numeric_id)
+        # Один поток, чтобы команды в MAVLink уходили последовательно
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pion_bridge")
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.state_transport: Optional[asyncio.DatagramTransport] = None
+        self.command_transport: Optional[asyncio.DatagramTransport] = None
+        self._control_task: Optional[asyncio.Task] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    async def call(self, function: Callable, *args: Any) -> Any:
+        """
+        Выполняет блокирующий вызов объекта управления вне event loop.
+        """
+        return await self.loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def run(self) -> None:
+        """
+        Запускает приём, рассылку состояния и ждёт вызова stop().
+        """
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        state_socket = open_broadcast_socket(self.state_port)
+        state_socket.setblocking(False)
+        self.state_transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: SwarmDatagramProtocol(self._on_state_datagram), sock=state_socket)
+        command_socket = open_broadcast_socket(self.broadcast_port)
+        command_socket.setblocking(False)
+        self.command_transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: SwarmDatagramProtocol(self._on_command_datagram), sock=command_socket)
+        broadcast_task = self.loop.create_task(self._broadcast_loop())
+        print(f"AsyncSwarmc запущен, id {self.unique_id}")
+        try:
+            await self._stopped.wait()
+        finally:
+            self.control_object.tracking = False
+            broadcast_task.cancel()
+            if self._control_task is not None:
+                await asyncio.gather(self._control_task, return_exceptions=True)
+            self.state_transport.close()
+            self.command_transport.close()
+            self.executor.shutdown(wait=False)
+            if self.telemetry is not None:
+                self.telemetry.close()
+
+    def stop(self) -> None:
+        """
+        Останавливает коммуникатор, можно вызывать из другого потока.
+        """
+        if self.loop is not None and self._stopped is not None:
+            self.loop.call_soon_threadsafe(self._stopped.set)
+
+    def broadcast_interval_now(self) -> float:
+        """
+        Интервал рассылки для текущей скорости и плотности соседей.
+        """
+        if self.broadcaster is None:
+            return self.broadcast_interval
+        position = self.control_object.position
+        speed = float(np.linalg.norm(position[3:3 + self.d]))
+        nearby, _ = self.neighbour_index.query(position[0:self.d],
+                                               self.params.get("unstable_radius", self.interaction_radius))
+        return self.broadcaster.interval(speed, len(nearby), len(self.peer_table))
+
+    async def _broadcast_loop(self) -> None:
+        last_sent = -float("inf")
+        while True:
+            interval = self.broadcast_interval_now()
+            if time.monotonic() - last_sent >= interval:
+                last_sent = time.monotonic()
+                try:
+                    self.state_transport.sendto(self.encode_state(),
+                                                (self.broadcast_address, self.state_port))
+                except OSError as error:
+                    print("Ошибка отправки бинарного состояния:", error)
+            poll = self.broadcaster.min_interval if self.broadcaster else interval
+            await asyncio.sleep(max(0.0, min(last_sent + interval - time.monotonic(), poll)))
+
+    def encode_state(self) -> bytes:
+        position = self.control_object.position
+        flags = ((FLAG_TRACKING if self.control_object.tracking else 0)
+                 | (FLAG_POINT_REACHED if self.control_object.point_reached else 0))
+        return self.state_encoder.encode(position[0:3], position[3:6], flags)
+
+    def _on_state_datagram(self, data: bytes, addr: Tuple[str, int], received_at: float) -> None:
+        state = decode_state(data)
+        if state is None or state.id == self.numeric_id:
+            return
+        self.latency_probe.mark_received(received_at)
+        self.ingest(state)
+
+    def _on_command_datagram(self, data: bytes, addr: Tuple[str, int], received_at: float) -> None:
+        is_valid, state = self.decoder.read_serialized(data)
+        if not is_valid:
+            return
+        if state.target_id:
+            if self.unique_id != int(state.target_id):
+                return
+        elif state.group_id and state.group_id != self.group_id:
+            return
+        if state.command:
+            self.loop.create_task(self.handle_command(state))
+        elif state.id != self.numeric_id:
+            # Состояние от дронов со старым форматом рассылки
+            self.latency_probe.mark_received(received_at)
+            self.ingest(state)
+
+    def ingest(self, state: Any) -> None:
+        """
+        Записывает состояние соседа в env и ставит его в очередь таблицы соседей.
+        """
+        self.env[state.id] = state
+        for forgotten in self.recent_peers.touch(state.id, self.peer_table.clock()):
+            self.env.pop(forgotten, None)
+        if len(state.data) >= STATE_DATA_LEN:
+            self.peer_table.submit(state)
+
+    def refresh_peers(self) -> int:
+        """
+        Применяет пакеты соседей, пришедшие с прошлого такта, и удаляет устаревших.
+
+        :return: Количество изменений таблицы соседей
+        """
+        ingested = self.peer_table.ingest_pending()
+        stale = self.peer_table.evict_stale()
+        return ingested + len(stale)
+
+    async def handle_command(self, state: Any) -> None:
+        """
+        Обработка команд; блокирующие вызовы Pion уходят в исполнитель.
+        """
+        try:
+            command = CMD(state.command)
+            if command == CMD.GOTO:
+                x, y, z, yaw = state.data
+                if self.control_object.tracking:
+                    self.control_object.target_point = np.array([x, y, z, yaw])
+                else:
+                    await self.call(self.control_object.goto_from_outside, x, y, z, yaw)
+            elif command == CMD.SWARM_ON:
+                self.start_tracking()
+            elif command == CMD.STOP:
+                self.control_object.tracking = False
+                await self.call(self.control_object.stop_moving)
+            elif command in (CMD.TAKEOFF, CMD.LAND, CMD.ARM, CMD.DISARM):
+                self.control_object.tracking = False
+                await self.call(getattr(self.control_object, command.name.lower()))
+            elif command == CMD.SET_SPEED:
+                vx, vy, vz, yaw_rate = state.data
+                await self.call(self.control_object.send_speed, vx, vy, vz, yaw_rate)
+            elif command == CMD.SET_GROUP:
+                self.group_id = int(state.data[0])
+            else:
+                print("Команда не поддерживается в AsyncSwarmc:", command)
+        except Exception as e:
+            print("Ошибка при выполнении команды:", e)
+
+    def start_tracking(self) -> None:
+        """
+        Запускает такт управления как задачу event loop.
+        """
+        if self._control_task is not None and not self._control_task.done():
+            print("Режим слежения за точкой уже включен")
+            return
+        self._control_task = self.loop.create_task(self.smart_point_tacking())
+
+    async def smart_point_tacking(self) -> None:
+        print("Smart point tracking")
+        await self.call(self.control_object.set_v)
+        self.control_object.point_reached = False
+        self.control_object.tracking = True
+        self._pid_position_controller = BatchPIDController.from_matrix(self.position_pid_matrix, 1)
+        self.control_loop.reset()
+        self.swarm_term.reset()
+        await self.control_loop.run_async(
+            lambda dt: self.update_swarm_control(self.control_object.target_point, dt),
+            lambda: self.control_object.tracking)
+        print(f"Smart point tracking остановлен: {self.control_loop.report()}")
+        self.control_object.t_speed = np.zeros(4)
+
+    def swarm_neighbours(self, position: np.ndarray):
+        """
+        Позиции и скорости соседей внутри радиуса взаимодействия, как Swarmc.swarm_neighbours.
+        """
+        return self.neighbour_index.query(position, self.interaction_radius, at=self.peer_table.clock(),
+                                          max_age=self.peer_table.max_extrapolation)
+
+    def update_swarm_control(self, target_point, dt) -> None:
+        """
+        Такт управления, как Swarmc.update_swarm_control.
+        """
+        if self.refresh_peers():
+            self.swarm_term.invalidate()
+        state_vector = self.control_object.position
+        buffers = self.control_buffers
+        control_step(buffers, self._pid_position_controller, self.swarm_term, state_vector, target_point, dt,
+                     time.perf_counter(), self._swarm_neighbours, self.max_speed, self.params)
+        self.control_object.t_speed = buffers.t_speed()
+        if self.telemetry is not None:
+            self.telemetry.record(time.time(), buffers.xyz, buffers.target, buffers.pid_signal,
+                                  buffers.swarm_part, self.control_object.t_speed, len(self.peer_table))
+        self.latency_probe.mark_command(time.perf_counter())
+
+
+def main():
+    ip = get_local_ip()
+    drone = Pion(ip='localhost',
+                 mavlink_port=5656,
+                 connection_method='udpout',
+                 name=f"Drone-{ip}",
+                 dt=0.001,
+                 logger=True,
+                 max_speed=0.5)
+    swarm_comm = AsyncSwarmc(control_object=drone,
+                             ip=ip,
+                             broadcast_port=37020,
+                             broadcast_interval=0.5,
+                             time_sleep_update_velocity=0.1,
+                             params=default_params)
+    try:
+        asyncio.run(swarm_comm.run())
+    except KeyboardInterrupt:
+        drone.stop()
+        print("Swarm communicator остановлен.")
+
+
+if __name__ == "__main__":
+    main()
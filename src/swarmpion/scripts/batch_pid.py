@@ -0,0 +1,141 @@
+"""
+ПИД-регулятор позиции для многих дронов сразу.
+
+Состояние (интеграл и предыдущая ошибка) хранится массивами (N, d), и
+сигналы всех дронов считаются одним вызовом вместо цикла по
+``pion.cython_pid.PIDController``. Без ограничений результат совпадает со
+скалярным регулятором: порядок операций тот же.
+
+Антивиндап (необязательный):
+- integral_limit — интеграл ограничивается по модулю по каждой оси;
+- output_limit — сигнал ограничивается по каждой оси (как max_speed у
+  Swarmc), а интеграл не накапливается по тем осям, где сигнал
+  в насыщении и ошибка толкает его дальше в насыщение.
+"""
+from typing import Optional, Union
+
+import numpy as np
+
+Number = Union[float, np.ndarray]
+
+
+class BatchPIDController:
+    """
+    ПИД-регуляторы N дронов с общими или индивидуальными коэффициентами.
+    """
+
+    def __init__(self,
+                 kp: np.ndarray,
+                 ki: np.ndarray,
+                 kd: np.ndarray,
+                 n_agents: Optional[int] = None,
+                 integral_limit: Optional[Number] = None,
+                 output_limit: Optional[Number] = None) -> None:
+        """
+        :param kp: Коэффициенты (d,) — общие для всех — или (N, d) — свои у каждого дрона
+        :param ki: То же для интегральной составляющей
+        :param kd: То же для дифференциальной составляющей
+        :param n_agents: Число дронов; можно не указывать, если коэффициенты (N, d)
+        :param integral_limit: Ограничение интеграла по модулю (скаляр, (d,) или (N, d)); None — без ограничения
+        :param output_limit: Ограничение сигнала по модулю по каждой оси; None — без ограничения
+        """
+        gains = [np.asarray(gain, dtype=np.float64) for gain in (kp, ki, kd)]
+        if n_agents is None:
+            n_agents = next((len(gain) for gain in gains if gain.ndim == 2), None)
+            if n_agents is None:
+                raise ValueError("n_agents не задан, а коэффициенты общие (d,)")
+        d = gains[0].shape[-1]
+        self.n_agents = n_agents
+        self.d = d
+        # Коэффициенты всегда (N, d), чтобы их можно было менять для отдельных дронов
+        self.kp, self.ki, self.kd = (np.array(np.broadcast_to(gain, (n_agents, d))) for gain in gains)
+        self.integral_limit = integral_limit
+        self.output_limit = output_limit
+        self.integral = np.zeros((n_agents, d))
+        self.previous_error = np.zeros((n_agents, d))
+        # Рабочие массивы шага: compute_control не создаёт временных массивов
+        self._error = np.zeros((n_agents, d))
+        self._work = np.zeros((n_agents, d))
+        self._derivative = np.zeros((n_agents, d))
+        self._dt = np.zeros((n_agents, d))
+        self._integral_before = np.zeros((n_agents, d))
+
+    @classmethod
+    def from_matrix(cls, position_pid_matrix: np.ndarray, n_agents: int, **kwargs) -> "BatchPIDController":
+        """
+        Регуляторы из матрицы коэффициентов Swarmc (строки kp, ki, kd), как PIDController(*matrix).
+        """
+        return cls(*position_pid_matrix, n_agents=n_agents, **kwargs)
+
+    def set_gains(self, agents, kp=None, ki=None, kd=None) -> None:
+        """
+        Меняет коэффициенты отдельных дронов.
+
+        :param agents: Индекс, срез или маска дронов
+        """
+        for target, gain in ((self.kp, kp), (self.ki, ki), (self.kd, kd)):
+            if gain is not None:
+                target[agents] = gain
+
+    def reset(self, agents=slice(None)) -> None:
+        """
+        Обнуляет состояние дронов (всех по умолчанию), как новый PIDController.
+        """
+        self.integral[agents] = 0.0
+        self.previous_error[agents] = 0.0
+
+    def compute_control(self,
+                        target_position: np.ndarray,
+                        current_position: np.ndarray,
+                        dt: Number,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Сигналы всех дронов за один шаг.
+
+        Состояние обновляется на месте. С out, скалярным dt и входами (N, d)
+        без ограничений шаг не выделяет память.
+
+        :param target_position: Целевые точки (N, d) или одна общая (d,)
+        :param current_position: Текущие позиции (N, d)
+        :param dt: Шаг времени, общий или (N,) для каждого дрона
+        :param out: Массив (N, d) для сигналов; по умолчанию — новый
+        :return: Сигналы (N, d)
+        """
+        error, work, derivative, dt_buffer = self._error, self._work, self._derivative, self._dt
+        np.subtract(target_position, current_position, out=error)
+        per_agent = getattr(dt, "ndim", 0) > 0
+        if per_agent:
+            np.copyto(dt_buffer, np.asarray(dt, dtype=np.float64)[:, None])
+        else:
+            dt_buffer.fill(dt)
+        if out is None:
+            out = np.empty_like(error)
+        if self.output_limit is not None:
+            np.copyto(self._integral_before, self.integral)
+        np.multiply(error, dt_buffer, out=work)
+        np.add(self.integral, work, out=self.integral)
+        if self.integral_limit is not None:
+            np.clip(self.integral, -self.integral_limit, self.integral_limit, out=self.integral)
+        # При dt <= 0 производная нулевая, как в скалярном регуляторе
+        np.subtract(error, self.previous_error, out=work)
+        if per_agent:
+            derivative.fill(0.0)
+            np.divide(work, dt_buffer, out=derivative, where=dt_buffer > 0)
+        elif dt > 0:
+            np.divide(work, dt_buffer, out=derivative)
+        else:
+            derivative.fill(0.0)
+        # p + i + d в том же порядке, что и в PIDController
+        np.multiply(self.kp, error, out=out)
+        np.multiply(self.ki, self.integral, out=work)
+        np.add(out, work, out=out)
+        np.multiply(self.kd, derivative, out=work)
+        np.add(out, work, out=out)
+        if self.output_limit is not None:
+            limited = np.clip(out, -self.output_limit, self.output_limit)
+            # Интеграл не растёт по осям, где сигнал в насыщении и ошибка направлена туда же
+            winding = (limited != out) & (np.sign(error) == np.sign(out))
+            self.integral[winding] = self._integral_before[winding]
+            out[...] = limited
+        np.copyto(self.previous_error, error)
+        return out
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Наземная станция: состояние всего роя на машине оператора.
+
+Слушает широковещательный порт роя (37020, датаграммы protobuf) и порт
+бинарного состояния (37021, см. swarm_protocol.py) и складывает пакеты всех
+дронов в столбцовое хранилище FleetStore — массивы numpy по строке на дрон.
+Пакеты вычитываются из сокетов пачками без блокировки и добавляются одним
+вызовом, поэтому сотни дронов с рассылкой 20 Гц обслуживаются одним ядром.
+
+По хранилищу считаются сводные показатели парка: минимальное расстояние
+между дронами относительно safety_radius, средняя скорость, потери пакетов
+каждого дрона (по номерам seq бинарного формата) и давность последнего
+пакета. Живая таблица выводится через rich.
+
+Запуск: python ground_station.py
+        python ground_station.py --d 3 --stale 2 --rows 40
+"""
+import argparse
+import selectors
+import socket
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from rich.console import Group
+from rich.live import Live
+from rich.table import Table
+from rich.text import Text
+
+from neighbour_index import min_pair_distance
+from params import params as default_params
+from swarm_kernel import STATE_DATA_LEN
+from swarm_protocol import decode_batch, open_broadcast_socket
+
+try:
+    from swarm_server.datagram_pb2 import Datagram
+except ImportError:  # без swarm_server принимается только бинарный формат
+    Datagram = None
+
+# Наибольшее число пакетов, вычитываемых из сокета за один проход
+DRAIN_LIMIT = 4096
+# Буфер приёма сокета: сотни дронов за время отрисовки таблицы переполняют
+# буфер по умолчанию (ядро ограничивает его net.core.rmem_max)
+RECEIVE_BUFFER = 4 << 20
+
+
+class FleetStore:
+    """
+    Столбцовое хранилище последних состояний дронов.
+
+    Каждому дрону соответствует строка в массивах одинаковой длины; при
+    заполнении массивы удваиваются. Потери считаются по номерам пакетов:
+    ожидалось last_seq - first_seq + 1, получено received.
+    """
+
+    def __init__(self, capacity: int = 256) -> None:
+        self.rows: Dict[int, int] = {}
+        self.ids = np.zeros(capacity, dtype=np.uint64)
+        self.positions = np.zeros((capacity, 3))
+        self.velocities = np.zeros((capacity, 3))
+        self.last_seen = np.full(capacity, np.nan)
+        self.sent_at = np.full(capacity, np.nan)
+        self.packets = np.zeros(capacity, dtype=np.int64)
+        self.first_seq = np.full(capacity, -1, dtype=np.int64)
+        self.last_seq = np.full(capacity, -1, dtype=np.int64)
+        self.seq_received = np.zeros(capacity, dtype=np.int64)
+        self.total_packets = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _grow(self) -> None:
+        for name in ("ids", "positions", "velocities", "last_seen", "sent_at",
+                     "packets", "first_seq", "last_seq", "seq_received"):
+            column = getattr(self, name)
+            fill = {"last_seen": np.nan, "sent_at": np.nan, "first_seq": -1, "last_seq": -1}.get(name, 0)
+            grown = np.full((len(column) * 2,) + column.shape[1:], fill, dtype=column.dtype)
+            grown[:len(column)] = column
+            setattr(self, name, grown)
+
+    def row_indices(self, ids: Iterable[int]) -> np.ndarray:
+        """
+        Строки дронов по их id; новые дроны получают новые строки.
+        """
+        rows = []
+        for peer_id in ids:
+            row = self.rows.get(peer_id)
+            if row is None:
+                row = self.rows[peer_id] = len(self.rows)
+                if row >= len(self.ids):
+                    self._grow()
+                self.ids[row] = peer_id
+            rows.append(row)
+        return np.array(rows, dtype=np.int64)
+
+    def ingest(self,
+               ids: Iterable[int],
+               positions: np.ndarray,
+               velocities: np.ndarray,
+               received_at: float,
+               seq: Optional[np.ndarray] = None,
+               sent_at: Optional[np.ndarray] = None) -> None:
+        """
+        Добавляет пачку пакетов в порядке приёма.
+
+        :param ids: id отправителей
+        :param positions: Позиции (k, 3)
+        :param velocities: Скорости (k, 3)
+        :param received_at: Время приёма пачки (time.monotonic())
+        :param seq: Номера пакетов (k,) или None, если формат их не передаёт
+        :param sent_at: Время отправки по часам дрона (k,) или None
+        """
+        rows = self.row_indices(ids)
+        if not len(rows):
+            return
+        # При повторе строки в пачке присваивание оставляет последний пакет
+        self.positions[rows] = positions
+        self.velocities[rows] = velocities
+        self.last_seen[rows] = received_at
+        if sent_at is not None:
+            self.sent_at[rows] = sent_at
+        np.add.at(self.packets, rows, 1)
+        self.total_packets += len(rows)
+        if seq is not None:
+            self._count_seq(rows, np.asarray(seq, dtype=np.int64))
+
+    def _count_seq(self, rows: np.ndarray, seq: np.ndarray) -> None:
+        low = np.full(len(self.ids), np.iinfo(np.int64).max)
+        high = np.full(len(self.ids), -1, dtype=np.int64)
+        np.minimum.at(low, rows, seq)
+        np.maximum.at(high, rows, seq)
+        touched = np.unique(rows)
+        # Номер меньше первого известного — дрон перезапущен, счёт начинается заново
+        restarted = touched[(self.first_seq[touched] < 0) | (low[touched] < self.first_seq[touched])]
+        self.first_seq[restarted] = low[restarted]
+        self.last_seq[restarted] = -1
+        self.seq_received[restarted] = 0
+        np.add.at(self.seq_received, rows, 1)
+        self.last_seq[touched] = np.maximum(self.last_seq[touched], high[touched])
+
+    def loss(self) -> np.ndarray:
+        """
+        Доля потерянных пакетов каждого дрона; nan, если формат без номеров.
+        """
+        count = len(self.rows)
+        expected = (self.last_seq[:count] - self.first_seq[:count] + 1).astype(np.float64)
+        expected[self.first_seq[:count] < 0] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.clip(1.0 - self.seq_received[:count] / expected, 0.0, 1.0)
+
+    def staleness(self, now: float) -> np.ndarray:
+        """
+        Давность последнего пакета каждого дрона (в секундах).
+        """
+        return now - self.last_seen[:len(self.rows)]
+
+
+def fleet_aggregates(store: FleetStore, now: float, safety_radius: float, d: int = 2,
+                     stale_after: float = 3.0) -> Dict[str, Any]:
+    """
+    Сводные показатели парка по дронам, от которых пакеты приходят не реже stale_after.
+
+    :return: drones, active, stale, min_distance (inf, если все пары дальше
+        2 * safety_radius), violation, mean_speed, max_speed, loss_mean,
+        loss_max, staleness_max
+    """
+    count = len(store)
+    staleness = store.staleness(now)
+    active = staleness <= stale_after
+    positions = store.positions[:count][active, 0:d]
+    speeds = np.linalg.norm(store.velocities[:count][active, 0:d], axis=1)
+    loss = store.loss()
+    known_loss = loss[~np.isnan(loss)]
+    min_distance = min_pair_distance(positions, 2 * safety_radius)
+    return {
+        "drones": count,
+        "active": int(active.sum()),
+        "stale": int(count - active.sum()),
+        "min_distance": min_distance,
+        "violation": min_distance < safety_radius,
+        "mean_speed": float(speeds.mean()) if len(speeds) else 0.0,
+        "max_speed": float(speeds.max()) if len(speeds) else 0.0,
+        "loss_mean": float(known_loss.mean()) if len(known_loss) else float("nan"),
+        "loss_max": float(known_loss.max()) if len(known_loss) else float("nan"),
+        "staleness_max": float(staleness.max()) if count else 0.0,
+    }
+
+
+def render_fleet(store: FleetStore, safety_radius: float, d: int = 2, stale_after: float = 3.0,
+                 rows: int = 30, rate: float = 0.0) -> Group:
+    """
+    Сводка парка и таблица дронов, худшие (давно молчащие, с потерями) сверху.
+    """
+    now = time.monotonic()
+    summary = fleet_aggregates(store, now, safety_radius, d, stale_after)
+    distance = summary["min_distance"]
+    style = "bold red" if summary["violation"] else "green"
+    header = Text.assemble(
+        f"Дронов {summary['drones']} (активных {summary['active']}, пропавших {summary['stale']}), "
+        f"{rate:.0f} пакетов/с\n",
+        ("Мин. расстояние " + (f"{distance:.2f} м" if np.isfinite(distance) else f"> {2 * safety_radius:.1f} м")
+         + f" при safety_radius {safety_radius:.2f} м", style),
+        f"\nСкорость средняя {summary['mean_speed']:.2f} м/с, наибольшая {summary['max_speed']:.2f} м/с; "
+        f"потери средние {summary['loss_mean']:.1%}, наибольшие {summary['loss_max']:.1%}; "
+        f"давность до {summary['staleness_max']:.1f} с")
+    count = len(store)
+    staleness = store.staleness(now)
+    loss = store.loss()
+    order = np.lexsort((-np.nan_to_num(loss), -staleness))[:rows]
+    table = Table(title=f"Дроны (худшие {min(rows, count)} из {count})")
+    for column in ("id", "x", "y", "z", "скорость", "пакетов", "потери", "давность, с"):
+        table.add_column(column, justify="right")
+    for row in order:
+        stale = staleness[row] > stale_after
+        table.add_row(str(store.ids[row]),
+                      *(f"{value:.2f}" for value in store.positions[row]),
+                      f"{np.linalg.norm(store.velocities[row, 0:d]):.2f}",
+                      str(store.packets[row]),
+                      "—" if np.isnan(loss[row]) else f"{loss[row]:.1%}",
+                      f"{staleness[row]:.1f}",
+                      style="red" if stale else ("yellow" if loss[row] > 0.1 else ""))
+    return Group(header, table)
+
+
+def parse_datagrams(payloads: List[bytes]) -> Tuple[List[int], np.ndarray, np.ndarray]:
+    """
+    Состояния из датаграмм protobuf: id и data = [ip, x, y, z, vx, vy, vz, ...].
+
+    Хеш датаграммы не проверяется — станция только наблюдает; команды пропускаются.
+    """
+    ids, states = [], []
+    message = Datagram()
+    for payload in payloads:
+        try:
+            message.ParseFromString(payload)
+        except Exception:
+            continue
+        if message.command == 0 and len(message.data) >= STATE_DATA_LEN:
+            ids.append(message.id)
+            states.append(message.data[1:STATE_DATA_LEN])
+    states = np.array(states, dtype=np.float64).reshape(-1, 6)
+    return ids, states[:, 0:3], states[:, 3:6]
+
+
+def drain(sock: socket.socket, limit: int = DRAIN_LIMIT) -> List[bytes]:
+    """
+    Вычитывает из неблокирующего сокета все накопившиеся пакеты (не больше limit).
+    """
+    payloads = []
+    while len(payloads) < limit:
+        try:
+            payloads.append(sock.recv(4096))
+        except (BlockingIOError, InterruptedError):
+            break
+    return payloads
+
+
+class GroundStation:
+    """
+    Приём пакетов роя в FleetStore и живая таблица.
+    """
+
+    def __init__(self,
+                 broadcast_port: int = 37020,
+                 state_port: Optional[int] = None,
+                 params: Optional[dict] = None,
+                 d: int = 2,
+                 stale_after: float = 3.0) -> None:
+        """
+        :param broadcast_port: Порт датаграмм protobuf
+        :param state_port: Порт бинарного состояния, по умолчанию broadcast_port + 1
+        :param params: Параметры роя (safety_radius), см. params.py
+        :param d: Размерность для расстояний и скоростей
+        :param stale_after: Через сколько секунд без пакетов дрон считается пропавшим
+        """
+        self.params = params if params is not None else default_params
+        self.d = d
+        self.stale_after = stale_after
+        self.store = FleetStore()
+        self.selector = selectors.DefaultSelector()
+        ports = [("binary", broadcast_port + 1 if state_port is None else state_port)]
+        if Datagram is not None:
+            ports.append(("protobuf", broadcast_port))
+        for kind, port in ports:
+            sock = open_broadcast_socket(port)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+            sock.setblocking(False)
+            self.selector.register(sock, selectors.EVENT_READ, kind)
+
+    def poll(self, timeout: float) -> int:
+        """
+        Ждёт пакеты не дольше timeout и добавляет всё накопившееся в хранилище.
+
+        :return: Число принятых пакетов
+        """
+        received = 0
+        for key, _ in self.selector.select(timeout):
+            payloads = drain(key.fileobj)
+            now = time.monotonic()
+            received += len(payloads)
+            if key.data == "binary":
+                records = decode_batch(payloads)
+                self.store.ingest(records["id"].tolist(), records["position"], records["velocity"], now,
+                                  seq=records["seq"], sent_at=records["timestamp"])
+            else:
+                ids, positions, velocities = parse_datagrams(payloads)
+                self.store.ingest(ids, positions, velocities, now)
+        return received
+
+    def aggregates(self) -> Dict[str, Any]:
+        return fleet_aggregates(self.store, time.monotonic(), self.params["safety_radius"], self.d,
+                                self.stale_after)
+
+    def render(self, rows: int = 30, rate: float = 0.0) -> Group:
+        return render_fleet(self.store, self.params["safety_radius"], self.d, self.stale_after, rows, rate)
+
+    def run(self, refresh: float = 0.25, rows: int = 30) -> None:
+        """
+        Принимает пакеты и обновляет таблицу раз в refresh секунд до Ctrl+C.
+        """
+        received, window_start = 0, time.monotonic()
+        rate = 0.0
+        with Live(self.render(rows), refresh_per_second=1 / refresh, auto_refresh=False) as live:
+            next_render = time.monotonic() + refresh
+            while True:
+                received += self.poll(max(0.0, next_render - time.monotonic()))
+                now = time.monotonic()
+                if now >= next_render:
+                    rate, received, window_start = received / (now - window_start), 0, now
+                    live.update(self.render(rows, rate), refresh=True)
+                    next_render = now + refresh
+
+    def close(self) -> None:
+        for key in list(self.selector.get_map().values()):
+            self.selector.unregister(key.fileobj)
+            key.fileobj.close()
+        self.selector.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Наземная станция: живая сводка роя sPion")
+    parser.add_argument("--port", type=int, default=37020, help="Широковещательный порт роя (protobuf)")
+    parser.add_argument("--state_port", type=int, default=None,
+                        help="Порт бинарного состояния, по умолчанию --port + 1")
+    parser.add_argument("--d", type=int, default=2, choices=(2, 3), help="Размерность для расстояний")
+    parser.add_argument("--stale", type=float, default=3.0, help="Через сколько секунд без пакетов дрон пропал")
+    parser.add_argument("--refresh", type=float, default=0.25, help="Период обновления таблицы, с")
+    parser.add_argument("--rows", type=int, default=30, help="Строк в таблице дронов")
+    args = parser.parse_args()
+
+    station = GroundStation(args.port, args.state_port, d=args.d, stale_after=args.stale)
+    try:
+        station.run(args.refresh, args.rows)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        station.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,55 @@
 #!/usr/bin/env python3
+# Первым: в режиме SPION_PROFILE_STARTUP=1 замеряет время импортов ниже
+from startup_profile import profiler
 import time
 from pion import Pion
 from pion.functions import get_local_ip
 from swarm_server import SwarmCommunicator
 from params import params
+from version_check import check_version
 
 
 def main():
+    profiler.mark("main")
+    # Не запускаемся со смешанной версией кода после прерванной передачи
+    with profiler.phase("check_version"):
+        check_version()
     # Получаем локальный IP-адрес
-    ip = get_local_ip()
-    drone = Pion(
-        ip="/dev/ttyS0",
-        mavlink_port=230400,
-        connection_method="serial",
-        name=f"Drone-{ip}",
-        dt=0.001,
-        logger=True,
-        max_speed=0.5,
-    )
+    with profiler.phase("get_local_ip"):
+        ip = get_local_ip()
+    with profiler.phase("Pion()"):
+        drone = Pion(
+            ip="/dev/ttyS0",
+            mavlink_port=230400,
+            connection_method="serial",
+            name=f"Drone-{ip}",
+            dt=0.001,
+            logger=True,
+            max_speed=0.5,
+        )
 
-    swarm_comm = SwarmCommunicator(
-        control_object=drone,
-        broadcast_port=37020,
-        broadcast_interval=0.5,
-        ip=ip,
-        time_sleep_update_velocity=0.1,
-        params=params,
-    )
-    swarm_comm.start()
+    with profiler.phase("SwarmCommunicator()"):
+        swarm_comm = SwarmCommunicator(
+            control_object=drone,
+            broadcast_port=37020,
+            broadcast_interval=0.5,
+            ip=ip,
+            time_sleep_update_velocity=0.1,
+            params=params,
+        )
+        profiler.mark_on_call(swarm_comm.broadcast_client, "send", "first_broadcast")
+    with profiler.phase("SwarmCommunicator.start()"):
+        swarm_comm.start()
     print(f"SwarmCommunicator запущен для {drone.name} с IP {ip}")
 
     try:
+        reported = False
         while True:
-            time.sleep(1)
+            time.sleep(0.1 if not reported else 1)
+            if not reported and "first_broadcast" in profiler.marks:
+                print(profiler.report() if profiler.enabled else profiler.first_broadcast_summary())
+                profiler.uninstall_import_hook()
+                reported = True
     except KeyboardInterrupt:
         swarm_comm.stop()
         print("Swarm communicator остановлен.")
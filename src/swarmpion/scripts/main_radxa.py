@@ -1,14 +1,27 @@
 #!/usr/bin/env python3
+# Первым: в режиме SPION_PROFILE_STARTUP=1 замеряет время импортов ниже
+from startup_profile import profiler
+import os
 import socket
+import threading
 import time
-from pion import Pion
-from pion.annotation import Array3, Array2
-from pion.cython_pid import PIDController
-from pion.functions import compute_swarm_velocity_pid 
 from swarm_server import SwarmCommunicator
-from typing import Any, Optional, Union
+from swarm_kernel import (STATE_DATA_LEN, ControlBuffers, SwarmTermCache, control_periods, interaction_radius,
+                          control_step, position_pid_matrix, swarm_term_max_age)
+from batch_pid import BatchPIDController
+from neighbour_index import UniformGridIndex
+from peer_table import PeerTable, RecentPeers
+from adaptive_broadcast import adaptive_broadcaster
+from telemetry import TelemetryRecorder
+from swarm_capture import KIND_BINARY, KIND_PROTOBUF, CaptureRecorder
+from rate_loop import FixedRateLoop, LatencyProbe
+from metrics import MetricsServer, SwarmMetrics
+from swarm_protocol import FLAG_POINT_REACHED, FLAG_TRACKING, BinaryStateEncoder, decode_state
+from swarm_transport import state_transport
+from typing import Any, Callable, Optional, Union
 import numpy as np
 from params import params
+from version_check import check_version
 
 class Swarmc(SwarmCommunicator):
     def __init__(self,
@@ -21,7 +34,18 @@ class Swarmc(SwarmCommunicator):
                  instance_number = None,
                  time_sleep_update_velocity: float = 0.1,
                  params: Optional[dict] = None,
-                 d: int = 2):
+                 d: int = 2,
+                 binary_protocol: bool = False,
+                 state_port: Optional[int] = None,
+                 metrics_port: Optional[int] = None,
+                 peer_ttl: Optional[float] = None,
+                 peer_capacity: int = 256,
+                 telemetry_path: Optional[str] = None,
+                 telemetry_capacity: int = 1 << 17,
+                 transport: Optional[Any] = None,
+                 capture_path: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 wall_clock: Callable[[], float] = time.time):
         SwarmCommunicator.__init__(self,
                  control_object = control_object,
                  broadcast_port = broadcast_port, 
@@ -32,24 +56,272 @@ class Swarmc(SwarmCommunicator):
                  instance_number = instance_number,
                  time_sleep_update_velocity = time_sleep_update_velocity,
                  params = params)
-        self.position_pid_matrix = np.array([[0.05] * d,
-                                             [0.0] * d,
-                                             [0.7] * d
-                                            ], dtype=np.float64)
-        self._pid_position_controller: Optional[PIDController] = None
+        self.position_pid_matrix = position_pid_matrix(self.params, d)
+        # d = 2 — управление в плоскости, высота держится; d = 3 — и по высоте
+        # с эллипсоидом безопасности (vertical_safety_radius в params)
+        self.d = d
+        self._pid_position_controller: Optional[BatchPIDController] = None
+        # Массивы такта выделяются один раз (см. ControlBuffers)
+        self.control_buffers = ControlBuffers(d)
+        # Соседи дальше радиуса взаимодействия не нужны (см. interaction_radius);
+        # наибольшая скорость дрона — ПИД-сигнал плюс роевая составляющая
+        self.interaction_radius = interaction_radius(self.params, max_speed + self.params["max_speed"], d)
+        self.neighbour_index = UniformGridIndex(cell_size=self.interaction_radius, d=d,
+                                                speed_limit=max_speed + self.params["max_speed"])
+        # Все моменты времени управления (приём соседей, их устаревание,
+        # пересчёт роевой составляющей) берутся с clock и wall_clock;
+        # воспроизведение (swarm_replay.py) подставляет свои часы
+        self.clock = clock
+        self.wall_clock = wall_clock
+        # Адаптивная рассылка включается в params (adaptive_broadcast), иначе
+        # состояние рассылается раз в broadcast_interval
+        self.broadcaster = adaptive_broadcaster(self.params)
+        self.current_broadcast_interval = broadcast_interval
+        # Пакеты соседей копятся между тактами и применяются пачкой; сосед,
+        # не слышанный дольше peer_ttl, удаляется из таблицы и индекса
+        if peer_ttl is None:
+            slowest = self.broadcaster.max_interval if self.broadcaster else broadcast_interval
+            peer_ttl = max(1.0, 4 * slowest)
+        self.peer_table = PeerTable(capacity=peer_capacity, ttl=peer_ttl, index=self.neighbour_index,
+                                    clock=clock, wall_clock=wall_clock,
+                                    max_extrapolation=self.params.get("max_extrapolation", 0.0),
+                                    estimate_clock_offset=self.params.get("estimate_clock_offset", False))
+        # env SwarmCommunicator меняется только в потоках приёма и под одной
+        # блокировкой: базовый process_incoming_state обходит env.values(),
+        # а при бинарном протоколе потоков приёма два. Там же забываются
+        # соседи, не слышанные дольше peer_ttl и давние сверх peer_capacity
+        self.env_lock = threading.Lock()
+        self.recent_peers = RecentPeers(peer_capacity, peer_ttl)
+        # Многочастотный режим: ПИД на частоте control_rate, роевая составляющая
+        # пересчитывается только при новых данных соседей, не чаще swarm_rate
+        self.control_period, swarm_period = control_periods(self.params, time_sleep_update_velocity)
+        self.swarm_term = SwarmTermCache(min_period=swarm_period or 0.0,
+                                         max_age=swarm_term_max_age(swarm_period, broadcast_interval,
+                                                                    self.peer_table.max_extrapolation))
+        # Связанный метод создаётся один раз: иначе такт выделял бы его заново
+        self._swarm_neighbours = self.swarm_neighbours
+        self.control_loop = FixedRateLoop(period=self.control_period)
+        self.latency_probe = LatencyProbe()
+        # Бинарный формат состояния включается явно, по умолчанию состояние
+        # рассылается датаграммами protobuf, как и раньше. Команды всегда
+        # приходят в protobuf на broadcast_port. Транспорт бинарного состояния
+        # подключаемый (swarm_transport): передаётся в transport или выбирается
+        # параметром state_transport; multicast работает только с бинарным форматом.
+        self.transport = transport
+        self.binary_protocol = (binary_protocol or transport is not None
+                                or (self.params.get("state_transport") or "broadcast") != "broadcast")
+        self.state_port = state_port if state_port is not None else broadcast_port + 1
+        self.state_encoder = BinaryStateEncoder(self.numeric_id)
+        self.state_channel: Optional[Any] = None
+        # Метрики собираются всегда, HTTP-эндпоинт поднимается только при metrics_port
+        self.metrics = SwarmMetrics()
+        self.metrics_port = metrics_port
+        self.metrics_server: Optional[MetricsServer] = None
+        # Телеметрия такта пишется в кольцевой файл (telemetry.py), если задан путь
+        self.telemetry = TelemetryRecorder(telemetry_path, telemetry_capacity) if telemetry_path else None
+        # Запись входа для воспроизведения без дрона и сети (swarm_capture.py)
+        self.capture = CaptureRecorder(capture_path, self.capture_config()) if capture_path else None
+        self.metrics.gauge("peers", lambda: len(self.peer_table))
+        self.metrics.gauge("neighbour_index_size", lambda: len(self.neighbour_index))
+        self.metrics.gauge("stalest_peer_age_seconds", self.stalest_peer_age)
+        self.metrics.gauge("control_overruns", lambda: self.control_loop.overruns)
+        self.metrics.gauge("control_missed_deadlines", lambda: self.control_loop.missed_deadlines)
+        self.metrics.gauge("swarm_term_updates", lambda: self.swarm_term.updates)
+        self.metrics.gauge("swarm_term_reuses", lambda: self.swarm_term.reuses)
+        self.metrics.gauge("broadcast_interval_seconds", lambda: self.current_broadcast_interval)
+        self.metrics.instrument(self.broadcast_client, "send", "broadcast_send")
+        profiler.mark_on_call(self.broadcast_client, "send", "first_broadcast")
+        self.metrics.gauge("boot_to_first_broadcast_seconds",
+                           lambda: profiler.marks.get("first_broadcast", float("nan")))
+        if hasattr(control_object, "send_speed"):
+            self.metrics.instrument(control_object, "send_speed", "mavlink_write")
 
+    def capture_config(self) -> dict:
+        """
+        Параметры, по которым воспроизведение собирает такой же Swarmc.
+        """
+        return {"numeric_id": self.numeric_id,
+                "d": self.d,
+                "max_speed": self.max_speed,
+                "safety_radius": self.safety_radius,
+                "broadcast_interval": self.broadcast_interval,
+                "time_sleep_update_velocity": self.time_sleep_update_velocity,
+                "peer_ttl": self.peer_table.ttl,
+                "peer_capacity": self.peer_table.capacity,
+                "params": self.params}
+
+    def stalest_peer_age(self) -> float:
+        """
+        Возраст самого давнего из известных соседей в секундах.
+        """
+        return self.peer_table.stalest_age()
+
+    def swarm_neighbours(self, position: np.ndarray):
+        """
+        Позиции и скорости соседей внутри радиуса взаимодействия на текущий момент.
+        """
+        return self.neighbour_index.query(position, self.interaction_radius, at=self.peer_table.clock(),
+                                          max_age=self.peer_table.max_extrapolation)
+
+    def refresh_peers(self) -> int:
+        """
+        Применяет пакеты соседей, пришедшие с прошлого такта, и удаляет устаревших.
+
+        :return: Количество изменений таблицы соседей (применённые пакеты и удалённые соседи)
+        """
+        ingested = self.peer_table.ingest_pending()
+        stale = self.peer_table.evict_stale()
+        if stale:
+            self.metrics.increment("peers_evicted", len(stale))
+        return ingested + len(stale)
+
+    def start(self) -> None:
+        if self.metrics_port is not None:
+            self.metrics_server = MetricsServer(self.metrics, port=self.metrics_port)
+            self.metrics_server.start()
+        if self.binary_protocol:
+            self.state_channel = self.transport or state_transport(self.params, self.state_port,
+                                                                   self.interaction_radius)
+            self.metrics.instrument(self.state_channel, "send", "broadcast_send")
+            profiler.mark_on_call(self.state_channel, "send", "first_broadcast")
+            self.binary_receive_thread = threading.Thread(target=self._binary_receive_loop, daemon=True)
+            self.binary_receive_thread.start()
+        SwarmCommunicator.start(self)
+
+    def stop(self) -> None:
+        SwarmCommunicator.stop(self)
+        if self.state_channel is not None:
+            self.state_channel.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.capture is not None:
+            self.capture.close()
+
+    def encode_state(self) -> bytes:
+        position = self.control_object.position
+        flags = ((FLAG_TRACKING if self.control_object.tracking else 0)
+                 | (FLAG_POINT_REACHED if self.control_object.point_reached else 0))
+        return self.state_encoder.encode(position[0:3], position[3:6], flags)
+
+    def broadcast_interval_now(self) -> float:
+        """
+        Интервал рассылки для текущей скорости и плотности соседей.
+        """
+        if self.broadcaster is None:
+            return self.broadcast_interval
+        position = self.control_object.position
+        speed = float(np.linalg.norm(position[3:3 + self.d]))
+        nearby, _ = self.neighbour_index.query(position[0:self.d],
+                                               self.params.get("unstable_radius", self.interaction_radius))
+        return self.broadcaster.interval(speed, len(nearby), len(self.peer_table))
+
+    def send_state(self) -> None:
+        try:
+            if self.binary_protocol:
+                self.state_channel.send(self.encode_state())
+            else:
+                self.broadcast_client.send({
+                    "id": self.unique_id,
+                    "ip": self.control_object.ip,
+                    "position": self.control_object.position.tolist(),
+                    "attitude": self.control_object.attitude.tolist(),
+                    "t_speed": self.control_object.t_speed.tolist(),
+                })
+            self.metrics.increment("packets_sent")
+        except Exception as error:
+            print("Ошибка отправки состояния:", error)
+
+    def _broadcast_loop(self) -> None:
+        if not self.binary_protocol and self.broadcaster is None:
+            return SwarmCommunicator._broadcast_loop(self)
+        last_sent = -float("inf")
+        while self.running:
+            interval = self.current_broadcast_interval = self.broadcast_interval_now()
+            if time.monotonic() - last_sent >= interval:
+                last_sent = time.monotonic()
+                self.send_state()
+            # Адаптивный интервал пересматривается не реже min_interval: дрон,
+            # начавший движение, не ждёт окончания длинного интервала покоя
+            poll = self.broadcaster.min_interval if self.broadcaster else interval
+            time.sleep(max(0.0, min(last_sent + interval - time.monotonic(), poll)))
+
+    def _binary_receive_loop(self) -> None:
+        while self.running:
+            try:
+                received = self.state_channel.receive()
+            except OSError:
+                break
+            if received is None:
+                continue
+            self.latency_probe.mark_received(time.perf_counter())
+            state = decode_state(received[0])
+            if state is not None:
+                self.process_incoming_state(state, payload=received[0])
+            else:
+                self.metrics.increment("packets_invalid")
+
+    def process_incoming_state(self, state: Any, payload: Optional[bytes] = None) -> None:
+        """
+        :param state: Датаграмма protobuf или BinaryState
+        :param payload: Исходный бинарный пакет (для записи входа)
+        """
+        started = time.perf_counter()
+        received_at = self.clock()
+        if self.capture is not None:
+            if payload is not None:
+                self.capture.datagram(received_at, payload, KIND_BINARY)
+            elif hasattr(state, "SerializeToString"):
+                self.capture.datagram(received_at, state.SerializeToString(), KIND_PROTOBUF)
+        if getattr(state, "command", 0):
+            # Команды env не трогают и могут выполняться долго (goto, takeoff)
+            SwarmCommunicator.process_incoming_state(self, state)
+            accepted = False
+        else:
+            peer_id = getattr(state, "id", None)
+            with self.env_lock:
+                SwarmCommunicator.process_incoming_state(self, state)
+                accepted = self.env.get(peer_id) is state
+                for forgotten in self.recent_peers.touch(peer_id if accepted else None, received_at):
+                    self.env.pop(forgotten, None)
+        if accepted and len(state.data) >= STATE_DATA_LEN:
+            self.peer_table.submit(state, received_at)
+        self.metrics.increment("packets_received")
+        self.metrics.observe("receive", time.perf_counter() - started)
+
+
+    def new_position_controller(self) -> BatchPIDController:
+        """
+        ПИД-регулятор позиции дрона; совпадает с PIDController(*position_pid_matrix).
+        """
+        return BatchPIDController.from_matrix(self.position_pid_matrix, 1)
 
     def update_swarm_control(self, target_point, dt) -> None:
-        signal = np.clip(
-            self._pid_position_controller.compute_control(
-                target_position=np.array(target_point, dtype=np.float64),
-                current_position=self.control_object.xyz[0:2],
-                dt=dt),
-            -self.max_speed,
-            self.max_speed)
-        swarm_part = compute_swarm_velocity_pid(self.control_object.position, self.env, target_point, params=self.params)
-        new_vel = signal + swarm_part
-        self.control_object.t_speed = np.array([new_vel[0], new_vel[1], 0, 0])
+        """
+        Такт управления: ПИД до target_point (первые d компонент) плюс роевая составляющая.
+
+        Такт без пересчёта роевой составляющей не выделяет память, в том числе с
+        телеметрией; пересчёт (массивы по числу соседей) и запись входа выделяют.
+        """
+        started = time.perf_counter()
+        now = self.clock()
+        if self.refresh_peers():
+            self.swarm_term.invalidate()
+        state_vector = self.control_object.position
+        buffers = self.control_buffers
+        control_step(buffers, self._pid_position_controller, self.swarm_term, state_vector, target_point, dt, now,
+                     self._swarm_neighbours, self.max_speed, self.params)
+        self.control_object.t_speed = buffers.t_speed()
+        if self.telemetry is not None:
+            self.telemetry.record(self.wall_clock(), buffers.xyz, buffers.target, buffers.pid_signal,
+                                  buffers.swarm_part, self.control_object.t_speed, len(self.peer_table))
+        finished = time.perf_counter()
+        if self.capture is not None:
+            self.capture.tick(now, now + self.peer_table.wall_offset, dt, state_vector, target_point,
+                              self.control_object.t_speed, finished - started)
+        self.latency_probe.mark_command(finished)
+        self.metrics.observe("update_swarm_control", finished - started)
 
     
     def smart_point_tacking(self):
@@ -57,17 +329,24 @@ class Swarmc(SwarmCommunicator):
         self.control_object.set_v()
         self.control_object.point_reached = False
         self.control_object.tracking = True
-        self._pid_position_controller = PIDController(*self.position_pid_matrix) 
-        last_time = time.time()
-        time.sleep(self.time_sleep_update_velocity)
-        while self.control_object.tracking:
-            current_time = time.time()
-            dt = current_time - last_time
-            last_time = current_time
-            self.update_swarm_control(self.control_object.target_point[0:2], dt)
-            time.sleep(self.time_sleep_update_velocity)
+        self._pid_position_controller = self.new_position_controller()
+        if self.capture is not None:
+            self.capture.session(self.clock())
+        self.control_loop.period = self.control_period
+        self.control_loop.reset()
+        self.swarm_term.reset()
+        self.control_loop.run(
+            lambda dt: self.update_swarm_control(self.control_object.target_point, dt),
+            lambda: self.control_object.tracking)
+        print(f"Smart point tracking остановлен: {self.control_loop.report()}")
         self.t_speed = np.zeros(4)
 
+    def control_loop_stats(self) -> dict:
+        """
+        Статистика джиттера такта управления (p50/p99 периода, перегрузки).
+        """
+        return self.control_loop.stats()
+
 
 def get_local_ip():
     """
@@ -86,28 +365,48 @@ def get_local_ip():
     return local_ip
 
 def main():
+    profiler.mark("main")
+    # Не запускаемся со смешанной версией кода после прерванной передачи
+    with profiler.phase("check_version"):
+        check_version()
     # Получаем локальный IP-адрес
-    ip = get_local_ip()
-    drone = Pion(ip='localhost',
-                mavlink_port=5656,
-                connection_method='udpout',
-                name=f"Drone-{ip}",
-                dt=0.001,
-                logger=True,
-                max_speed=0.5)
-
-    swarm_comm = Swarmc(control_object=drone,
-                                   broadcast_port=37020,
-                                   broadcast_interval=0.5,
-                                   ip=ip,
-                                   time_sleep_update_velocity = 0.1,
-                                   params=params)
-    swarm_comm.start()
+    with profiler.phase("get_local_ip"):
+        ip = get_local_ip()
+    with profiler.phase("import pion"):
+        from pion import Pion
+    with profiler.phase("Pion()"):
+        drone = Pion(ip='localhost',
+                    mavlink_port=5656,
+                    connection_method='udpout',
+                    name=f"Drone-{ip}",
+                    dt=0.001,
+                    logger=False,
+                    max_speed=0.5)
+
+    with profiler.phase("Swarmc()"):
+        swarm_comm = Swarmc(control_object=drone,
+                                       broadcast_port=37020,
+                                       broadcast_interval=0.5,
+                                       ip=ip,
+                                       time_sleep_update_velocity = 0.1,
+                                       params=params,
+                                       metrics_port=9100,
+                                       telemetry_path=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                   "telemetry.bin"),
+                                       # SPION_CAPTURE=путь — запись входа для swarm_replay.py
+                                       capture_path=os.environ.get("SPION_CAPTURE") or None)
+    with profiler.phase("Swarmc.start()"):
+        swarm_comm.start()
     print(f"SwarmCommunicator запущен для {drone.name} с IP {ip}")
     
     try:
+        reported = False
         while True:
-            time.sleep(1)
+            time.sleep(0.1 if not reported else 1)
+            if not reported and "first_broadcast" in profiler.marks:
+                print(profiler.report() if profiler.enabled else profiler.first_broadcast_summary())
+                profiler.uninstall_import_hook()
+                reported = True
     except KeyboardInterrupt:
         swarm_comm.stop()
         print("Swarm communicator остановлен.")
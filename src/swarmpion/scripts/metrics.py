@@ -0,0 +1,220 @@
+"""
+Лёгкая инструментация горячего пути и HTTP-эндпоинт метрик в формате Prometheus.
+
+Гистограммы имеют фиксированные границы корзин, поэтому запись замера —
+это поиск корзины и пара сложений без выделения памяти. Эндпоинт отдаёт
+текст Prometheus по GET /metrics и работает в отдельном потоке; замеры
+пишутся из потоков приёма и такта, поэтому запись и чтение идут под
+блокировками.
+"""
+import bisect
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Границы корзин в секундах: от 10 мкс до 1 с
+DEFAULT_BUCKETS = (
+    1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4,
+    1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 5e-2,
+    0.1, 0.25, 0.5, 1.0,
+)
+
+
+class Histogram:
+    """
+    Гистограмма длительностей с фиксированными корзинами.
+
+    Корзины, сумма и число замеров меняются вместе под блокировкой, поэтому
+    state() всегда согласован: сумма корзин равна count.
+    """
+    __slots__ = ("bounds", "counts", "total", "count", "_lock")
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        # Последняя корзина — всё, что больше последней границы (+Inf)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        # acquire/release, а не with: with создаёт связанные методы __enter__/__exit__,
+        # а замер идёт в такте, который не выделяет память
+        self._lock.acquire()
+        try:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.total += value
+            self.count += 1
+        finally:
+            self._lock.release()
+
+    def state(self) -> Tuple[List[int], float, int]:
+        """
+        Копия корзин, суммы и числа замеров на один момент.
+        """
+        with self._lock:
+            return list(self.counts), self.total, self.count
+
+    def quantile(self, q: float) -> float:
+        """
+        Оценка квантиля по верхней границе корзины.
+        """
+        counts, _, total_count = self.state()
+        if not total_count:
+            return 0.0
+        rank = q * total_count
+        cumulative = 0
+        for bound, count in zip(self.bounds, counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+
+class SwarmMetrics:
+    """
+    Набор метрик дрона: гистограммы этапов, счётчики и вычисляемые значения.
+
+    Словари метрик меняются под блокировкой; вычисляемые значения вызываются
+    вне её, так как сами могут брать блокировки (например, таблицы соседей).
+    """
+
+    def __init__(self, prefix: str = "spion") -> None:
+        self.prefix = prefix
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        histogram.observe(seconds)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def gauge(self, name: str, function: Callable[[], float]) -> None:
+        """
+        Регистрирует значение, которое вычисляется в момент запроса метрик.
+        """
+        with self._lock:
+            self.gauges[name] = function
+
+    def instrument(self, obj: Any, method: str, stage: str) -> None:
+        """
+        Оборачивает метод объекта замером длительности.
+
+        Используется для кода, который нельзя менять, например записи в MAVLink.
+        """
+        original = getattr(obj, method)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.observe(stage, time.perf_counter() - started)
+
+        setattr(obj, method, timed)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Текущие значения в виде словаря: удобно для печати и отладки.
+        """
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self.counters)
+            gauges = list(self.gauges.items())
+            histograms = list(self.histograms.items())
+        for name, function in gauges:
+            snapshot[name] = function()
+        for stage, histogram in histograms:
+            _, total, count = histogram.state()
+            snapshot[stage] = {
+                "count": count,
+                "mean": total / count if count else 0.0,
+                "p50": histogram.quantile(0.5),
+                "p99": histogram.quantile(0.99),
+            }
+        return snapshot
+
+    def render_prometheus(self) -> str:
+        """
+        Метрики в текстовом формате Prometheus.
+        """
+        with self._lock:
+            counters = sorted(self.counters.items())
+            gauges = sorted(self.gauges.items())
+            histograms = sorted(self.histograms.items())
+        lines = []
+        for name, value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, function in gauges:
+            metric = f"{self.prefix}_{name}"
+            try:
+                value = float(function())
+            except Exception:
+                continue
+            lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+        for stage, histogram in histograms:
+            counts, total, total_count = histogram.state()
+            metric = f"{self.prefix}_{stage}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{le="{bound}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {total_count}')
+            lines.append(f"{metric}_sum {total}")
+            lines.append(f"{metric}_count {total_count}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    HTTP-сервер, отдающий метрики по GET /metrics.
+    """
+
+    def __init__(self, metrics: SwarmMetrics, port: int = 9100, host: str = "") -> None:
+        # http.server импортируется только при включённом эндпоинте: это экономит время запуска
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        self.metrics = metrics
+        metrics_ref = metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics_ref.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"Метрики доступны на http://0.0.0.0:{self.port}/metrics")
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,192 @@
+"""
+Пространственный индекс соседей на равномерной сетке.
+
+Индекс обновляется по мере прихода широковещательных пакетов, а на такте
+управления выдаёт только соседей внутри радиуса взаимодействия. Если при
+обновлении известно время, к которому относится состояние соседа, запрос
+может экстраполировать позиции к моменту такта по скорости (dead reckoning).
+"""
+import itertools
+import threading
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+import numpy as np
+
+
+class UniformGridIndex:
+    """
+    Равномерная сетка с ячейками размера cell_size.
+
+    Каждый сосед хранится в одной ячейке, перемещение между ячейками
+    обрабатывается при обновлении, поэтому стоимость update — O(1), а стоимость
+    query зависит только от числа соседей в ближайших ячейках.
+    """
+
+    def __init__(self, cell_size: float, d: int = 2, speed_limit: float = float("inf")) -> None:
+        """
+        :param cell_size: Размер ячейки, обычно равен наибольшему радиусу взаимодействия
+        :type cell_size: float
+
+        :param d: Размерность пространства
+        :type d: int
+
+        :param speed_limit: Наибольшая физически возможная скорость соседа;
+            скорость выше неё (сбой в пакете) не расширяет поиск при экстраполяции
+        :type speed_limit: float
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size должен быть положительным")
+        self.cell_size = float(cell_size)
+        self.d = d
+        self._cells: Dict[Tuple[int, ...], Set[Hashable]] = {}
+        self._peer_cell: Dict[Hashable, Tuple[int, ...]] = {}
+        self._states: Dict[Hashable, np.ndarray] = {}
+        self._lock = threading.Lock()
+        # Наибольшая скорость соседа в индексе (не выше speed_limit): запас
+        # поиска по ячейкам при экстраполяции. Пересчитывается по соседям,
+        # когда самый быстрый замедлился или удалён
+        self.speed_limit = speed_limit
+        self.max_speed = 0.0
+        self._speeds: Dict[Hashable, float] = {}
+        self._max_speed_stale = False
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, peer_id: Any) -> bool:
+        return peer_id in self._states
+
+    def _cell_of(self, position: np.ndarray) -> Tuple[int, ...]:
+        return tuple(int(c) for c in np.floor(position / self.cell_size))
+
+    def update(self,
+               peer_id: Hashable,
+               position: Iterable[float],
+               velocity: Iterable[float],
+               sample_time: float = float("nan")) -> None:
+        """
+        Добавляет или обновляет состояние соседа.
+
+        :param peer_id: Идентификатор соседа
+        :param position: Позиция соседа (первые d компонент)
+        :param velocity: Скорость соседа (первые d компонент)
+        :param sample_time: Момент, к которому относится состояние, в часах
+            запросов query(at=...); nan — без экстраполяции
+        """
+        row = np.empty(2 * self.d + 1, dtype=np.float64)
+        row[0:self.d] = list(position)[0:self.d]
+        row[self.d:2 * self.d] = list(velocity)[0:self.d]
+        row[2 * self.d] = sample_time
+        cell = self._cell_of(row[0:self.d])
+        speed = min(float(np.sqrt(row[self.d:2 * self.d].dot(row[self.d:2 * self.d]))), self.speed_limit)
+        with self._lock:
+            previous = self._speeds.get(peer_id, 0.0)
+            self._speeds[peer_id] = speed
+            if speed >= self.max_speed:
+                self.max_speed = speed
+            elif previous >= self.max_speed:
+                self._max_speed_stale = True
+            old_cell = self._peer_cell.get(peer_id)
+            if old_cell != cell:
+                if old_cell is not None:
+                    self._discard(peer_id, old_cell)
+                self._cells.setdefault(cell, set()).add(peer_id)
+                self._peer_cell[peer_id] = cell
+            self._states[peer_id] = row
+
+    def remove(self, peer_id: Hashable) -> None:
+        """
+        Удаляет соседа из индекса, если он там есть.
+
+        :param peer_id: Идентификатор соседа
+        """
+        with self._lock:
+            cell = self._peer_cell.pop(peer_id, None)
+            if cell is not None:
+                self._discard(peer_id, cell)
+            self._states.pop(peer_id, None)
+            if self._speeds.pop(peer_id, 0.0) >= self.max_speed:
+                self._max_speed_stale = True
+
+    def _discard(self, peer_id: Hashable, cell: Tuple[int, ...]) -> None:
+        members = self._cells[cell]
+        members.discard(peer_id)
+        if not members:
+            del self._cells[cell]
+
+    def query(self,
+              point: Iterable[float],
+              radius: float,
+              exclude: Optional[Hashable] = None,
+              at: Optional[float] = None,
+              max_age: float = 0.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Возвращает соседей, находящихся не дальше radius от point.
+
+        :param point: Точка запроса (первые d компонент)
+        :param radius: Радиус запроса
+        :param exclude: Идентификатор, который не попадает в ответ (сам дрон)
+        :param at: Момент такта; если задан, позиции экстраполируются к нему
+            по скорости от sample_time соседа
+        :param max_age: Наибольший интервал экстраполяции в секундах
+
+        :return: Массивы позиций и скоростей размерности (N, d)
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        center = np.asarray(list(point)[0:self.d], dtype=np.float64)
+        extrapolate = at is not None and max_age > 0
+        with self._lock:
+            if self._max_speed_stale:
+                self.max_speed = max(self._speeds.values(), default=0.0)
+                self._max_speed_stale = False
+            # Экстраполированный сосед мог уйти из своей ячейки не дальше max_speed * max_age
+            reach = radius + (self.max_speed * max_age if extrapolate else 0.0)
+            low = np.floor((center - reach) / self.cell_size).astype(int)
+            high = np.floor((center + reach) / self.cell_size).astype(int)
+            ranges = [range(lo, hi + 1) for lo, hi in zip(low, high)]
+            rows = [self._states[peer_id]
+                    for cell in itertools.product(*ranges)
+                    for peer_id in self._cells.get(cell, ())
+                    if peer_id != exclude]
+        if not rows:
+            empty = np.empty((0, self.d), dtype=np.float64)
+            return empty, empty.copy()
+        matrix = np.array(rows)
+        if extrapolate:
+            age = np.nan_to_num(np.clip(at - matrix[:, 2 * self.d], 0.0, max_age))
+            matrix[:, 0:self.d] += matrix[:, self.d:2 * self.d] * age[:, None]
+        offsets = matrix[:, 0:self.d] - center
+        inside = np.einsum("ij,ij->i", offsets, offsets) <= radius * radius
+        matrix = matrix[inside]
+        return (np.ascontiguousarray(matrix[:, 0:self.d]),
+                np.ascontiguousarray(matrix[:, self.d:2 * self.d]))
+
+
+def min_pair_distance(positions: np.ndarray, radius: float) -> float:
+    """
+    Минимальное расстояние между парами точек, если оно меньше radius.
+
+    Точки сортируются по первой координате, и k-й проход сравнивает каждую
+    точку с k-й следующей за ней одной векторной операцией. Проходы
+    заканчиваются, когда все разности по первой координате не меньше
+    найденного минимума, поэтому при ограниченной плотности число проходов
+    не зависит от числа точек.
+
+    :param positions: Позиции (N, d)
+    :param radius: Радиус поиска
+    :return: Минимальное расстояние либо inf, если все пары дальше radius
+    :rtype: float
+    """
+    if len(positions) < 2:
+        return float("inf")
+    ordered = positions[np.argsort(positions[:, 0], kind="stable")]
+    best_squared = radius * radius
+    for k in range(1, len(ordered)):
+        gap = ordered[k:, 0] - ordered[:-k, 0]
+        close = gap * gap < best_squared
+        if not close.any():
+            break
+        diff = ordered[k:][close] - ordered[:-k][close]
+        best_squared = min(best_squared, float(np.einsum("ij,ij->i", diff, diff).min()))
+    best = np.sqrt(best_squared)
+    return float(best) if best < radius else float("inf")
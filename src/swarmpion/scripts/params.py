@@ -8,6 +8,9 @@ params = {
     "attraction_weight": 1.0,
     "cohesion_weight": 1.0,
     "alignment_weight": 1.0,
+    # Вес текущей скорости в роевой составляющей; решатель swarm_server из
+    # lokky 0.0.10 требует ключ, 0 — как в прежних версиях
+    "current_velocity_weight": 0.0,
     "repulsion_weight": 4.0,
     "unstable_weight": 1.0,
     "noise_weight": 1.0,
@@ -15,5 +18,39 @@ params = {
     "max_acceleration": 1,
     "max_speed": 0.4,
     "unstable_radius": 1.5,
+    # Режим d = 3: полуось эллипсоида безопасности по высоте (м), под дроном
+    # поток от винтов, поэтому соседей по вертикали держим дальше
+    "vertical_safety_radius": 1.5,
+    # Многочастотное управление: такт ПИД (Гц) и наибольшая частота пересчёта
+    # роевой составляющей (Гц), например 20 и 4. None — такт раз в
+    # time_sleep_update_velocity, роевая составляющая на каждом такте
+    "control_rate": None,
+    "swarm_rate": None,
+    # Экстраполяция соседей к моменту такта по их скорости: наибольший
+    # интервал (в секундах, например 1.0; 0 — позиция из последнего пакета)
+    # и оценка смещения часов дронов без RTC
+    "max_extrapolation": 0.0,
+    "estimate_clock_offset": False,
+    # Адаптивная рассылка состояния: интервал от broadcast_max_interval (покой)
+    # до broadcast_min_interval (скорость broadcast_speed_ref или
+    # broadcast_density_ref соседей внутри unstable_radius); airtime_budget —
+    # пакетов в секунду на весь рой. Выключена — рассылка раз в broadcast_interval
+    "adaptive_broadcast": False,
+    "broadcast_min_interval": 0.1,
+    "broadcast_max_interval": 1.0,
+    "broadcast_speed_ref": 0.5,
+    "broadcast_density_ref": 3,
+    "airtime_budget": 200.0,
+    # Транспорт бинарного состояния (swarm_transport.py): "broadcast" — на всю
+    # подсеть, "multicast" — группы пространственных ячеек multicast_cell_size
+    # (по умолчанию радиус взаимодействия); между подсетями — StateRelay
+    "state_transport": "broadcast",
+    # Прогноз конфликтов: соседи, которые за conflict_horizon секунд подойдут
+    # ближе safety_radius, расходятся заранее с весом conflict_weight
+    # (например, горизонт 2 с); 0 — реакция только на текущие расстояния
+    "conflict_horizon": 0.0,
+    "conflict_weight": 3.0,
+    # Необязательно: "position_pid_matrix" — строки kp, ki, kd ПИД позиции
+    # Swarmc (по умолчанию default_position_pid_matrix). Подбор весов, радиусов
+    # и ПИД на симуляторе — tune_params.py
 }
-
@@ -0,0 +1,343 @@
+"""
+Таблица соседей на предвыделенных массивах.
+
+Состояния соседей хранятся в слотах массивов фиксированной ёмкости, поэтому
+память ограничена, а поиск соседа по id — O(1) через словарь записей.
+Пакеты из потока приёма складываются в очередь и применяются пачкой в
+начале такта управления, устаревшие соседи вытесняются по TTL.
+
+Для каждого соседа хранится момент, к которому относится его состояние
+(sample_time, в часах таблицы). Он вычисляется по метке времени отправителя,
+поэтому позицию соседа можно экстраполировать по скорости к моменту такта.
+Часы дронов без RTC не синхронизированы, поэтому смещение часов каждого
+соседа может оцениваться по минимальной наблюдаемой задержке.
+
+RecentPeers ограничивает теми же ёмкостью и TTL словарь env SwarmCommunicator,
+который живёт в потоке приёма, а не в такте.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from swarm_kernel import STATE_DATA_LEN
+from swarm_protocol import is_sender_restart
+
+
+class PeerRecord:
+    """
+    Запись о соседе: номер слота и служебные поля последнего пакета.
+    """
+    __slots__ = ("peer_id", "slot", "last_seen", "timestamp", "seq", "clock_offset")
+
+    def __init__(self, peer_id: Hashable, slot: int) -> None:
+        self.peer_id = peer_id
+        self.slot = slot
+        self.last_seen = 0.0
+        self.timestamp: Optional[float] = None
+        self.seq: Optional[int] = None
+        # Оценка (часы приёмника - часы отправителя) вместе с минимальной задержкой сети
+        self.clock_offset: Optional[float] = None
+
+
+class PeerTable:
+    """
+    Ограниченная таблица соседей с вытеснением по TTL.
+
+    Если таблица заполнена, новый сосед занимает слот самого давно
+    слышанного соседа; вытесненный возвращается следующим evict_stale.
+    """
+
+    def __init__(self,
+                 capacity: int = 256,
+                 ttl: float = 2.0,
+                 index: Optional[Any] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 pending_limit: Optional[int] = None,
+                 max_extrapolation: float = 0.0,
+                 estimate_clock_offset: bool = False,
+                 wall_clock: Callable[[], float] = time.time,
+                 clock_drift: float = 1e-4) -> None:
+        """
+        :param capacity: Максимальное число соседей
+        :param ttl: Время жизни записи без новых пакетов (в секундах)
+        :param index: Пространственный индекс (UniformGridIndex), который
+            обновляется вместе с таблицей
+        :param clock: Монотонные часы
+        :param pending_limit: Ёмкость очереди непримененных пакетов,
+            по умолчанию 4 * capacity
+        :param max_extrapolation: Наибольший интервал экстраполяции соседа
+            (в секундах), 0 — без экстраполяции
+        :param estimate_clock_offset: Оценивать смещение часов каждого соседа,
+            иначе метки времени считаются по синхронизированным часам
+        :param wall_clock: Часы, в которых отправители ставят метку времени
+        :param clock_drift: Наибольший дрейф часов между дронами (с/с): с этой
+            скоростью оценка смещения может подниматься, вниз она переходит сразу
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.index = index
+        self.clock = clock
+        self.positions = np.zeros((capacity, 3))
+        self.velocities = np.zeros((capacity, 3))
+        self.last_seen = np.full(capacity, -np.inf)
+        self.sample_time = np.full(capacity, np.nan)
+        self.active = np.zeros(capacity, dtype=bool)
+        # Нижняя граница last_seen активных записей: пока она не старше ttl,
+        # evict_stale не просматривает массивы
+        self._oldest_seen = float("inf")
+        self._records: Dict[Hashable, PeerRecord] = {}
+        self._slot_owner: List[Optional[Hashable]] = [None] * capacity
+        self._free = list(range(capacity - 1, -1, -1))
+        self._pending: deque = deque(maxlen=pending_limit or 4 * capacity)
+        # Вытесненные при заполненной таблице, ещё не возвращённые evict_stale
+        self._displaced: List[Hashable] = []
+        self._lock = threading.Lock()
+        self.evicted = 0
+        self.restarts = 0
+        self.max_extrapolation = max_extrapolation
+        self.estimate_clock_offset = estimate_clock_offset
+        self.wall_clock = wall_clock
+        self.clock_drift = clock_drift
+        self.sync_wall_clock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, peer_id: Any) -> bool:
+        return peer_id in self._records
+
+    def get(self, peer_id: Hashable) -> Optional[PeerRecord]:
+        return self._records.get(peer_id)
+
+    def ids(self) -> List[Hashable]:
+        return list(self._records)
+
+    def submit(self, state: Any, received_at: Optional[float] = None) -> None:
+        """
+        Ставит пакет соседа в очередь, вызывается из потока приёма.
+
+        При переполнении очереди теряются самые старые пакеты.
+        """
+        self._pending.append((state, self.clock() if received_at is None else received_at))
+
+    def sync_wall_clock(self) -> None:
+        """
+        Пересчитывает разность wall_clock и clock (часы могут подстраиваться NTP).
+
+        Разность хранится в wall_offset и обновляется при применении пакетов.
+        """
+        self.wall_offset = self.wall_clock() - self.clock()
+
+    def ingest_pending(self) -> int:
+        """
+        Применяет все пакеты, пришедшие с прошлого такта.
+
+        :return: Количество применённых пакетов
+        """
+        pending = self._pending
+        if not pending:
+            return 0
+        self.sync_wall_clock()
+        count = 0
+        for _ in range(len(pending)):
+            state, received_at = pending.popleft()
+            if self.ingest(state, received_at):
+                count += 1
+        return count
+
+    def ingest(self, state: Any, received_at: Optional[float] = None) -> bool:
+        """
+        Применяет один пакет соседа: state.id и state.data = [id, x, y, z, vx, vy, vz, ...].
+
+        :return: False, если пакет отброшен (неполный или устаревший)
+        """
+        if len(state.data) < STATE_DATA_LEN:
+            return False
+        return self.upsert(state.id,
+                           state.data[1:4],
+                           state.data[4:7],
+                           self.clock() if received_at is None else received_at,
+                           timestamp=getattr(state, "timestamp", None),
+                           seq=getattr(state, "seq", None))
+
+    def upsert(self,
+               peer_id: Hashable,
+               position: Iterable[float],
+               velocity: Iterable[float],
+               now: float,
+               timestamp: Optional[float] = None,
+               seq: Optional[int] = None) -> bool:
+        """
+        Добавляет или обновляет соседа.
+
+        Пакет с меньшим seq отбрасывается как устаревший, если только это не
+        перезапуск отправителя (см. is_sender_restart): тогда запись начинается заново.
+
+        :return: False, если пакет старше уже принятого (по seq)
+        """
+        with self._lock:
+            record = self._records.get(peer_id)
+            if record is None:
+                record = PeerRecord(peer_id, self._allocate_slot())
+                self._records[peer_id] = record
+                self._slot_owner[record.slot] = peer_id
+            elif seq is not None and record.seq is not None and \
+                    ((seq - record.seq) & 0xFFFFFFFF) >= 0x80000000:
+                if not is_sender_restart(seq, timestamp, record.seq, record.timestamp):
+                    return False
+                # После перезагрузки часы отправителя могли сдвинуться
+                record.clock_offset = None
+                self.restarts += 1
+            slot = record.slot
+            self.positions[slot] = position
+            self.velocities[slot] = velocity
+            self.last_seen[slot] = now
+            self._oldest_seen = min(self._oldest_seen, float(now))
+            self.sample_time[slot] = self._sample_time(record, now, timestamp)
+            self.active[slot] = True
+            record.last_seen = now
+            record.timestamp = timestamp
+            record.seq = seq
+        if self.index is not None:
+            self.index.update(peer_id, self.positions[slot], self.velocities[slot], self.sample_time[slot])
+        return True
+
+    def _sample_time(self, record: PeerRecord, received_at: float, timestamp: Optional[float]) -> float:
+        """
+        Момент, к которому относится состояние соседа, в часах таблицы.
+
+        Без метки времени им считается момент приёма. Задержка в пути
+        ограничивается [0, max_extrapolation], чтобы сбой часов отправителя
+        не уводил экстраполяцию.
+        """
+        if timestamp is None:
+            return received_at
+        delay = received_at + self.wall_offset - timestamp
+        if self.estimate_clock_offset:
+            offset = record.clock_offset
+            # Минимум задержки, которому разрешено расти со скоростью дрейфа часов
+            if offset is None:
+                offset = delay
+            else:
+                offset = min(delay, offset + self.clock_drift * (received_at - record.last_seen))
+            record.clock_offset = offset
+            delay -= offset
+        return received_at - min(max(delay, 0.0), self.max_extrapolation)
+
+    def _allocate_slot(self) -> int:
+        if self._free:
+            return self._free.pop()
+        # Таблица заполнена: вытесняем самого давно слышанного соседа
+        slot = int(np.argmin(np.where(self.active, self.last_seen, np.inf)))
+        peer_id = self._slot_owner[slot]
+        self._release(peer_id)
+        self._displaced.append(peer_id)
+        self.evicted += 1
+        return self._free.pop()
+
+    def _release(self, peer_id: Hashable) -> None:
+        record = self._records.pop(peer_id)
+        self.active[record.slot] = False
+        self.last_seen[record.slot] = -np.inf
+        self.sample_time[record.slot] = np.nan
+        self._slot_owner[record.slot] = None
+        self._free.append(record.slot)
+        if self.index is not None:
+            self.index.remove(peer_id)
+
+    def remove(self, peer_id: Hashable) -> None:
+        with self._lock:
+            if peer_id in self._records:
+                self._release(peer_id)
+
+    def evict_stale(self, now: Optional[float] = None) -> List[Hashable]:
+        """
+        Удаляет соседей, от которых не было пакетов дольше ttl.
+
+        :return: Идентификаторы удалённых соседей, в том числе вытесненных
+            новыми соседями при заполненной таблице с прошлого вызова
+        """
+        now = self.clock() if now is None else now
+        displaced = []
+        if self._displaced:
+            with self._lock:
+                displaced, self._displaced = self._displaced, []
+        if now - self._oldest_seen <= self.ttl:
+            return displaced
+        with self._lock:
+            stale_slots = np.flatnonzero(self.active & (now - self.last_seen > self.ttl))
+            stale = [self._slot_owner[slot] for slot in stale_slots]
+            for peer_id in stale:
+                self._release(peer_id)
+            self._oldest_seen = float(self.last_seen[self.active].min()) if self._records else float("inf")
+        self.evicted += len(stale)
+        return displaced + stale
+
+    def stalest_age(self, now: Optional[float] = None) -> float:
+        """
+        Возраст самой старой записи в секундах.
+        """
+        if not self._records:
+            return 0.0
+        now = self.clock() if now is None else now
+        return float(now - self.last_seen[self.active].min())
+
+    def active_arrays(self, d: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Позиции и скорости всех активных соседей.
+
+        :return: Массивы (N, d)
+        """
+        slots = np.flatnonzero(self.active)
+        return self.positions[slots, 0:d], self.velocities[slots, 0:d]
+
+    def extrapolated_arrays(self, now: Optional[float] = None, d: int = 3) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Позиции активных соседей, экстраполированные к моменту now по скорости.
+
+        :return: Массивы (N, d)
+        """
+        now = self.clock() if now is None else now
+        slots = np.flatnonzero(self.active)
+        age = np.clip(now - self.sample_time[slots], 0.0, self.max_extrapolation)
+        velocities = self.velocities[slots, 0:d]
+        return self.positions[slots, 0:d] + velocities * age[:, None], velocities
+
+
+class RecentPeers:
+    """
+    Соседи в порядке последнего пакета: что забыть в env SwarmCommunicator.
+
+    Вызывается из потока приёма на каждый пакет, поэтому env не растёт и
+    вне слежения за точкой, когда такт не идёт. Сам класс не блокирует:
+    вызывающий держит ту же блокировку, под которой меняет env.
+    """
+
+    def __init__(self, capacity: int, ttl: float) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._seen: "OrderedDict[Hashable, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def touch(self, peer_id: Optional[Hashable], now: float) -> List[Hashable]:
+        """
+        Отмечает пакет соседа (None — пакет без соседа, например команда).
+
+        :return: Соседи, не слышанные дольше ttl, и самые давние сверх capacity
+        """
+        if peer_id is not None:
+            self._seen[peer_id] = now
+            self._seen.move_to_end(peer_id)
+        forgotten = []
+        while self._seen:
+            oldest, seen = next(iter(self._seen.items()))
+            if now - seen <= self.ttl and len(self._seen) <= self.capacity:
+                break
+            del self._seen[oldest]
+            forgotten.append(oldest)
+        return forgotten
@@ -0,0 +1,203 @@
+"""
+Цикл с фиксированной частотой на основе дедлайнов.
+
+В отличие от связки «вычисление + time.sleep(period)» период не растёт на
+время вычислений: каждый такт ждёт до своего дедлайна по монотонным часам.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+class FixedRateLoop:
+    """
+    Планировщик такта управления.
+
+    Дедлайны считаются от момента запуска как start + k * period, поэтому
+    ошибка не накапливается. Если такт не уложился в период, пропущенные
+    дедлайны засчитываются и цикл переходит к ближайшему будущему, без
+    серии догоняющих тактов.
+    """
+
+    def __init__(self,
+                 period: float,
+                 history: int = 1000,
+                 clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        :param period: Период такта в секундах
+        :type period: float
+
+        :param history: Количество последних тактов для статистики
+        :type history: int
+
+        :param clock: Монотонные часы
+        :param sleep: Функция ожидания
+        """
+        if period <= 0:
+            raise ValueError("period должен быть положительным")
+        self.period = period
+        self.clock = clock
+        self.sleep = sleep
+        self.running = False
+        self._periods: deque = deque(maxlen=history)
+        self._compute_times: deque = deque(maxlen=history)
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Сброс счётчиков и истории тактов.
+        """
+        self.ticks = 0
+        self.overruns = 0
+        self.missed_deadlines = 0
+        self._periods.clear()
+        self._compute_times.clear()
+
+    def run(self, step: Callable[[float], None], condition: Callable[[], bool]) -> None:
+        """
+        Вызывает step(dt) с фиксированной частотой, пока condition() истинно.
+
+        Первый такт выполняется через один период после запуска.
+
+        :param step: Функция такта, получает фактический dt с прошлого такта
+        :param condition: Условие продолжения цикла
+        """
+        self.running = True
+        last_time = self.clock()
+        deadline = last_time + self.period
+        self.sleep(self.period)
+        while self.running and condition():
+            now = self.clock()
+            dt = now - last_time
+            last_time = now
+            step(dt)
+            deadline, remaining = self._account(dt, now, deadline)
+            self.sleep(remaining)
+        self.running = False
+
+    async def run_async(self, step: Callable[[float], None], condition: Callable[[], bool]) -> None:
+        """
+        Вариант run для event loop: ожидание через asyncio.sleep.
+
+        :param step: Функция такта, получает фактический dt с прошлого такта
+        :param condition: Условие продолжения цикла
+        """
+        self.running = True
+        last_time = self.clock()
+        deadline = last_time + self.period
+        await asyncio.sleep(self.period)
+        while self.running and condition():
+            now = self.clock()
+            dt = now - last_time
+            last_time = now
+            step(dt)
+            deadline, remaining = self._account(dt, now, deadline)
+            await asyncio.sleep(remaining)
+        self.running = False
+
+    def _account(self, dt: float, started: float, deadline: float) -> Tuple[float, float]:
+        """
+        Учитывает выполненный такт и вычисляет следующий дедлайн.
+
+        :return: Следующий дедлайн и время ожидания до него
+        """
+        finished = self.clock()
+        self.ticks += 1
+        self._periods.append(dt)
+        self._compute_times.append(finished - started)
+        deadline += self.period
+        remaining = deadline - finished
+        if remaining < 0:
+            # Такт не уложился: переходим к ближайшему будущему дедлайну
+            missed = math.floor(-remaining / self.period) + 1
+            self.overruns += 1
+            self.missed_deadlines += missed
+            deadline += missed * self.period
+            remaining = deadline - finished
+        return deadline, remaining
+
+    def stop(self) -> None:
+        """
+        Останавливает цикл после текущего такта.
+        """
+        self.running = False
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Статистика джиттера за последние такты.
+
+        :return: Словарь с периодами p50/p99/max, временем вычислений и счётчиками
+        :rtype: Dict[str, float]
+        """
+        stats = {
+            "period": self.period,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "missed_deadlines": self.missed_deadlines,
+        }
+        if self._periods:
+            periods = np.fromiter(self._periods, dtype=np.float64)
+            compute = np.fromiter(self._compute_times, dtype=np.float64)
+            stats.update({
+                "period_p50": float(np.percentile(periods, 50)),
+                "period_p99": float(np.percentile(periods, 99)),
+                "period_max": float(periods.max()),
+                "compute_mean": float(compute.mean()),
+                "compute_max": float(compute.max()),
+            })
+        return stats
+
+    def report(self) -> str:
+        """
+        Краткий текстовый отчёт о работе цикла.
+        """
+        stats = self.stats()
+        text = (f"ticks={stats['ticks']} overruns={stats['overruns']} "
+                f"missed={stats['missed_deadlines']}")
+        if "period_p50" in stats:
+            text += (f" p50={stats['period_p50'] * 1e3:.1f}ms"
+                     f" p99={stats['period_p99'] * 1e3:.1f}ms"
+                     f" max={stats['period_max'] * 1e3:.1f}ms")
+        return text
+
+
+class LatencyProbe:
+    """
+    Задержка от приёма пакета соседа до записи команды скорости.
+
+    Для каждой команды учитывается самый ранний пакет, пришедший после
+    предыдущей команды, то есть худший случай для этого такта.
+    """
+
+    def __init__(self, history: int = 1000) -> None:
+        self._pending: Optional[float] = None
+        self._samples: deque = deque(maxlen=history)
+
+    def mark_received(self, timestamp: float) -> None:
+        if self._pending is None:
+            self._pending = timestamp
+
+    def mark_command(self, timestamp: float) -> None:
+        if self._pending is not None:
+            self._samples.append(timestamp - self._pending)
+            self._pending = None
+
+    def stats(self) -> Dict[str, float]:
+        """
+        :return: Количество замеров и задержки p50/p99/max в секундах
+        :rtype: Dict[str, float]
+        """
+        stats = {"count": len(self._samples)}
+        if self._samples:
+            samples = np.fromiter(self._samples, dtype=np.float64)
+            stats.update({
+                "p50": float(np.percentile(samples, 50)),
+                "p99": float(np.percentile(samples, 99)),
+                "max": float(samples.max()),
+            })
+        return stats
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Передача кода sPion с машины оператора на платы вместо git pull.
+
+Передаются только изменившиеся файлы (сравнение по sha256 с манифестом на
+плате). Манифест в корне кода закрепляет версию: при старте сервиса
+version_check.py сверяет с ним файлы и не запускает смешанную версию.
+
+Пример:
+    python code_sync.py --ssh_host 192.168.1.10 --ssh_user pi --ssh_password raspberry --root ../../../..
+    python fleet.py --inventory drones.txt --sync --code ../../../..
+    python fleet.py --inventory drones.txt --versions
+"""
+import argparse
+import os
+import posixpath
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from installer import RemoteServiceInstaller
+from sftp_sync import collect_files, file_sha256, manifest_digest, push_files, read_remote_json
+
+# То же имя, что и в version_check.py
+MANIFEST_NAME = ".spion_manifest.json"
+REMOTE_ROOT = "code/sPion"
+EXCLUDE_DIRS = {".git", ".venv", "venv", "__pycache__", "wheelhouse", "fleet_logs", "flight_logs", ".pytest_cache"}
+
+
+def collect_code(root: str) -> Dict[str, str]:
+    """
+    Файлы кода для передачи: рабочее дерево git без игнорируемых, а без git — все,
+    кроме служебных каталогов.
+    """
+    try:
+        listed = subprocess.run(["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+                                cwd=root, check=True, capture_output=True).stdout.decode().split("\0")
+        return {relative: os.path.join(root, relative) for relative in listed
+                if relative and os.path.isfile(os.path.join(root, relative))}
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    files = collect_files(root, exclude=(MANIFEST_NAME,))
+    return {relative: path for relative, path in files.items()
+            if not EXCLUDE_DIRS.intersection(relative.split("/")[:-1])}
+
+
+def code_revision(root: str) -> str:
+    """
+    Ревизия git для отчёта, например 1a2b3c4-dirty.
+    """
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=root, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def code_version(root: str) -> str:
+    """
+    Версия кода, которая будет закреплена на плате.
+    """
+    return manifest_digest({relative: file_sha256(path) for relative, path in collect_code(root).items()})
+
+
+def push_code(installer: Any, local_root: str, remote_root: str = REMOTE_ROOT) -> Dict[str, Any]:
+    """
+    Передаёт изменившиеся файлы кода и закрепляет версию.
+
+    :param installer: Подключённый установщик (RemoteServiceInstaller или RadxaInstaller)
+    :param local_root: Корень кода на машине оператора
+    :param remote_root: Корень кода на плате относительно домашнего каталога
+    :return: Статистика передачи и версия (digest)
+    """
+    sftp = installer.ssh.open_sftp()
+    try:
+        stats = push_files(sftp, collect_code(local_root), remote_root,
+                           manifest_name=MANIFEST_NAME,
+                           extra={"revision": code_revision(local_root)})
+    finally:
+        sftp.close()
+    if stats["uploaded"]:
+        # Байт-код готовится сразу, чтобы первый запуск сервиса после загрузки не тратил время на компиляцию
+        installer.exec_command(f"cd ~/{remote_root} && python3 -m compileall -q -x '(^|/)\\.venv/' .",
+                               timeout=300)
+    print(f"Код {stats['digest'][:12]}: передано {stats['uploaded']} файлов ({stats['bytes'] / 1e3:.0f} КБ), "
+          f"без изменений {stats['skipped']}, удалено {stats['removed']}")
+    return stats
+
+
+def remote_version(installer: Any, remote_root: str = REMOTE_ROOT) -> Dict[str, Any]:
+    """
+    Версия кода на плате по её манифесту.
+    """
+    sftp = installer.ssh.open_sftp()
+    try:
+        manifest = read_remote_json(sftp, posixpath.join(remote_root, MANIFEST_NAME)) or {}
+    finally:
+        sftp.close()
+    return {"version": manifest.get("digest"), "revision": manifest.get("revision")}
+
+
+def sync_host(installer: Any, local_root: str, restart: bool = True) -> Dict[str, Any]:
+    """
+    Подключается к плате, передаёт код и перезапускает сервис.
+
+    :return: Статистика передачи, version — закреплённая версия
+    """
+    installer.connect()
+    try:
+        stats = push_code(installer, local_root)
+        if restart:
+            installer.restart_service()
+        return dict(stats, version=stats["digest"], revision=code_revision(local_root))
+    finally:
+        installer.ssh.close()
+
+
+def query_host(installer: Any) -> Dict[str, Any]:
+    installer.connect()
+    try:
+        return remote_version(installer)
+    finally:
+        installer.ssh.close()
+
+
+def version_report(versions: Dict[str, Optional[Dict[str, Any]]], expected: Optional[str] = None) -> List[str]:
+    """
+    Отчёт «какая версия на каких дронах».
+
+    :param versions: Имя хоста -> результат sync_host/query_host или None при ошибке
+    :param expected: Ожидаемая версия; дроны с другой версией помечаются
+    :return: Строки отчёта
+    """
+    groups: Dict[Any, List[str]] = {}
+    revisions: Dict[Any, str] = {}
+    for host, info in versions.items():
+        version = info.get("version") if info else None
+        groups.setdefault(version, []).append(host)
+        if info and info.get("revision"):
+            revisions[version] = info["revision"]
+    lines = []
+    for version, hosts in sorted(groups.items(), key=lambda item: -len(item[1])):
+        if version is None:
+            label = "нет данных / без манифеста"
+        else:
+            label = f"{version[:12]} ({revisions.get(version, '?')})"
+            if expected and version != expected:
+                label += " НЕ СОВПАДАЕТ"
+        lines.append(f"{label}: {len(hosts)} — {', '.join(sorted(hosts))}")
+    if len(groups) > 1:
+        lines.append(f"Внимание: в парке {len(groups)} разных версий")
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Передача кода sPion на плату с закреплением версии")
+    parser.add_argument("--ssh_host", required=True, help="IP или доменное имя удалённого устройства")
+    parser.add_argument("--ssh_user", required=True, help="Пользователь SSH")
+    parser.add_argument("--ssh_password", required=True, help="Пароль SSH")
+    parser.add_argument("--ssh_port", type=int, default=22, help="Порт SSH")
+    parser.add_argument("--root", default=".", help="Корень кода sPion на машине оператора")
+    parser.add_argument("--no_restart", action="store_true", help="Не перезапускать сервис")
+    args = parser.parse_args()
+
+    installer = RemoteServiceInstaller(args.ssh_host, args.ssh_user, args.ssh_password, args.ssh_port)
+    sync_host(installer, os.path.abspath(args.root), restart=not args.no_restart)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Параллельная установка сервиса pion_server на парк дронов.
+
+Хосты берутся из файла инвентаря, установка идёт пулом потоков ограниченного
+размера. Вывод каждого хоста пишется в свой лог-файл, в терминале показывается
+только таблица прогресса и итоговая сводка. Неудачная установка повторяется
+заново с новым SSH-соединением.
+
+Кроме установки умеет передавать код (--sync, см. code_sync.py), собирать
+отчёт о версиях кода на дронах (--versions) и скачивать с дронов логи и
+телеметрию (--collect, см. log_collect.py).
+
+Формат инвентаря — строка на хост, # — комментарий:
+    host[:port] user password [pi|radxa]
+
+Пример:
+    python fleet.py --inventory drones.txt --install --workers 8 --retries 2
+"""
+import argparse
+import functools
+import os
+import shlex
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+from rich.console import Console
+from rich.live import Live
+from rich.table import Table
+
+from code_sync import code_version, query_host, sync_host, version_report
+from installer import RemoteServiceInstaller, RemoteServiceRemover
+from installer_radxa import RadxaInstaller
+from log_collect import collect_from, collect_report
+
+INSTALLERS = {
+    "pi": RemoteServiceInstaller,
+    "radxa": RadxaInstaller,
+}
+
+# Начала строк, которыми установщики сообщают причину неудачи перед sys.exit(1)
+FAILURE_PREFIXES = ("Критическая ошибка:", "Ошибка при удалении сервиса:", "Error:")
+
+
+class FleetHost:
+    """
+    Хост из инвентаря.
+    """
+
+    def __init__(self, host: str, user: str, password: str, port: int = 22, kind: str = "pi") -> None:
+        if kind not in INSTALLERS:
+            raise ValueError(f"Неизвестный тип платы {kind!r}, ожидается один из {sorted(INSTALLERS)}")
+        self.host = host
+        self.user = user
+        self.password = password
+        self.port = port
+        self.kind = kind
+
+    @property
+    def name(self) -> str:
+        return self.host if self.port == 22 else f"{self.host}:{self.port}"
+
+
+def load_inventory(path: str, default_kind: str = "pi") -> List[FleetHost]:
+    """
+    Читает файл инвентаря.
+
+    :param path: Путь к файлу
+    :param default_kind: Тип платы для строк без четвёртого поля
+    :return: Список хостов
+    """
+    hosts = []
+    with open(path, encoding="utf-8") as inventory:
+        for number, line in enumerate(inventory, 1):
+            fields = shlex.split(line, comments=True)
+            if not fields:
+                continue
+            if len(fields) not in (3, 4):
+                raise ValueError(f"{path}:{number}: ожидается 'host[:port] user password [pi|radxa]'")
+            address, user, password = fields[0:3]
+            host, _, port = address.partition(":")
+            hosts.append(FleetHost(host, user, password,
+                                   port=int(port) if port else 22,
+                                   kind=fields[3] if len(fields) == 4 else default_kind))
+    return hosts
+
+
+class ThreadOutput:
+    """
+    Подмена sys.stdout, разводящая вывод потоков по разным файлам.
+
+    Поток, привязанный через bind(), пишет в свой файл; остальные — в fallback.
+    Последняя непустая строка и последнее сообщение об ошибке запоминаются по
+    ключу привязки для таблицы прогресса и сводки.
+    """
+
+    def __init__(self, fallback: TextIO) -> None:
+        self.fallback = fallback
+        self._streams: Dict[int, Tuple[TextIO, str]] = {}
+        self.last_line: Dict[str, str] = {}
+        self.last_failure: Dict[str, str] = {}
+
+    def bind(self, stream: TextIO, key: str) -> None:
+        self._streams[threading.get_ident()] = (stream, key)
+
+    def unbind(self) -> None:
+        self._streams.pop(threading.get_ident(), None)
+
+    def write(self, text: str) -> int:
+        bound = self._streams.get(threading.get_ident())
+        if bound is None:
+            return self.fallback.write(text)
+        stream, key = bound
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if lines:
+            self.last_line[key] = lines[-1]
+        for line in lines:
+            if line.startswith(FAILURE_PREFIXES):
+                self.last_failure[key] = line
+        return stream.write(text)
+
+    def flush(self) -> None:
+        bound = self._streams.get(threading.get_ident())
+        (self.fallback if bound is None else bound[0]).flush()
+
+    def isatty(self) -> bool:
+        return False
+
+
+class HostResult:
+    """
+    Итог работы с одним хостом.
+    """
+
+    def __init__(self, host: FleetHost, log_path: str) -> None:
+        self.host = host
+        self.log_path = log_path
+        self.state = "ожидание"
+        self.ok = False
+        self.attempts = 0
+        self.started: Optional[float] = None
+        self.elapsed = 0.0
+        self.error = ""
+        self.value: Any = None
+
+
+class FleetRunner:
+    """
+    Запуск действия (установка, удаление) на многих хостах параллельно.
+    """
+
+    def __init__(self,
+                 hosts: List[FleetHost],
+                 action: Callable[[FleetHost], None],
+                 workers: int = 8,
+                 retries: int = 2,
+                 retry_delay: float = 5.,
+                 log_dir: str = "fleet_logs",
+                 console: Optional[Console] = None) -> None:
+        """
+        :param hosts: Хосты из инвентаря
+        :param action: Действие над хостом; неудача — исключение или sys.exit(),
+            возвращаемое значение сохраняется в HostResult.value
+        :param workers: Количество одновременно обслуживаемых хостов
+        :param retries: Количество повторов после неудачной попытки
+        :param retry_delay: Пауза перед повтором (в секундах)
+        :param log_dir: Каталог логов хостов
+        :param console: Консоль для таблицы прогресса
+        """
+        self.hosts = hosts
+        self.action = action
+        self.workers = workers
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.log_dir = log_dir
+        self.console = console
+        self.results = [HostResult(host, os.path.join(log_dir, f"{host.name.replace(':', '_')}.log"))
+                        for host in hosts]
+        self.output: Optional[ThreadOutput] = None
+
+    def run(self) -> List[HostResult]:
+        """
+        Выполняет действие на всех хостах и показывает прогресс.
+
+        :return: Результаты в порядке инвентаря
+        """
+        os.makedirs(self.log_dir, exist_ok=True)
+        stdout, stderr = sys.stdout, sys.stderr
+        console = self.console or Console(file=stdout)
+        self.output = ThreadOutput(stdout)
+        sys.stdout = sys.stderr = self.output
+        try:
+            with Live(self.progress_table(), console=console, refresh_per_second=4,
+                      redirect_stdout=False, redirect_stderr=False) as live:
+                with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fleet") as pool:
+                    futures = [pool.submit(self._run_host, result) for result in self.results]
+                    while not all(future.done() for future in futures):
+                        live.update(self.progress_table())
+                        time.sleep(0.25)
+                live.update(self.progress_table())
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+        return self.results
+
+    def _run_host(self, result: HostResult) -> None:
+        result.started = time.monotonic()
+        with open(result.log_path, "w", encoding="utf-8") as log:
+            self.output.bind(log, result.host.name)
+            try:
+                for attempt in range(1, self.retries + 2):
+                    result.attempts = attempt
+                    result.state = "выполняется"
+                    self.output.last_failure.pop(result.host.name, None)
+                    print(f"=== {result.host.name}: попытка {attempt}")
+                    try:
+                        result.value = self.action(result.host)
+                        result.ok = True
+                        result.error = ""
+                        break
+                    except (Exception, SystemExit) as error:
+                        # Установщики печатают причину и завершаются через sys.exit(1)
+                        result.error = self.output.last_failure.get(result.host.name, "sys.exit") \
+                            if isinstance(error, SystemExit) else f"{type(error).__name__}: {error}"
+                        print(f"=== {result.host.name}: попытка {attempt} неудачна: {result.error}")
+                    if attempt <= self.retries:
+                        result.state = "повтор"
+                        time.sleep(self.retry_delay)
+            finally:
+                result.state = "готово" if result.ok else "ошибка"
+                result.elapsed = time.monotonic() - result.started
+                self.output.unbind()
+
+    def progress_table(self) -> Table:
+        table = Table(title=f"Парк: {len(self.hosts)} хостов, потоков {self.workers}")
+        for column in ("Хост", "Плата", "Состояние", "Попытка", "Время, с", "Последнее сообщение"):
+            table.add_column(column)
+        now = time.monotonic()
+        for result in self.results:
+            if result.started is None:
+                elapsed = ""
+            elif result.state in ("готово", "ошибка"):
+                elapsed = f"{result.elapsed:.0f}"
+            else:
+                elapsed = f"{now - result.started:.0f}"
+            last_line = self.output.last_line.get(result.host.name, "") if self.output else ""
+            style = {"готово": "green", "ошибка": "red", "повтор": "yellow"}.get(result.state, "")
+            table.add_row(result.host.name, result.host.kind, result.state,
+                          str(result.attempts or ""), elapsed, last_line[-60:], style=style)
+        return table
+
+    def summary(self) -> Dict[str, int]:
+        done = sum(result.ok for result in self.results)
+        return {"hosts": len(self.results), "ok": done, "failed": len(self.results) - done,
+                "retried": sum(result.attempts > 1 for result in self.results)}
+
+
+def install_host(host: FleetHost, wheelhouse: Optional[str] = None, code: Optional[str] = None) -> None:
+    installer = INSTALLERS[host.kind](host.host, host.user, host.password, ssh_port=host.port)
+    installer.install(wheelhouse=wheelhouse, code=code)
+
+
+def remove_host(host: FleetHost) -> None:
+    RemoteServiceRemover(host.host, host.user, host.password, ssh_port=host.port).remove()
+
+
+def sync_code_host(host: FleetHost, code: str) -> Dict[str, Any]:
+    return sync_host(INSTALLERS[host.kind](host.host, host.user, host.password, ssh_port=host.port), code)
+
+
+def query_version_host(host: FleetHost) -> Dict[str, Any]:
+    return query_host(INSTALLERS[host.kind](host.host, host.user, host.password, ssh_port=host.port))
+
+
+def collect_host(host: FleetHost, out: str) -> Dict[str, Any]:
+    installer = INSTALLERS[host.kind](host.host, host.user, host.password, ssh_port=host.port, compress=True)
+    return collect_from(installer, os.path.join(out, host.name.replace(":", "_")))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Параллельная установка или удаление Pion сервиса на парке дронов")
+    parser.add_argument("--inventory", required=True, help="Файл инвентаря: host[:port] user password [pi|radxa]")
+    parser.add_argument("--kind", default="pi", choices=sorted(INSTALLERS),
+                        help="Тип платы для строк инвентаря без четвёртого поля")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--install", action="store_true", help="Установить/обновить сервис")
+    action.add_argument("--remove", action="store_true", help="Удалить сервис")
+    action.add_argument("--sync", action="store_true", help="Передать код из --code и перезапустить сервис")
+    action.add_argument("--versions", action="store_true", help="Только отчёт о версиях кода на дронах")
+    action.add_argument("--collect", action="store_true",
+                        help="Скачать логи и телеметрию в --out (только новое, с докачкой)")
+    parser.add_argument("--workers", type=int, default=8, help="Количество хостов одновременно")
+    parser.add_argument("--retries", type=int, default=2, help="Повторов после неудачной попытки")
+    parser.add_argument("--retry_delay", type=float, default=5., help="Пауза перед повтором, с")
+    parser.add_argument("--log_dir", default="fleet_logs", help="Каталог логов хостов")
+    parser.add_argument("--wheelhouse", default=None,
+                        help="Ставить зависимости без интернета из набора колёс (wheelhouse.py)")
+    parser.add_argument("--code", default=None,
+                        help="Корень кода sPion на машине оператора: передаётся вместо git clone (code_sync.py)")
+    parser.add_argument("--out", default="flight_logs", help="Каталог для собранных логов и телеметрии (--collect)")
+    args = parser.parse_args()
+
+    if args.sync and args.code is None:
+        parser.error("--sync требует --code")
+    if args.install:
+        action = functools.partial(install_host, wheelhouse=args.wheelhouse, code=args.code)
+    elif args.remove:
+        action = remove_host
+    elif args.sync:
+        action = functools.partial(sync_code_host, code=os.path.abspath(args.code))
+    elif args.collect:
+        action = functools.partial(collect_host, out=args.out)
+    else:
+        action = query_version_host
+    hosts = load_inventory(args.inventory, default_kind=args.kind)
+    runner = FleetRunner(hosts,
+                         action,
+                         workers=args.workers,
+                         retries=args.retries,
+                         retry_delay=args.retry_delay,
+                         log_dir=args.log_dir)
+    results = runner.run()
+    print()
+    for result in results:
+        if not result.ok:
+            print(f"{result.host.name}: {result.error} (лог: {result.log_path})")
+    if args.sync or args.versions:
+        expected = code_version(os.path.abspath(args.code)) if args.code else None
+        for line in version_report({result.host.name: result.value for result in results}, expected):
+            print(line)
+    if args.collect:
+        for line in collect_report({result.host.name: result.value for result in results}):
+            print(line)
+    summary = runner.summary()
+    print(f"Готово: {summary['ok']}/{summary['hosts']}, с повторами: {summary['retried']}, "
+          f"с ошибкой: {summary['failed']}")
+    sys.exit(0 if summary["failed"] == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,46 @@ import paramiko
 import sys
 from textwrap import dedent
 
+# Манифест code_sync.py (то же имя, что в code_sync.py и version_check.py)
+CODE_MANIFEST = "code/sPion/.spion_manifest.json"
+
+
+def remove_code_manifest(ssh: paramiko.SSHClient) -> bool:
+    """
+    Снимает закрепление версии после обновления кода через git.
+
+    Манифест от прежней передачи code_sync.py не соответствует файлам после
+    git pull, и version_check.py не дал бы сервису запуститься.
+
+    :return: True, если манифест был и удалён
+    """
+    sftp = ssh.open_sftp()
+    try:
+        sftp.remove(CODE_MANIFEST)
+    except IOError:
+        return False
+    finally:
+        sftp.close()
+    print("Манифест code_sync удалён: код обновлён через git")
+    return True
+
+
 class RemoteServiceInstaller:
-    def __init__(self, ssh_host: str, ssh_user: str, ssh_password: str):
+    def __init__(self, ssh_host: str, ssh_user: str, ssh_password: str, ssh_port: int = 22,
+                 compress: bool = False):
         self.ssh_host = ssh_host
         self.ssh_user = ssh_user
         self.ssh_password = ssh_password
+        self.ssh_port = ssh_port
+        # Сжатие SSH (zlib) полезно при скачивании логов и телеметрии по слабому каналу
+        self.compress = compress
         self.ssh = paramiko.SSHClient()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
     def connect(self):
         print(f"Подключаемся по SSH к {self.ssh_host} как {self.ssh_user}...")
-        self.ssh.connect(self.ssh_host, username=self.ssh_user, password=self.ssh_password, timeout=10)
+        self.ssh.connect(self.ssh_host, port=self.ssh_port, username=self.ssh_user, password=self.ssh_password, timeout=10,
+                         compress=self.compress)
         self.transport = self.ssh.get_transport()
 
     def exec_command(self, cmd, timeout=15):
@@ -45,7 +74,81 @@ class RemoteServiceInstaller:
         return exit_code, stdout, stderr
 
     
-    def install(self):
+    def install_dependencies(self, clone=True):
+        """
+        Установка зависимостей из интернета: apt, клонирование sPion, pip и скрипт Pion.
+
+        Если код передаётся с машины оператора (code_sync.py), клонирование пропускается.
+        """
+        # Установка apt-зависимостей
+        exit_code, _, _ = self.exec_command_with_retry(
+            "sudo apt-get update && sudo apt-get install -y python3 python3-pip wget curl git",
+            timeout=60
+        )
+        if exit_code != 0:
+            raise Exception("Ошибка установки зависимостей через apt-get")
+
+        # Клонируем или обновляем репозиторий sPion в ~/code/sPion
+        if clone:
+            clone_cmd = ("mkdir -p ~/code && cd ~/code && "
+                        "if [ -d sPion ]; then cd sPion && git pull; else git clone https://github.com/OnisOris/sPion.git; fi")
+            exit_code, _, _ = self.exec_command(clone_cmd, timeout=30)
+            if exit_code != 0:
+                raise Exception("Ошибка клонирования/обновления репозитория sPion")
+            remove_code_manifest(self.ssh)
+
+        # Создаем виртуальное окружение в корне репозитория sPion и устанавливаем зависимости
+        venv_cmd = (
+            "cd ~/code/sPion && "
+            "if [ ! -d .venv ]; then "
+            "python3 -m venv .venv && "
+            "source .venv/bin/activate && "
+            "pip install --upgrade pip && "
+            "pip install -r requirements.txt; "
+            "else "
+            "source .venv/bin/activate && pip install -r requirements.txt; "
+            "fi"
+        )
+        exit_code, _, _ = self.exec_command(venv_cmd, timeout=60)
+        if exit_code != 0:
+            raise Exception("Ошибка создания виртуального окружения и установки зависимостей")
+
+        # Если пакет pion уже установлен, удаляем его, чтобы установить заново
+        check_pion_cmd = "cd ~/code/sPion && source .venv/bin/activate && pip list | grep '^pion '"
+        exit_code, stdout, _ = self.exec_command(check_pion_cmd, timeout=15)
+        if stdout:
+            print("Пакет pion обнаружен, удаляем его...")
+            uninstall_cmd = "cd ~/code/sPion && source .venv/bin/activate && pip uninstall -y pion"
+            exit_code, _, _ = self.exec_command(uninstall_cmd, timeout=15)
+            if exit_code != 0:
+                raise Exception("Ошибка удаления пакета pion из виртуального окружения")
+
+        # Выполняем установку зависимостей Pion через внешний скрипт
+        install_cmd = ("cd ~/code/sPion && sudo -E curl -sSL https://raw.githubusercontent.com/OnisOris/pion/refs/heads/dev/scripts/install_linux.sh | sudo -E bash")
+        exit_code, _, _ = self.exec_command(install_cmd, timeout=60)
+        if exit_code != 0:
+            raise Exception("Ошибка установки зависимостей Pion")
+
+    def install_offline(self, wheelhouse):
+        """
+        Установка зависимостей без интернета из набора колёс, см. wheelhouse.py.
+
+        Код sPion должен уже быть на плате (см. push_code).
+        """
+        from wheelhouse import deploy_wheelhouse
+        exit_code, _, _ = self.exec_command("test -d ~/code/sPion", timeout=10)
+        if exit_code != 0:
+            raise Exception("Каталог ~/code/sPion не найден на плате")
+        deploy_wheelhouse(self, wheelhouse)
+
+    def push_code(self, code):
+        """
+        Передача кода sPion с машины оператора с закреплением версии, см. code_sync.py.
+        """
+        from code_sync import push_code
+        return push_code(self, code)
+
+    def install(self, wheelhouse=None, code=None):
         try:
             self.connect()
             # Если сервис уже существует – удаляем старый сервис для переустановки.
@@ -58,52 +161,12 @@ class RemoteServiceInstaller:
                 self.exec_command("sudo systemctl daemon-reload", timeout=10)
             print("\nНачинаем установку Pion server для Raspberry Pi Zero 2W...")
 
-            # Установка apt-зависимостей
-            exit_code, _, _ = self.exec_command_with_retry(
-                "sudo apt-get update && sudo apt-get install -y python3 python3-pip wget curl git",
-                timeout=60
-            )
-            if exit_code != 0:
-                raise Exception("Ошибка установки зависимостей через apt-get")
-
-            # Клонируем или обновляем репозиторий sPion в ~/code/sPion
-            clone_cmd = ("mkdir -p ~/code && cd ~/code && "
-                        "if [ -d sPion ]; then cd sPion && git pull; else git clone https://github.com/OnisOris/sPion.git; fi")
-            exit_code, _, _ = self.exec_command(clone_cmd, timeout=30)
-            if exit_code != 0:
-                raise Exception("Ошибка клонирования/обновления репозитория sPion")
-
-            # Создаем виртуальное окружение в корне репозитория sPion и устанавливаем зависимости
-            venv_cmd = (
-                "cd ~/code/sPion && "
-                "if [ ! -d .venv ]; then "
-                "python3 -m venv .venv && "
-                "source .venv/bin/activate && "
-                "pip install --upgrade pip && "
-                "pip install -r requirements.txt; "
-                "else "
-                "source .venv/bin/activate && pip install -r requirements.txt; "
-                "fi"
-            )
-            exit_code, _, _ = self.exec_command(venv_cmd, timeout=60)
-            if exit_code != 0:
-                raise Exception("Ошибка создания виртуального окружения и установки зависимостей")
-
-            # Если пакет pion уже установлен, удаляем его, чтобы установить заново
-            check_pion_cmd = "cd ~/code/sPion && source .venv/bin/activate && pip list | grep '^pion '"
-            exit_code, stdout, _ = self.exec_command(check_pion_cmd, timeout=15)
-            if stdout:
-                print("Пакет pion обнаружен, удаляем его...")
-                uninstall_cmd = "cd ~/code/sPion && source .venv/bin/activate && pip uninstall -y pion"
-                exit_code, _, _ = self.exec_command(uninstall_cmd, timeout=15)
-                if exit_code != 0:
-                    raise Exception("Ошибка удаления пакета pion из виртуального окружения")
-
-            # Выполняем установку зависимостей Pion через внешний скрипт
-            install_cmd = ("cd ~/code/sPion && sudo -E curl -sSL https://raw.githubusercontent.com/OnisOris/pion/refs/heads/dev/scripts/install_linux.sh | sudo -E bash")
-            exit_code, _, _ = self.exec_command(install_cmd, timeout=60)
-            if exit_code != 0:
-                raise Exception("Ошибка установки зависимостей Pion")
+            if code is not None:
+                self.push_code(code)
+            if wheelhouse is None:
+                self.install_dependencies(clone=code is None)
+            else:
+                self.install_offline(wheelhouse)
 
             # Формируем unit‑файл без лишних отступов
             unit_content = dedent(f"""\
@@ -114,10 +177,11 @@ class RemoteServiceInstaller:
             [Service]
             User={self.ssh_user}
             WorkingDirectory=/home/{self.ssh_user}/code/sPion
-            ExecStart=/bin/bash -c "cd /home/{self.ssh_user}/code/sPion && git pull || true; source /home/{self.ssh_user}/code/sPion/.venv/bin/activate && nohup python3 /home/{self.ssh_user}/code/sPion/main.py >> /home/{self.ssh_user}/code/sPion/pion_server.log 2>&1"
+            ExecStart=/home/{self.ssh_user}/code/sPion/.venv/bin/python3 /home/{self.ssh_user}/code/sPion/main.py
             Restart=always
-            StandardOutput=null
-            StandardError=null
+            RestartSec=1
+            StandardOutput=append:/home/{self.ssh_user}/code/sPion/pion_server.log
+            StandardError=append:/home/{self.ssh_user}/code/sPion/pion_server.log
 
             [Install]
             WantedBy=multi-user.target
@@ -156,23 +220,23 @@ class RemoteServiceInstaller:
             print("SSH-соединение закрыто.")
             
     def restart_service(self):
-        # Обновляем репозиторий и перезапускаем сервис
-        self.exec_command("cd ~/code/sPion && git pull", timeout=30)
+        # Код обновляется через code_sync.py, при перезапуске сервис только сверяет версию
         self.exec_command("sudo systemctl restart pion_server.service", timeout=15)
         print("Сервис успешно перезапущен.")
 
 
 class RemoteServiceRemover:
-    def __init__(self, ssh_host: str, ssh_user: str, ssh_password: str):
+    def __init__(self, ssh_host: str, ssh_user: str, ssh_password: str, ssh_port: int = 22):
         self.ssh_host = ssh_host
         self.ssh_user = ssh_user
         self.ssh_password = ssh_password
+        self.ssh_port = ssh_port
         self.ssh = paramiko.SSHClient()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
     def connect(self):
         print(f"Подключаемся по SSH к {self.ssh_host} для удаления сервиса pion_server...")
-        self.ssh.connect(self.ssh_host, username=self.ssh_user, password=self.ssh_password, timeout=10)
+        self.ssh.connect(self.ssh_host, port=self.ssh_port, username=self.ssh_user, password=self.ssh_password, timeout=10)
         self.transport = self.ssh.get_transport()
 
     def exec_command(self, cmd, timeout=15):
@@ -213,17 +277,20 @@ if __name__ == "__main__":
     parser.add_argument("--ssh_host", required=True, help="IP или доменное имя удалённого устройства")
     parser.add_argument("--ssh_user", required=True, help="Пользователь SSH")
     parser.add_argument("--ssh_password", required=True, help="Пароль SSH")
+    parser.add_argument("--ssh_port", type=int, default=22, help="Порт SSH")
     parser.add_argument("--install", action="store_true", help="Установить/обновить сервис")
     parser.add_argument("--remove", action="store_true", help="Удалить сервис")
+    parser.add_argument("--wheelhouse", default=None, help="Ставить зависимости без интернета из набора колёс (wheelhouse.py)")
+    parser.add_argument("--code", default=None, help="Передать код sPion из этого каталога вместо git clone (code_sync.py)")
     args = parser.parse_args()
 
     if args.remove:
-        remover = RemoteServiceRemover(args.ssh_host, args.ssh_user, args.ssh_password)
+        remover = RemoteServiceRemover(args.ssh_host, args.ssh_user, args.ssh_password, args.ssh_port)
         remover.remove()
 
     if args.install:
-        installer = RemoteServiceInstaller(args.ssh_host, args.ssh_user, args.ssh_password)
-        installer.install()
+        installer = RemoteServiceInstaller(args.ssh_host, args.ssh_user, args.ssh_password, args.ssh_port)
+        installer.install(wheelhouse=args.wheelhouse, code=args.code)
     elif not args.remove:
         print("Укажите либо --install, либо --remove")
         sys.exit(1)
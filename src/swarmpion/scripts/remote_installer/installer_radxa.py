@@ -6,11 +6,18 @@ import sys
 import shlex
 from textwrap import dedent
 
+from installer import remove_code_manifest
+
+
 class RadxaInstaller:
-    def __init__(self, ssh_host: str, ssh_user: str, ssh_password: str):
+    def __init__(self, ssh_host: str, ssh_user: str, ssh_password: str, ssh_port: int = 22,
+                 compress: bool = False):
         self.ssh_host = ssh_host
         self.ssh_user = ssh_user
         self.ssh_password = ssh_password
+        self.ssh_port = ssh_port
+        # zlib compression for log and telemetry downloads
+        self.compress = compress
         self.sudo_password = ssh_password
         self.ssh = paramiko.SSHClient()
         self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -19,11 +26,13 @@ class RadxaInstaller:
         print(f"Connecting to {self.ssh_host} as {self.ssh_user}...")
         self.ssh.connect(
             self.ssh_host,
+            port=self.ssh_port,
             username=self.ssh_user,
             password=self.ssh_password,
             timeout=10,
             look_for_keys=False,
-            allow_agent=False
+            allow_agent=False,
+            compress=self.compress
         )
         self.transport = self.ssh.get_transport()
 
@@ -95,6 +104,7 @@ class RadxaInstaller:
         exit_code, _, _ = self.exec_command(cmd, timeout=60)
         if exit_code != 0:
             raise RuntimeError("Repository configuration failed")
+        remove_code_manifest(self.ssh)
 
     def setup_virtualenv(self):
         """Create Python virtual environment"""
@@ -108,6 +118,15 @@ class RadxaInstaller:
         if exit_code != 0:
             raise RuntimeError("Virtual environment setup failed")
 
+    def install_offline(self, wheelhouse):
+        """Install Python dependencies from a prebuilt wheelhouse, no internet needed"""
+        from wheelhouse import deploy_wheelhouse
+        print("\nInstalling dependencies from wheelhouse...")
+        exit_code, _, _ = self.exec_command("test -d ~/code/sPion", timeout=10)
+        if exit_code != 0:
+            raise RuntimeError("~/code/sPion is missing on the board")
+        deploy_wheelhouse(self, wheelhouse)
+
     # def install_pion_dependencies(self):
     #     """Install Pion specific dependencies"""
     #     print("\nInstalling Pion dependencies...")
@@ -119,6 +138,8 @@ class RadxaInstaller:
     def configure_service(self):
         """Create systemd service file"""
         print("\nConfiguring systemd service...")
+        # Code is updated by code_sync.py, not on every start. The venv python is started
+        # directly: no shell, no uv run resolving dependencies, so a rebooted drone rejoins fast
         unit_content = dedent(f"""\
         [Unit]
         Description=Pion Server
@@ -128,9 +149,9 @@ class RadxaInstaller:
         [Service]
         User={self.ssh_user}
         WorkingDirectory=/home/{self.ssh_user}/code/sPion
-        ExecStart=/bin/bash -c 'cd /home/{self.ssh_user}/code/sPion && git pull && source .venv/bin/activate && uv run main.py'
+        ExecStart=/home/{self.ssh_user}/code/sPion/.venv/bin/python3 /home/{self.ssh_user}/code/sPion/main.py
         Restart=always
-        RestartSec=10
+        RestartSec=1
         StandardOutput=journal
         StandardError=journal
 
@@ -160,16 +181,34 @@ class RadxaInstaller:
             if exit_code != 0:
                 raise RuntimeError(f"Failed to execute: {cmd}")
 
-    def install(self):
+    def push_code(self, code):
+        """Push sPion code from the operator machine and pin its version (code_sync.py)"""
+        from code_sync import push_code
+        return push_code(self, code)
+
+    def restart_service(self):
+        """Restart service; the service verifies the pinned code version on start"""
+        exit_code, _, _ = self.exec_sudo("systemctl restart pion_server.service", timeout=20)
+        if exit_code != 0:
+            raise RuntimeError("Failed to restart pion_server")
+        print("Service restarted.")
+
+    def install(self, wheelhouse=None, code=None):
         try:
             self.connect()
             
             if self.check_service_exists():
                 self.remove_old_service()
 
-            self.install_dependencies()
-            self.clone_repo()
-            self.setup_virtualenv()
+            if code is not None:
+                self.push_code(code)
+            if wheelhouse is None:
+                self.install_dependencies()
+                if code is None:
+                    self.clone_repo()
+                self.setup_virtualenv()
+            else:
+                self.install_offline(wheelhouse)
             # self.install_pion_dependencies()
             self.configure_service()
             self.enable_service()
@@ -191,12 +230,16 @@ if __name__ == "__main__":
     parser.add_argument('--ssh-host', '--ssh_host', required=True, dest='ssh_host', help='SSH hostname/IP')
     parser.add_argument('--ssh-user', '--ssh_user', required=True, dest='ssh_user', help='SSH username')
     parser.add_argument('--ssh-password', '--ssh_password', required=True, dest='ssh_password', help='SSH password')
+    parser.add_argument('--ssh-port', '--ssh_port', type=int, default=22, dest='ssh_port', help='SSH port')
+    parser.add_argument('--wheelhouse', default=None, help='Install dependencies offline from a wheelhouse (wheelhouse.py)')
+    parser.add_argument('--code', default=None, help='Push sPion code from this directory instead of git clone (code_sync.py)')
 
     args = parser.parse_args()
     
     installer = RadxaInstaller(
         ssh_host=args.ssh_host,
         ssh_user=args.ssh_user,
-        ssh_password=args.ssh_password
+        ssh_password=args.ssh_password,
+        ssh_port=args.ssh_port
     )
-    installer.install()
+    installer.install(wheelhouse=args.wheelhouse, code=args.code)
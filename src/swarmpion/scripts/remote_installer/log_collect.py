@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Сбор логов и телеметрии с плат на машину оператора.
+
+Файлы ищутся по SFTP в каталоге кода (pion_server.log, telemetry.bin и
+другие *.log) и скачиваются в каталог <out>/<хост>/. Соединение открывается
+со сжатием SSH (zlib), журнал systemd сжимается gzip на плате.
+
+Повторный сбор передаёт только новое:
+- файл, размер и время изменения которого совпадают с последним сбором, пропускается;
+- дописываемые логи (*.log) докачиваются с конца локальной копии, если её
+  первый и последний блоки совпадают с теми же байтами на плате; иначе лог
+  был начат заново (ротация, переустановка), старая копия сохраняется в
+  .old, а лог скачивается целиком;
+- остальные файлы пишутся в .part и при обрыве докачиваются, если файл на
+  плате с тех пор не менялся, иначе скачиваются заново;
+- журнал systemd забирается с курсора предыдущего сбора.
+Состояние хранится в <out>/<хост>/.collect_state.json.
+
+Пример:
+    python log_collect.py --ssh_host 192.168.1.10 --ssh_user pi --ssh_password raspberry --out flight_logs
+    python fleet.py --inventory drones.txt --collect --out flight_logs
+"""
+import argparse
+import fnmatch
+import json
+import os
+import posixpath
+import stat
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import paramiko
+
+from code_sync import EXCLUDE_DIRS, REMOTE_ROOT
+from installer import RemoteServiceInstaller
+
+STATE_NAME = ".collect_state.json"
+PATTERNS = ("*.log", "telemetry*.bin")
+# Файлы, которые только дописываются: их можно докачивать с конца локальной копии
+APPEND_PATTERNS = ("*.log",)
+JOURNAL_NAME = "journal.log"
+JOURNAL_UNIT = "pion_server"
+CHUNK_SIZE = 1 << 16
+# Размер блоков в начале и конце локальной копии лога, сверяемых перед докачкой
+PROBE_SIZE = 4096
+
+
+def find_remote_files(sftp: paramiko.SFTPClient,
+                      root: str = REMOTE_ROOT,
+                      patterns: Tuple[str, ...] = PATTERNS,
+                      max_depth: int = 5) -> Dict[str, paramiko.SFTPAttributes]:
+    """
+    Файлы на плате по маскам имён: относительный путь -> атрибуты SFTP.
+    """
+    found = {}
+    pending = [("", 0)]
+    while pending:
+        relative, depth = pending.pop()
+        try:
+            entries = sftp.listdir_attr(posixpath.join(root, relative) if relative else root)
+        except IOError:
+            continue
+        for entry in entries:
+            path = posixpath.join(relative, entry.filename) if relative else entry.filename
+            if stat.S_ISDIR(entry.st_mode or 0):
+                if depth < max_depth and entry.filename not in EXCLUDE_DIRS:
+                    pending.append((path, depth + 1))
+            elif any(fnmatch.fnmatch(entry.filename, pattern) for pattern in patterns):
+                found[path] = entry
+    return found
+
+
+def load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(path: str, state: Dict[str, Any]) -> None:
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=1, sort_keys=True)
+    os.replace(temporary, path)
+
+
+def _copy_range(sftp: paramiko.SFTPClient, remote: str, local: str, offset: int, size: int) -> int:
+    """
+    Дописывает в local байты remote с offset до size. Возвращает число переданных байт.
+    """
+    copied = 0
+    with sftp.open(remote, "rb") as source, open(local, "ab") as target:
+        source.seek(offset)
+        source.prefetch(size - offset)
+        while offset + copied < size:
+            chunk = source.read(min(CHUNK_SIZE, size - offset - copied))
+            if not chunk:
+                break
+            target.write(chunk)
+            copied += len(chunk)
+    return copied
+
+
+def _read_range(file: Any, offset: int, size: int) -> bytes:
+    file.seek(offset)
+    data = b""
+    while len(data) < size:
+        chunk = file.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def same_prefix(sftp: paramiko.SFTPClient, remote: str, local: str, have: int) -> bool:
+    """
+    Совпадают ли первые have байт remote с локальной копией: сверяются первый
+    и последний блоки PROBE_SIZE.
+    """
+    ranges = [(0, min(PROBE_SIZE, have))]
+    if have > PROBE_SIZE:
+        ranges.append((have - PROBE_SIZE, PROBE_SIZE))
+    with sftp.open(remote, "rb") as source, open(local, "rb") as copy:
+        return all(_read_range(source, offset, size) == _read_range(copy, offset, size)
+                   for offset, size in ranges)
+
+
+def fetch_file(sftp: paramiko.SFTPClient,
+               remote: str,
+               local: str,
+               attributes: paramiko.SFTPAttributes,
+               known: Optional[Dict[str, Any]]) -> Tuple[str, int]:
+    """
+    Скачивает один файл с пропуском и докачкой.
+
+    :param remote: Путь на плате
+    :param local: Локальный путь
+    :param attributes: Атрибуты файла на плате
+    :param known: Запись состояния от предыдущего сбора ({size, mtime}) или None
+    :return: Исход ("skipped", "fetched", "resumed") и число переданных байт
+    """
+    size, mtime = attributes.st_size or 0, attributes.st_mtime
+    if known == {"size": size, "mtime": mtime} and os.path.exists(local):
+        return "skipped", 0
+    os.makedirs(os.path.dirname(local), exist_ok=True)
+    name = posixpath.basename(remote)
+    if any(fnmatch.fnmatch(name, pattern) for pattern in APPEND_PATTERNS):
+        have = os.path.getsize(local) if os.path.exists(local) else 0
+        if have > size or (have and not same_prefix(sftp, remote, local, have)):
+            # Лог на плате начат заново (ротация или переустановка) — старую копию сохраняем рядом
+            os.replace(local, local + ".old")
+            have = 0
+        return ("resumed" if have else "fetched"), _copy_range(sftp, remote, local, have, size)
+
+    partial = local + ".part"
+    partial_state = load_state(partial + ".json")
+    have = os.path.getsize(partial) if os.path.exists(partial) else 0
+    if have > size or partial_state != {"size": size, "mtime": mtime}:
+        # Файл на плате изменился с начала прерванной передачи: докачка дала бы смесь версий
+        have = 0
+        open(partial, "wb").close()
+        save_state(partial + ".json", {"size": size, "mtime": mtime})
+    copied = _copy_range(sftp, remote, partial, have, size)
+    if os.path.getsize(partial) != size:
+        raise IOError(f"{remote}: получено {os.path.getsize(partial)} из {size} байт")
+    os.replace(partial, local)
+    os.remove(partial + ".json")
+    return ("resumed" if have else "fetched"), copied
+
+
+def fetch_journal(installer: Any, local: str, cursor: Optional[str], unit: str = JOURNAL_UNIT) -> Tuple[Optional[str], int]:
+    """
+    Дописывает в local новые строки журнала systemd сервиса.
+
+    :param cursor: Курсор journalctl от предыдущего сбора или None
+    :return: Новый курсор и число полученных (сжатых) байт
+    """
+    command = f"journalctl -u {unit} --no-pager -o short-iso --show-cursor"
+    if cursor:
+        command += f" --after-cursor='{cursor}'"
+    channel = installer.ssh.get_transport().open_session()
+    channel.exec_command(f"{command} 2>/dev/null | gzip -c")
+    compressed = bytearray()
+    while True:
+        chunk = channel.recv(CHUNK_SIZE)
+        if not chunk:
+            break
+        compressed += chunk
+    channel.recv_exit_status()
+    channel.close()
+    if not compressed:
+        return cursor, 0
+    text = zlib.decompress(bytes(compressed), 16 + zlib.MAX_WBITS).decode("utf-8", "replace")
+    lines = text.splitlines(keepends=True)
+    if lines and lines[-1].startswith("-- cursor: "):
+        cursor = lines.pop()[len("-- cursor: "):].strip()
+    lines = [line for line in lines if not line.startswith("-- No entries --")]
+    if lines:
+        with open(local, "a", encoding="utf-8") as file:
+            file.writelines(lines)
+    return cursor, len(compressed)
+
+
+def collect_host(installer: Any, out_dir: str, journal: bool = True) -> Dict[str, Any]:
+    """
+    Скачивает логи и телеметрию с подключённой платы.
+
+    :param installer: Подключённый установщик (RemoteServiceInstaller или RadxaInstaller)
+    :param out_dir: Локальный каталог этой платы
+    :param journal: Забирать также журнал systemd сервиса
+    :return: Статистика: fetched, resumed, skipped, bytes, files
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    state_path = os.path.join(out_dir, STATE_NAME)
+    state = load_state(state_path)
+    files = state.setdefault("files", {})
+    stats: Dict[str, Any] = {"fetched": 0, "resumed": 0, "skipped": 0, "bytes": 0, "files": []}
+    sftp = installer.ssh.open_sftp()
+    try:
+        for relative, attributes in sorted(find_remote_files(sftp).items()):
+            outcome, copied = fetch_file(sftp, posixpath.join(REMOTE_ROOT, relative),
+                                         os.path.join(out_dir, *relative.split("/")),
+                                         attributes, files.get(relative))
+            stats[outcome] += 1
+            stats["bytes"] += copied
+            stats["files"].append(relative)
+            if outcome != "skipped":
+                files[relative] = {"size": attributes.st_size or 0, "mtime": attributes.st_mtime}
+                # Состояние сохраняется после каждого файла, чтобы обрыв не повторял уже скачанное
+                save_state(state_path, state)
+    finally:
+        sftp.close()
+    if journal:
+        state["journal_cursor"], copied = fetch_journal(installer, os.path.join(out_dir, JOURNAL_NAME),
+                                                        state.get("journal_cursor"))
+        stats["bytes"] += copied
+        save_state(state_path, state)
+    print(f"Собрано: новых {stats['fetched']}, докачано {stats['resumed']}, без изменений {stats['skipped']}, "
+          f"передано {stats['bytes'] / 1e3:.0f} КБ")
+    return stats
+
+
+def collect_report(results: Dict[str, Optional[Dict[str, Any]]]) -> List[str]:
+    """
+    Сводка сбора по хостам.
+
+    :param results: Имя хоста -> результат collect_host или None при ошибке
+    """
+    lines = []
+    for host, stats in sorted(results.items()):
+        if stats is None:
+            lines.append(f"{host}: нет данных")
+            continue
+        lines.append(f"{host}: новых {stats['fetched']}, докачано {stats['resumed']}, "
+                     f"без изменений {stats['skipped']}, {stats['bytes'] / 1e3:.0f} КБ")
+    total = sum(stats["bytes"] for stats in results.values() if stats)
+    lines.append(f"Всего передано {total / 1e6:.2f} МБ")
+    return lines
+
+
+def collect_from(installer: Any, out_dir: str, journal: bool = True) -> Dict[str, Any]:
+    """
+    Подключается к плате и собирает с неё логи в out_dir.
+    """
+    installer.connect()
+    try:
+        return collect_host(installer, out_dir, journal=journal)
+    finally:
+        installer.ssh.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сбор логов и телеметрии с платы sPion")
+    parser.add_argument("--ssh_host", required=True, help="IP или доменное имя удалённого устройства")
+    parser.add_argument("--ssh_user", required=True, help="Пользователь SSH")
+    parser.add_argument("--ssh_password", required=True, help="Пароль SSH")
+    parser.add_argument("--ssh_port", type=int, default=22, help="Порт SSH")
+    parser.add_argument("--out", default="flight_logs", help="Локальный каталог для собранных файлов")
+    parser.add_argument("--no_journal", action="store_true", help="Не забирать журнал systemd")
+    args = parser.parse_args()
+
+    installer = RemoteServiceInstaller(args.ssh_host, args.ssh_user, args.ssh_password, args.ssh_port,
+                                       compress=True)
+    name = args.ssh_host if args.ssh_port == 22 else f"{args.ssh_host}_{args.ssh_port}"
+    collect_from(installer, os.path.join(args.out, name), journal=not args.no_journal)
+
+
+if __name__ == "__main__":
+    main()
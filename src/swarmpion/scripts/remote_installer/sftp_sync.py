@@ -0,0 +1,131 @@
+"""
+Передача файлов на плату по SFTP с пропуском неизменившихся.
+
+Рядом с файлами на плате лежит манифест (относительный путь -> sha256).
+Перед передачей манифест читается, и файлы с совпадающим хешем не
+отправляются. Каждый файл сначала пишется во временный и атомарно
+переименовывается, манифест записывается последним, поэтому прерванная
+передача при повторе просто продолжается.
+"""
+import hashlib
+import json
+import os
+import posixpath
+from typing import Any, Dict, Iterable, Optional
+
+import paramiko
+
+MANIFEST_NAME = "manifest.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def manifest_digest(files: Dict[str, str]) -> str:
+    """
+    Хеш набора файлов целиком: меняется при изменении любого файла.
+    """
+    return hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+
+
+def collect_files(root: str, exclude: Iterable[str] = (MANIFEST_NAME,)) -> Dict[str, str]:
+    """
+    Файлы каталога: относительный путь в формате posix -> локальный путь.
+    """
+    exclude = set(exclude)
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, "/")
+            if relative not in exclude:
+                files[relative] = path
+    return files
+
+
+def sftp_makedirs(sftp: paramiko.SFTPClient, path: str) -> None:
+    """
+    Аналог mkdir -p через SFTP.
+    """
+    parts = [part for part in path.split("/") if part]
+    current = "/" if path.startswith("/") else ""
+    for part in parts:
+        current = posixpath.join(current, part) if current else part
+        try:
+            sftp.stat(current)
+        except IOError:
+            sftp.mkdir(current)
+
+
+def read_remote_json(sftp: paramiko.SFTPClient, path: str) -> Optional[Any]:
+    try:
+        with sftp.open(path, "r") as file:
+            return json.loads(file.read())
+    except (IOError, ValueError):
+        return None
+
+
+def write_remote_bytes(sftp: paramiko.SFTPClient, path: str, data: bytes) -> None:
+    temporary = path + ".part"
+    with sftp.open(temporary, "w") as file:
+        file.write(data)
+    sftp.posix_rename(temporary, path)
+
+
+def write_remote_json(sftp: paramiko.SFTPClient, path: str, data: Any) -> None:
+    write_remote_bytes(sftp, path, json.dumps(data, indent=1, sort_keys=True).encode())
+
+
+def push_files(sftp: paramiko.SFTPClient,
+               files: Dict[str, str],
+               remote_dir: str,
+               manifest_name: str = MANIFEST_NAME,
+               delete: bool = True,
+               extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Синхронизирует remote_dir с набором локальных файлов.
+
+    :param sftp: SFTP-клиент открытого соединения
+    :param files: Относительный путь -> локальный путь
+    :param remote_dir: Каталог на плате; относительный путь считается от домашнего каталога
+    :param manifest_name: Имя файла манифеста в remote_dir
+    :param delete: Удалять файлы, которых нет в новом наборе
+    :param extra: Дополнительные поля манифеста
+    :return: Статистика: uploaded, skipped, removed, bytes, digest
+    """
+    local = {relative: file_sha256(path) for relative, path in files.items()}
+    manifest_path = posixpath.join(remote_dir, manifest_name)
+    previous = read_remote_json(sftp, manifest_path) or {}
+    remote = previous.get("files", {})
+    stats = {"uploaded": 0, "skipped": 0, "removed": 0, "bytes": 0}
+    sftp_makedirs(sftp, remote_dir)
+    created = set()
+    for relative, digest in sorted(local.items()):
+        if remote.get(relative) == digest:
+            stats["skipped"] += 1
+            continue
+        target = posixpath.join(remote_dir, relative)
+        directory = posixpath.dirname(target)
+        if directory not in created:
+            sftp_makedirs(sftp, directory)
+            created.add(directory)
+        sftp.put(files[relative], target + ".part")
+        sftp.posix_rename(target + ".part", target)
+        stats["uploaded"] += 1
+        stats["bytes"] += os.path.getsize(files[relative])
+    if delete:
+        for relative in sorted(set(remote) - set(local)):
+            try:
+                sftp.remove(posixpath.join(remote_dir, relative))
+            except IOError:
+                pass
+            stats["removed"] += 1
+    stats["digest"] = manifest_digest(local)
+    manifest = dict(extra or {}, files=local, digest=stats["digest"])
+    write_remote_json(sftp, manifest_path, manifest)
+    return stats
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Локальная замена SSH-серверов плат для проверки установщиков без железа.
+
+Поднимает несколько SSH-серверов paramiko на loopback (один порт — одна
+«плата»). Любой пароль принимается, команды не выполняются: каждая
+отвечает кодом 0 после задержки, часть команд может завершаться ошибкой
+для проверки повторов. Полученные команды сохраняются в StandInHost.commands.
+SFTP работает по-настоящему: домашний каталог каждой «платы» — подкаталог
+--root с номером порта.
+
+Пример:
+    python ssh_standin.py --count 20 --base_port 2200 --fail_rate 0.02 --inventory fleet_test.txt
+    python fleet.py --inventory fleet_test.txt --install --retry_delay 0
+"""
+import argparse
+import os
+import random
+import socket
+import struct
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import paramiko
+from paramiko.common import cMSG_CHANNEL_SUCCESS
+
+
+class StandInServer(paramiko.ServerInterface):
+    """
+    Обработчик SSH-сессии: принимает любой пароль и отвечает на exec.
+    """
+
+    def __init__(self, host: "StandInHost") -> None:
+        self.host = host
+        # Команды, ответ на которые ждёт подтверждения exec (см. StandInTransport)
+        self.pending: Dict[int, Tuple[paramiko.Channel, str]] = {}
+
+    def get_allowed_auths(self, username: str) -> str:
+        return "password"
+
+    def check_auth_password(self, username: str, password: str) -> int:
+        return paramiko.AUTH_SUCCESSFUL
+
+    def check_channel_request(self, kind: str, chanid: int) -> int:
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel: paramiko.Channel, command: bytes) -> bool:
+        self.pending[channel.remote_chanid] = (channel, command.decode(errors="ignore"))
+        return True
+
+    def exec_confirmed(self, remote_chanid: int) -> None:
+        pending = self.pending.pop(remote_chanid, None)
+        if pending is not None:
+            threading.Thread(target=self.host.respond, args=pending, daemon=True).start()
+
+
+class StandInTransport(paramiko.Transport):
+    """
+    Transport, запускающий ответ на команду только после подтверждения exec.
+
+    Иначе при малой задержке код завершения и закрытие канала могут уйти
+    клиенту раньше подтверждения, и exec_command клиента падает с Channel closed.
+    """
+
+    def _send_user_message(self, data) -> None:
+        super()._send_user_message(data)
+        packet = data.asbytes()
+        if packet[0:1] == cMSG_CHANNEL_SUCCESS and self.server_object is not None:
+            self.server_object.exec_confirmed(struct.unpack(">I", packet[1:5])[0])
+
+
+class StandInSFTP(paramiko.SFTPServerInterface):
+    """
+    SFTP поверх локального каталога «платы».
+    """
+
+    def __init__(self, server: StandInServer, *args, **kwargs) -> None:
+        super().__init__(server, *args, **kwargs)
+        self.root = server.host.root
+
+    def _local(self, path: str) -> str:
+        path = os.path.normpath("/" + path).lstrip("/")
+        return os.path.join(self.root, path)
+
+    def _attributes(self, path: str, filename: Optional[str] = None):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path), filename)
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+    def canonicalize(self, path: str) -> str:
+        return "/" + os.path.normpath("/" + path).lstrip("/")
+
+    def list_folder(self, path: str):
+        local = self._local(path)
+        try:
+            return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(local, name)), name)
+                    for name in os.listdir(local)]
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+
+    def stat(self, path: str):
+        return self._attributes(self._local(path))
+
+    lstat = stat
+
+    def open(self, path: str, flags: int, attr: paramiko.SFTPAttributes):
+        local = self._local(path)
+        try:
+            descriptor = os.open(local, flags | getattr(os, "O_BINARY", 0), 0o644)
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        if flags & os.O_WRONLY:
+            mode = "ab" if flags & os.O_APPEND else "wb"
+        elif flags & os.O_RDWR:
+            mode = "a+b" if flags & os.O_APPEND else "r+b"
+        else:
+            mode = "rb"
+        handle = paramiko.SFTPHandle(flags)
+        handle.filename = local
+        handle.readfile = handle.writefile = os.fdopen(descriptor, mode)
+        return handle
+
+    def _call(self, function, *paths: str) -> int:
+        try:
+            function(*(self._local(path) for path in paths))
+        except OSError as error:
+            return paramiko.SFTPServer.convert_errno(error.errno)
+        return paramiko.SFTP_OK
+
+    def remove(self, path: str) -> int:
+        return self._call(os.remove, path)
+
+    def rename(self, oldpath: str, newpath: str) -> int:
+        return self._call(os.replace, oldpath, newpath)
+
+    def posix_rename(self, oldpath: str, newpath: str) -> int:
+        return self._call(os.replace, oldpath, newpath)
+
+    def mkdir(self, path: str, attr: paramiko.SFTPAttributes) -> int:
+        return self._call(os.mkdir, path)
+
+    def rmdir(self, path: str) -> int:
+        return self._call(os.rmdir, path)
+
+    def chattr(self, path: str, attr: paramiko.SFTPAttributes) -> int:
+        return paramiko.SFTP_OK
+
+
+class StandInHost:
+    """
+    Одна «плата»: SSH-сервер на своём порту.
+    """
+
+    def __init__(self,
+                 port: int,
+                 host_key: paramiko.PKey,
+                 latency: float = 0.05,
+                 fail_rate: float = 0.0,
+                 seed: Optional[int] = None,
+                 root: Optional[str] = None) -> None:
+        """
+        :param port: Порт на 127.0.0.1, 0 — выбрать свободный
+        :param host_key: Ключ сервера
+        :param latency: Время выполнения каждой команды (в секундах)
+        :param fail_rate: Вероятность, что команда завершится с кодом 1
+        :param seed: Зерно генератора отказов
+        :param root: Каталог, в котором создаётся домашний каталог «платы»
+        """
+        self.host_key = host_key
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.commands: List[str] = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", port))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        self.root = os.path.join(root or tempfile.gettempdir(), f"standin_{self.port}")
+        os.makedirs(self.root, exist_ok=True)
+        self.running = False
+        self.transports: List[paramiko.Transport] = []
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.running = True
+        self.thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """
+        Закрывает сокет и SSH-сессии и дожидается их потоков.
+        """
+        self.running = False
+        # close() не будит поток, ждущий в accept(), shutdown() — будит
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+        if self.thread is not None:
+            self.thread.join()
+        for transport in self.transports:
+            transport.close()
+            transport.join()
+
+    def _accept_loop(self) -> None:
+        while self.running:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                break
+            transport = StandInTransport(client)
+            transport.add_server_key(self.host_key)
+            transport.use_compression(True)
+            transport.set_subsystem_handler("sftp", paramiko.SFTPServer, StandInSFTP)
+            self.transports.append(transport)
+            try:
+                transport.start_server(server=StandInServer(self))
+            except (paramiko.SSHException, EOFError):
+                transport.close()
+
+    def respond(self, channel: paramiko.Channel, command: str) -> None:
+        self.commands.append(command)
+        time.sleep(self.latency)
+        try:
+            if self.random.random() < self.fail_rate:
+                channel.sendall_stderr(b"stand-in: simulated failure\n")
+                channel.send_exit_status(1)
+            else:
+                channel.send_exit_status(0)
+        finally:
+            channel.close()
+
+
+def start_hosts(count: int,
+                base_port: int = 0,
+                latency: float = 0.05,
+                fail_rate: float = 0.0,
+                seed: int = 0,
+                root: Optional[str] = None) -> List[StandInHost]:
+    """
+    Запускает count серверов на портах base_port, base_port + 1, ...
+
+    :param base_port: Первый порт, 0 — свободные порты
+    :return: Запущенные серверы
+    """
+    host_key = paramiko.RSAKey.generate(2048)
+    hosts = []
+    for i in range(count):
+        host = StandInHost(base_port + i if base_port else 0, host_key,
+                           latency=latency, fail_rate=fail_rate, seed=seed + i, root=root)
+        host.start()
+        hosts.append(host)
+    return hosts
+
+
+def write_inventory(path: str, hosts: List[StandInHost], kind: str = "pi") -> None:
+    with open(path, "w", encoding="utf-8") as inventory:
+        inventory.write("# SSH stand-in, см. ssh_standin.py\n")
+        for host in hosts:
+            inventory.write(f"127.0.0.1:{host.port} pi raspberry {kind}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальные SSH-серверы для проверки установщиков")
+    parser.add_argument("--count", type=int, default=10, help="Количество «плат»")
+    parser.add_argument("--base_port", type=int, default=2200, help="Первый порт")
+    parser.add_argument("--latency", type=float, default=0.05, help="Время выполнения команды, с")
+    parser.add_argument("--fail_rate", type=float, default=0.0, help="Доля команд с ошибкой")
+    parser.add_argument("--kind", default="pi", choices=("pi", "radxa"), help="Тип платы в инвентаре")
+    parser.add_argument("--inventory", default=None, help="Записать файл инвентаря для fleet.py")
+    parser.add_argument("--root", default=None, help="Каталог домашних каталогов «плат», по умолчанию временный")
+    args = parser.parse_args()
+
+    hosts = start_hosts(args.count, args.base_port, args.latency, args.fail_rate, root=args.root)
+    if args.inventory:
+        write_inventory(args.inventory, hosts, args.kind)
+        print(f"Инвентарь записан в {args.inventory}")
+    print(f"Запущено {len(hosts)} SSH-серверов на портах {hosts[0].port}..{hosts[-1].port}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"Команд получено: {sum(len(host.commands) for host in hosts)}")
+    except KeyboardInterrupt:
+        for host in hosts:
+            host.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Офлайн-набор колёс (wheelhouse) для установки зависимостей на плату.
+
+Набор собирается один раз на машине оператора: pion собирается в колесо
+из git, остальные зависимости скачиваются готовыми колёсами под платформу
+платы. На плату набор передаётся по SFTP (неизменившиеся файлы
+пропускаются по sha256), и pip ставит пакеты с --no-index, без доступа в
+интернет. Если набор не менялся с прошлой установки, pip не запускается.
+
+Сборка для Raspberry Pi Zero 2W (64-битная ОС, Python 3.11):
+    python wheelhouse.py --out wheelhouse --python_version 3.11 \\
+        --platform manylinux2014_aarch64 --platform linux_aarch64
+
+Установка:
+    python installer.py --ssh_host ... --install --wheelhouse wheelhouse
+    python fleet.py --inventory drones.txt --install --wheelhouse wheelhouse
+"""
+import argparse
+import json
+import os
+import posixpath
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, Iterable, List, Optional
+
+from sftp_sync import (MANIFEST_NAME, collect_files, file_sha256, manifest_digest, push_files,
+                       read_remote_json, write_remote_json)
+
+PION_REQUIREMENT = "pionsdk @ git+https://github.com/OnisOris/pion@dev"
+REQUIREMENTS_NAME = "requirements.txt"
+INSTALLED_NAME = "installed.json"
+DEFAULT_REQUIREMENTS = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                     "..", "..", "..", "..", "requirements.txt"))
+
+
+def read_requirements(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.lstrip().startswith("#")]
+
+
+def wheel_name(filename: str) -> str:
+    return filename.split("-")[0].replace("_", "-").lower()
+
+
+def build_wheelhouse(out_dir: str,
+                     requirements: Iterable[str],
+                     build: Iterable[str] = (PION_REQUIREMENT,),
+                     platforms: Iterable[str] = (),
+                     python_version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Собирает набор колёс в out_dir.
+
+    :param out_dir: Каталог набора
+    :param requirements: Зависимости, которые скачиваются готовыми колёсами
+    :param build: Зависимости, которые собираются в колёса локально (git-ссылки)
+    :param platforms: Платформы платы для pip download, пусто — текущая машина
+    :param python_version: Версия Python на плате, например 3.11
+    :return: Манифест набора
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    requirements = list(requirements)
+    platforms = list(platforms)
+    with tempfile.TemporaryDirectory() as build_dir:
+        for spec in build:
+            subprocess.run([sys.executable, "-m", "pip", "wheel", "--no-deps", "-w", build_dir, spec],
+                           check=True)
+        built = sorted(os.listdir(build_dir))
+        for filename in built:
+            shutil.move(os.path.join(build_dir, filename), os.path.join(out_dir, filename))
+    for filename in built:
+        if platforms and not filename.endswith("-none-any.whl"):
+            print(f"Внимание: {filename} собран под текущую машину, а не под {platforms}")
+
+    target = []
+    for platform in platforms:
+        target += ["--platform", platform]
+    if python_version:
+        target += ["--python-version", python_version]
+    if target:
+        # Для чужой платформы pip скачивает только готовые колёса
+        target += ["--only-binary=:all:"]
+    built_paths = [os.path.join(out_dir, filename) for filename in built]
+    subprocess.run([sys.executable, "-m", "pip", "download", "-d", out_dir, *target,
+                    *requirements, *built_paths], check=True)
+
+    names = sorted({wheel_name(filename) for filename in built})
+    with open(os.path.join(out_dir, REQUIREMENTS_NAME), "w", encoding="utf-8") as file:
+        file.write("\n".join(dict.fromkeys(requirements + names)) + "\n")
+    files = collect_files(out_dir)
+    manifest = {"files": {relative: file_sha256(path) for relative, path in files.items()},
+                "platforms": platforms,
+                "python_version": python_version}
+    manifest["digest"] = manifest_digest(manifest["files"])
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    return manifest
+
+
+def deploy_wheelhouse(installer: Any,
+                      local_dir: str,
+                      remote_dir: str = "code/sPion/wheelhouse",
+                      venv_dir: str = "code/sPion/.venv") -> Dict[str, Any]:
+    """
+    Передаёт набор на плату и ставит его в виртуальное окружение без интернета.
+
+    :param installer: Подключённый установщик (RemoteServiceInstaller или RadxaInstaller)
+    :param local_dir: Локальный каталог набора
+    :param remote_dir: Каталог набора на плате относительно домашнего
+    :param venv_dir: Виртуальное окружение на плате относительно домашнего
+    :return: Статистика передачи и флаг installed
+    """
+    sftp = installer.ssh.open_sftp()
+    try:
+        stats = push_files(sftp, collect_files(local_dir), remote_dir)
+        print(f"Набор колёс: передано {stats['uploaded']} ({stats['bytes'] / 1e6:.1f} МБ), "
+              f"пропущено {stats['skipped']}, удалено {stats['removed']}")
+        installed_path = posixpath.join(remote_dir, INSTALLED_NAME)
+        installed = read_remote_json(sftp, installed_path) or {}
+        if installed.get("digest") == stats["digest"]:
+            print("Набор колёс уже установлен, pip не запускается")
+            stats["installed"] = False
+            return stats
+        install_cmd = (f"cd ~ && (test -x {venv_dir}/bin/python3 || python3 -m venv {venv_dir}) && "
+                       f"{venv_dir}/bin/python3 -m pip install --no-index --find-links {remote_dir} "
+                       f"-r {remote_dir}/{REQUIREMENTS_NAME}")
+        exit_code, _, _ = installer.exec_command(install_cmd, timeout=600)
+        if exit_code != 0:
+            raise RuntimeError("Ошибка установки зависимостей из набора колёс")
+        write_remote_json(sftp, installed_path, {"digest": stats["digest"]})
+        stats["installed"] = True
+        return stats
+    finally:
+        sftp.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сборка офлайн-набора колёс для плат")
+    parser.add_argument("--out", default="wheelhouse", help="Каталог набора")
+    parser.add_argument("--requirements", default=DEFAULT_REQUIREMENTS, help="Файл зависимостей")
+    parser.add_argument("--build", action="append", default=None,
+                        help=f"Собрать колесо локально (можно несколько), по умолчанию {PION_REQUIREMENT!r}")
+    parser.add_argument("--platform", action="append", default=[],
+                        help="Платформа платы для pip download, например manylinux2014_aarch64")
+    parser.add_argument("--python_version", default=None, help="Версия Python на плате, например 3.11")
+    args = parser.parse_args()
+
+    manifest = build_wheelhouse(args.out,
+                                read_requirements(args.requirements),
+                                build=args.build if args.build is not None else (PION_REQUIREMENT,),
+                                platforms=args.platform,
+                                python_version=args.python_version)
+    print(f"Набор колёс в {args.out}: {len(manifest['files'])} файлов, версия {manifest['digest'][:12]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Профиль холодного старта сервиса.
+
+Время измеряется от загрузки ОС (CLOCK_BOOTTIME), поэтому видно, сколько
+занимают загрузка системы, запуск интерпретатора, импорты, инициализация и
+путь до первой широковещательной рассылки.
+
+Режим профилирования включается переменной окружения до запуска:
+    SPION_PROFILE_STARTUP=1 python main_radxa.py
+В этом режиме модуль подменяет __import__ и считает время импорта каждого
+пакета верхнего уровня, поэтому его нужно импортировать первым. Фазы и
+отметки записываются всегда — это дешево, — а время от загрузки до первой
+рассылки печатается при каждом запуске.
+"""
+import builtins
+import contextlib
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ENV_FLAG = "SPION_PROFILE_STARTUP"
+
+
+def seconds_since_boot() -> float:
+    try:
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    except (AttributeError, OSError):
+        with open("/proc/uptime") as uptime:
+            return float(uptime.read().split()[0])
+
+
+def process_start_since_boot() -> Optional[float]:
+    """
+    Момент запуска текущего процесса в секундах от загрузки ОС (Linux).
+    """
+    try:
+        with open("/proc/self/stat") as stat:
+            fields = stat.read().rpartition(")")[2].split()
+        # Поле 22 (starttime) в тиках; после ")" поля нумеруются с 3-го
+        return int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupProfiler:
+    """
+    Фазы запуска, время импортов и отметки событий от загрузки ОС.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self.process_start = process_start_since_boot()
+        self.created = seconds_since_boot()
+        self.imports: Dict[str, float] = {}
+        self.phases: List[Tuple[str, float]] = []
+        self.marks: Dict[str, float] = {}
+        self._original_import = None
+        self._main_thread = threading.main_thread()
+        self._depth = 0
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark(self, name: str) -> None:
+        """
+        Запоминает первое наступление события.
+        """
+        if name not in self.marks:
+            self.marks[name] = seconds_since_boot()
+
+    def mark_on_call(self, obj: Any, method: str, name: str) -> None:
+        """
+        Отмечает событие name при первом вызове метода и возвращает исходный метод.
+        """
+        original = getattr(obj, method)
+
+        def first_call(*args, **kwargs):
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.mark(name)
+                setattr(obj, method, original)
+
+        setattr(obj, method, first_call)
+
+    def install_import_hook(self) -> None:
+        """
+        Считает время импорта новых пакетов верхнего уровня в главном потоке.
+        """
+        if self._original_import is not None:
+            return
+        original = self._original_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if (level or self._depth or name in sys.modules
+                    or threading.current_thread() is not self._main_thread):
+                return original(name, globals, locals, fromlist, level)
+            self._depth += 1
+            started = time.perf_counter()
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                package = name.partition(".")[0]
+                self.imports[package] = self.imports.get(package, 0.0) + time.perf_counter() - started
+
+        builtins.__import__ = timed_import
+
+    def uninstall_import_hook(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def first_broadcast_summary(self) -> str:
+        at = self.marks.get("first_broadcast")
+        if at is None:
+            return "Первой рассылки ещё не было"
+        since_start = f", {at - self.process_start:.2f} с после старта процесса" \
+            if self.process_start is not None else ""
+        return f"Первая рассылка через {at:.2f} с после загрузки ОС{since_start}"
+
+    def report(self) -> str:
+        """
+        Таблица фаз запуска.
+        """
+        lines = ["Профиль запуска:"]
+        if self.process_start is not None:
+            lines.append(f"  {'загрузка ОС -> старт процесса':40s} {self.process_start:8.3f} с")
+            lines.append(f"  {'старт процесса -> startup_profile':40s} {self.created - self.process_start:8.3f} с")
+        for package, seconds in sorted(self.imports.items(), key=lambda item: -item[1]):
+            if seconds >= 0.001:
+                lines.append(f"  {'импорт ' + package:40s} {seconds:8.3f} с")
+        for name, seconds in self.phases:
+            lines.append(f"  {name:40s} {seconds:8.3f} с")
+        for name, at in sorted(self.marks.items(), key=lambda item: item[1]):
+            lines.append(f"  {'отметка ' + name:40s} {at - self.created:8.3f} с от startup_profile")
+        lines.append(self.first_broadcast_summary())
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler(enabled=os.environ.get(ENV_FLAG) == "1")
+if profiler.enabled:
+    profiler.install_import_hook()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Запись входа Swarmc для воспроизведения (swarm_replay.py).
+
+В файл последовательно пишутся записи: заголовок записи (вид, длина,
+время по монотонным часам Swarmc) и тело. Записываются все датаграммы,
+дошедшие до process_incoming_state (бинарные — как пришли, protobuf —
+повторно сериализованными), и каждый такт update_swarm_control: состояние
+объекта управления, цель, dt, выданная команда и длительность такта.
+Первая запись — конфигурация Swarmc в JSON, по ней воспроизведение
+собирает такой же Swarmc без дрона и сети.
+
+Такт занимает 147 байт, пакет соседа — 59 байт: минута полёта с тактом
+20 Гц и десятью соседями на 10 Гц — около 0.5 МБ. Запись буферизована
+и не делает системных вызовов на каждом такте.
+
+Запись на борту и сводка по файлу:
+    SPION_CAPTURE=capture.bin python main_radxa.py
+    python swarm_capture.py capture.bin
+"""
+import argparse
+import json
+import struct
+import threading
+import time
+from typing import Any, Iterator, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"SPCP"
+VERSION = 1
+# magic, версия, время создания
+HEADER = struct.Struct("<4sHd")
+# вид, длина тела, время по часам Swarmc
+RECORD = struct.Struct("<BHd")
+
+KIND_CONFIG = 0
+KIND_BINARY = 1
+KIND_PROTOBUF = 2
+KIND_TICK = 3
+# Начало слежения за точкой: новый ПИД и сброс роевой составляющей
+KIND_SESSION = 4
+
+TICK_DTYPE = np.dtype([
+    ("wall_time", "<f8"),     # wall_clock() такта
+    ("dt", "<f8"),
+    ("position", "<f8", (6,)),  # control_object.position: x, y, z, vx, vy, vz
+    ("target", "<f8", (4,)),    # target_point: x, y, z, yaw
+    ("t_speed", "<f8", (4,)),   # выданная команда vx, vy, vz, yaw_rate
+    ("duration", "<f8"),      # длительность такта (с)
+])
+TICK_SIZE = TICK_DTYPE.itemsize
+
+
+def _encode_config(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return {"ndarray": value.tolist(), "shape": list(value.shape), "dtype": value.dtype.str}
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Не сериализуется в конфигурацию записи: {type(value).__name__}")
+
+
+def _decode_config(value: dict) -> Any:
+    if "ndarray" in value:
+        return np.array(value["ndarray"], dtype=value["dtype"]).reshape(value["shape"])
+    return value
+
+
+class CaptureRecorder:
+    """
+    Запись датаграмм и тактов Swarmc в файл.
+
+    Методы вызываются из потоков приёма и такта, запись идёт под блокировкой.
+    """
+
+    def __init__(self, path: str, config: dict, buffering: int = 1 << 16) -> None:
+        """
+        :param path: Путь к файлу; существующий файл перезаписывается
+        :param config: Конфигурация Swarmc (см. Swarmc.capture_config)
+        :param buffering: Размер буфера записи в байтах
+        """
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._tick = np.zeros((), dtype=TICK_DTYPE)
+        self._file = open(path, "wb", buffering=buffering)
+        self._file.write(HEADER.pack(MAGIC, VERSION, time.time()))
+        self._write(KIND_CONFIG, 0.0, json.dumps(config, default=_encode_config).encode())
+
+    def _write(self, kind: int, timestamp: float, body: bytes) -> None:
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(RECORD.pack(kind, len(body), timestamp))
+            self._file.write(body)
+            self.records += 1
+
+    def datagram(self, timestamp: float, payload: bytes, kind: int = KIND_BINARY) -> None:
+        """
+        :param timestamp: Время приёма по часам Swarmc
+        :param payload: Пакет состояния или сериализованная датаграмма protobuf
+        :param kind: KIND_BINARY или KIND_PROTOBUF
+        """
+        self._write(kind, timestamp, payload)
+
+    def session(self, timestamp: float) -> None:
+        self._write(KIND_SESSION, timestamp, b"")
+
+    def tick(self,
+             timestamp: float,
+             wall_time: float,
+             dt: float,
+             position: np.ndarray,
+             target: np.ndarray,
+             t_speed: np.ndarray,
+             duration: float) -> None:
+        """
+        Записывает такт. Позиция и цель короче полной длины дополняются нулями.
+        """
+        tick = self._tick
+        tick["wall_time"] = wall_time
+        tick["dt"] = dt
+        tick["position"] = 0.0
+        tick["position"][0:len(position)] = position[0:6]
+        tick["target"] = 0.0
+        tick["target"][0:len(target)] = target[0:4]
+        tick["t_speed"] = t_speed
+        tick["duration"] = duration
+        self._write(KIND_TICK, timestamp, tick.tobytes())
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def read_records(path: str) -> Iterator[Tuple[int, float, bytes]]:
+    """
+    Записи файла в порядке записи: (вид, время, тело).
+
+    Оборванная последняя запись (файл не закрыт при отключении питания) пропускается.
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path}: не запись sPion")
+    magic, version, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: не запись sPion версии {VERSION}")
+    offset = HEADER.size
+    while offset + RECORD.size <= len(data):
+        kind, length, timestamp = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if offset + length > len(data):
+            return
+        yield kind, timestamp, data[offset:offset + length]
+        offset += length
+
+
+class Capture:
+    """
+    Загруженная запись: конфигурация, события по времени и такты.
+
+    events — список (время, вид, тело) всех записей, кроме конфигурации,
+    упорядоченный по времени (порядок записи сохраняется при равном времени);
+    ticks — такты по TICK_DTYPE, tick_time — их время по часам Swarmc.
+    """
+
+    def __init__(self, config: dict, events: list) -> None:
+        self.config = config
+        self.events = sorted(events, key=lambda event: event[0])
+        bodies = [body for _, kind, body in self.events if kind == KIND_TICK]
+        self.ticks = np.frombuffer(b"".join(bodies), dtype=TICK_DTYPE)
+        self.tick_time = np.array([timestamp for timestamp, kind, _ in self.events if kind == KIND_TICK])
+
+    def count(self, kind: int) -> int:
+        return sum(1 for _, event_kind, _ in self.events if event_kind == kind)
+
+    @property
+    def duration(self) -> float:
+        return self.events[-1][0] - self.events[0][0] if self.events else 0.0
+
+
+def load_capture(path: str) -> Capture:
+    config: Optional[dict] = None
+    events = []
+    for kind, timestamp, body in read_records(path):
+        if kind == KIND_CONFIG:
+            config = json.loads(body, object_hook=_decode_config)
+        else:
+            events.append((timestamp, kind, body))
+    if config is None:
+        raise ValueError(f"{path}: нет конфигурации Swarmc")
+    return Capture(config, events)
+
+
+def summary(capture: Capture) -> str:
+    ticks = capture.ticks
+    if not len(ticks):
+        return f"Тактов нет, датаграмм {capture.count(KIND_BINARY) + capture.count(KIND_PROTOBUF)}"
+    duration_us = ticks["duration"] * 1e6
+    return (f"{capture.duration:.1f} с: тактов {len(ticks)} "
+            f"(p50 {np.median(duration_us):.0f} мкс, p99 {np.quantile(duration_us, 0.99):.0f} мкс), "
+            f"сеансов слежения {capture.count(KIND_SESSION)}, бинарных пакетов {capture.count(KIND_BINARY)}, "
+            f"датаграмм protobuf {capture.count(KIND_PROTOBUF)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сводка записи входа Swarmc")
+    parser.add_argument("path", help="Файл записи")
+    args = parser.parse_args()
+    print(summary(load_capture(args.path)))
+
+
+if __name__ == "__main__":
+    main()
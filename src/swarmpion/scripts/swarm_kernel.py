@@ -0,0 +1,574 @@
+"""
+Векторизованное вычисление роевой составляющей скорости.
+
+Модуль повторяет закон ``pion.functions.compute_swarm_velocity_pid``, но вместо
+обхода соседей по одному работает с упакованными массивами состояний (N, d).
+"""
+import math
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+
+DEFAULT_PARAMS = {
+    "attraction_weight": 1.0,
+    "cohesion_weight": 1.0,
+    "alignment_weight": 1.0,
+    "repulsion_weight": 4.0,
+    "unstable_weight": 1.0,
+    "noise_weight": 1.0,
+    "safety_radius": 1.0,
+    "max_acceleration": 1,
+    "max_speed": 0.4,
+}
+
+def default_position_pid_matrix(d: int = 2) -> np.ndarray:
+    """
+    Коэффициенты ПИД-регулятора позиции Swarmc: строки kp, ki, kd по d осям.
+    """
+    return np.array([[0.05] * d,
+                     [0.0] * d,
+                     [0.7] * d
+                    ], dtype=np.float64)
+
+
+def position_pid_matrix(params: dict, d: int = 2) -> np.ndarray:
+    """
+    Коэффициенты ПИД-регулятора позиции из параметров роя (position_pid_matrix),
+    а без них — default_position_pid_matrix.
+
+    В параметрах допускаются строки kp, ki, kd по осям (3, k >= d) или по одному
+    значению на все оси (3,).
+    """
+    matrix = params.get("position_pid_matrix")
+    if matrix is None:
+        return default_position_pid_matrix(d)
+    matrix = np.asarray(matrix, dtype=np.float64)
+    if matrix.ndim == 1:
+        matrix = matrix[:, None]
+    elif matrix.shape[1] >= d:
+        matrix = matrix[:, 0:d]
+    return np.array(np.broadcast_to(matrix, (3, d)))
+
+
+# Минимальная длина state.data: [id, x, y, z, vx, vy, vz, ...]
+STATE_DATA_LEN = 7
+
+
+def pack_env(env: dict, d: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Упаковывает состояния соседей из env в непрерывные массивы.
+
+    :param env: Словарь состояний соседей, state.data = [id, x, y, z, vx, vy, vz, ...]
+    :type env: dict
+
+    :param d: Размерность пространства
+    :type d: int
+
+    :return: Массивы позиций и скоростей размерности (N, d)
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    # list() снимает копию значений, чтобы поток приёма мог менять env
+    return pack_states(list(env.values()), d)
+
+
+def pack_states(states: Iterable, d: int = 2) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Упаковывает последовательность состояний в массивы позиций и скоростей.
+
+    :param states: Состояния соседей с полем data
+    :type states: Iterable
+
+    :param d: Размерность пространства
+    :type d: int
+
+    :return: Массивы позиций и скоростей размерности (N, d)
+    :rtype: Tuple[np.ndarray, np.ndarray]
+    """
+    rows = [state.data[1:STATE_DATA_LEN] for state in states
+            if len(state.data) >= STATE_DATA_LEN]
+    if not rows:
+        empty = np.empty((0, d), dtype=np.float64)
+        return empty, empty.copy()
+    matrix = np.array(rows, dtype=np.float64)
+    return (np.ascontiguousarray(matrix[:, 0:d]),
+            np.ascontiguousarray(matrix[:, 3:3 + d]))
+
+
+def rotate_xy(vector: np.ndarray, angle: float) -> np.ndarray:
+    """
+    Вращение вектора по часовой стрелке в плоскости xy.
+
+    Использует ту же матрицу, что и ``vector_rotation2`` из pion,
+    остальные компоненты вектора не меняются.
+
+    :param vector: Вектор размерности d >= 2
+    :type vector: np.ndarray
+
+    :param angle: Угол в радианах
+    :type angle: float
+
+    :return: Повернутый вектор
+    :rtype: np.ndarray
+    """
+    matrix_rotation = np.array([[np.cos(angle), np.sin(angle)],
+                                [-np.sin(angle), np.cos(angle)]])
+    rotated = np.array(vector, dtype=np.float64)
+    rotated[0:2] = matrix_rotation.dot(rotated[0:2])
+    return rotated
+
+
+def compute_swarm_velocity_vec(state_vector: np.ndarray,
+                               positions: np.ndarray,
+                               velocities: np.ndarray,
+                               target_point: np.ndarray,
+                               params: Optional[dict] = None) -> np.ndarray:
+    """
+    Векторизованный аналог ``compute_swarm_velocity_pid``.
+
+    Притяжение к цели отрабатывает ПИД-регулятор Swarmc, поэтому здесь, как и в
+    исходной функции, считаются только отталкивание от соседей внутри
+    safety_radius и вектор выведения из равновесия (unstable), после чего
+    результат ограничивается по ускорению и скорости.
+
+    :param state_vector: Вектор состояния дрона [x, y, z, vx, vy, vz]
+    :type state_vector: np.ndarray
+
+    :param positions: Позиции соседей (N, d)
+    :type positions: np.ndarray
+
+    :param velocities: Скорости соседей (N, d)
+    :type velocities: np.ndarray
+
+    :param target_point: Целевая точка размерности d
+    :type target_point: np.ndarray
+
+    :param params: Параметры роя, см. params.py
+    :type params: Optional[dict]
+
+    :return: Вектор скорости размерности d
+    :rtype: np.ndarray
+    """
+    if params is None:
+        params = DEFAULT_PARAMS
+    d = positions.shape[1]
+    current_velocity = np.asarray(state_vector[3:3 + d], dtype=np.float64)
+    interaction = swarm_interaction(state_vector, positions, velocities, target_point, params=params)
+    return limit_swarm_velocity(current_velocity, interaction, params=params)
+
+
+def swarm_interaction(state_vector: np.ndarray,
+                      positions: np.ndarray,
+                      velocities: np.ndarray,
+                      target_point: np.ndarray,
+                      params: Optional[dict] = None) -> np.ndarray:
+    """
+    Взвешенная сумма отталкивания и вектора выведения из равновесия.
+
+    Это часть ``compute_swarm_velocity_vec``, зависящая от соседей; её можно
+    кэшировать между приходами новых данных соседей (см. SwarmTermCache).
+
+    :param state_vector: Вектор состояния дрона [x, y, z, vx, vy, vz]
+    :param positions: Позиции соседей (N, d)
+    :param velocities: Скорости соседей (N, d)
+    :param target_point: Целевая точка размерности d
+    :param params: Параметры роя, см. params.py
+
+    :return: Вектор размерности d
+    :rtype: np.ndarray
+    """
+    if params is None:
+        params = DEFAULT_PARAMS
+    d = positions.shape[1]
+    safety_radius = params["safety_radius"]
+    local_pos = np.asarray(state_vector[0:d], dtype=np.float64)
+    direction = np.asarray(target_point, dtype=np.float64) - local_pos
+    norm_dir = np.linalg.norm(direction)
+
+    distance_vectors = local_pos - positions
+    # В режиме d = 3 дальше закон работает в сжатых по высоте координатах
+    scale = altitude_scale(params, d)
+    if scale != 1.0:
+        distance_vectors[:, 2] *= scale
+    horizon = params.get("conflict_horizon") or 0.0
+    conflict_force = 0.0
+    if horizon > 0 and len(positions):
+        relative_velocities = np.asarray(state_vector[3:3 + d], dtype=np.float64) - velocities
+        if scale != 1.0:
+            relative_velocities[:, 2] *= scale
+        times, misses = closest_approach(distance_vectors, relative_velocities, horizon)
+        miss_distances = np.sqrt(np.einsum("ij,ij->i", misses, misses))
+        # Сосед, который за горизонт не подойдёт ближе safety_radius + 0.1, не
+        # участвует ни в одной составляющей: сейчас он тоже дальше этого радиуса
+        relevant = miss_distances < safety_radius + 0.1
+        positions, velocities, distance_vectors = positions[relevant], velocities[relevant], distance_vectors[relevant]
+        conflict_force = conflict_avoidance(times[relevant], misses[relevant], miss_distances[relevant],
+                                            relative_velocities[relevant], safety_radius, horizon)
+    distances = np.sqrt(np.einsum("ij,ij->i", distance_vectors, distance_vectors))
+
+    # Отталкивание: единичный вектор от соседа / (distance + 1 - safety_radius)^2
+    repulsion_mask = (distances > 0) & (distances < safety_radius)
+    close = distances[repulsion_mask]
+    repulsion_force = (
+        distance_vectors[repulsion_mask]
+        / (close * (close + 1 - safety_radius) ** 2)[:, None]
+    ).sum(axis=0)
+
+    # Вектор выведения из равновесия одинаков для всех подходящих соседей,
+    # поэтому достаточно посчитать их количество
+    unstable_vector = np.zeros(d)
+    if norm_dir > safety_radius + 0.2:
+        speeds = np.sqrt(np.einsum("ij,ij->i", velocities[:, 0:2], velocities[:, 0:2]))
+        count = np.count_nonzero((distances < safety_radius + 0.1) & (speeds <= 0.1))
+        if count:
+            unstable_vector = count * rotate_xy(direction / norm_dir * 0.3, -np.pi / 2)
+
+    return (params["repulsion_weight"] * repulsion_force + params["unstable_weight"] * unstable_vector
+            + params.get("conflict_weight", 1.0) * conflict_force)
+
+
+def closest_approach(offsets: np.ndarray,
+                     relative_velocities: np.ndarray,
+                     horizon: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Время и вектор наибольшего сближения с каждым соседом за одну векторную операцию.
+
+    Движение считается равномерным: смещение от соседа p + v t минимально при
+    t = -(p·v) / |v|², время ограничивается отрезком [0, horizon].
+
+    :param offsets: Смещения дрона от соседей (N, d)
+    :param relative_velocities: Скорость дрона относительно соседей (N, d)
+    :param horizon: Горизонт прогноза (в секундах)
+    :return: Время сближения (N,) и смещение от соседа в этот момент (N, d)
+    """
+    speed_squared = np.einsum("ij,ij->i", relative_velocities, relative_velocities)
+    closing = -np.einsum("ij,ij->i", offsets, relative_velocities)
+    times = np.divide(closing, speed_squared, out=np.zeros_like(closing), where=speed_squared > 1e-12)
+    np.clip(times, 0.0, horizon, out=times)
+    return times, offsets + relative_velocities * times[:, None]
+
+
+def conflict_avoidance(times: np.ndarray,
+                       misses: np.ndarray,
+                       miss_distances: np.ndarray,
+                       relative_velocities: np.ndarray,
+                       safety_radius: float,
+                       horizon: float) -> np.ndarray:
+    """
+    Упреждающее расхождение с соседями, которые подойдут ближе safety_radius
+    в пределах горизонта.
+
+    Дрон смещается вдоль вектора промаха в момент наибольшего сближения; вклад
+    тем больше, чем ближе конфликт по времени и чем глубже проход внутрь
+    safety_radius. При лобовом сближении (промах около нуля) оба дрона
+    уходят вправо от относительной скорости в плоскости xy, а при сближении
+    строго по высоте — назад по вертикали. Соседи уже внутри safety_radius
+    (время 0) обрабатываются отталкиванием.
+
+    :return: Вектор размерности d
+    """
+    conflict = (times > 0) & (miss_distances < safety_radius)
+    if not conflict.any():
+        return np.zeros(misses.shape[1])
+    misses, distances = misses[conflict], miss_distances[conflict]
+    head_on = distances < 1e-6
+    directions = np.divide(misses, distances[:, None], out=np.zeros_like(misses), where=~head_on[:, None])
+    if head_on.any():
+        approach = relative_velocities[conflict][head_on]
+        sideways = np.zeros_like(approach)
+        sideways[:, 0], sideways[:, 1] = approach[:, 1], -approach[:, 0]
+        vertical = np.einsum("ij,ij->i", sideways, sideways) < 1e-12
+        sideways[vertical] = -approach[vertical]
+        directions[head_on] = sideways / np.linalg.norm(sideways, axis=1, keepdims=True).clip(1e-12)
+    weights = (1.0 - times[conflict] / horizon) * (safety_radius - distances) / safety_radius
+    return (directions * weights[:, None]).sum(axis=0)
+
+
+def altitude_scale(params: dict, d: int = 2) -> float:
+    """
+    Множитель вертикальной составляющей расстояний в swarm_interaction.
+
+    В режиме d = 3 зона безопасности — эллипсоид: safety_radius по
+    горизонтали и vertical_safety_radius по высоте (под дроном поток от
+    винтов). Расстояния по z умножаются на safety_radius /
+    vertical_safety_radius, и закон работает со сферой safety_radius.
+    Без vertical_safety_radius и при d < 3 множитель равен 1.
+    """
+    vertical = params.get("vertical_safety_radius")
+    if d < 3 or not vertical:
+        return 1.0
+    return params["safety_radius"] / vertical
+
+
+def interaction_radius(params: dict, speed_limit: float = 0.0, d: int = 2) -> float:
+    """
+    Радиус запроса соседей для swarm_interaction.
+
+    Отталкивание действует внутри safety_radius, вектор выведения из
+    равновесия — внутри safety_radius + 0.1. С прогнозом конфликтов нужны и
+    соседи, которые могут подойти за conflict_horizon при сближении с
+    относительной скоростью до 2 * speed_limit. При d = 3 радиус
+    увеличивается до вертикальной полуоси эллипсоида (см. altitude_scale).
+
+    :param speed_limit: Наибольшая скорость дрона (м/с)
+    :param d: Размерность пространства
+    """
+    radius = max(params["safety_radius"] + 0.1, params.get("unstable_radius", 0.0))
+    horizon = params.get("conflict_horizon") or 0.0
+    if horizon > 0:
+        radius = max(radius, params["safety_radius"] + 2 * speed_limit * horizon)
+    return radius / min(1.0, altitude_scale(params, d))
+
+
+def limit_swarm_velocity(current_velocity: np.ndarray,
+                         interaction: np.ndarray,
+                         params: Optional[dict] = None) -> np.ndarray:
+    """
+    Добавляет взаимодействие с соседями к текущей скорости с ограничением по
+    ускорению и скорости.
+
+    :param current_velocity: Текущая скорость дрона размерности d
+    :param interaction: Результат swarm_interaction
+    :param params: Параметры роя, см. params.py
+
+    :return: Вектор скорости размерности d
+    :rtype: np.ndarray
+    """
+    if params is None:
+        params = DEFAULT_PARAMS
+    # Тот же закон без выделения памяти — ControlBuffers.limit_swarm_velocity
+    new_velocity = current_velocity + interaction
+    # Ограничиваем изменение (акселерацию) до max_acceleration
+    change = new_velocity - current_velocity
+    norm = np.linalg.norm(change)
+    if norm > params["max_acceleration"]:
+        new_velocity = current_velocity + change / norm * params["max_acceleration"]
+    # Ограничиваем скорость до max_speed
+    norm = np.linalg.norm(new_velocity)
+    if norm > params["max_speed"]:
+        new_velocity = new_velocity / norm * params["max_speed"]
+    return new_velocity
+
+
+def control_periods(params: dict, default_period: float) -> Tuple[float, Optional[float]]:
+    """
+    Периоды многочастотного управления из параметров роя.
+
+    control_rate — частота такта ПИД (Гц), по умолчанию 1 / default_period.
+    swarm_rate — наибольшая частота пересчёта роевой составляющей (Гц); если
+    не задана, составляющая пересчитывается на каждом такте, как раньше.
+
+    :return: Период такта ПИД и минимальный период пересчёта роевой составляющей или None
+    """
+    control_rate = params.get("control_rate")
+    swarm_rate = params.get("swarm_rate")
+    control_period = 1.0 / control_rate if control_rate else default_period
+    return control_period, (1.0 / swarm_rate if swarm_rate else None)
+
+
+def swarm_term_max_age(swarm_period: Optional[float], broadcast_interval: float,
+                       max_extrapolation: float = 0.0) -> float:
+    """
+    Наибольший возраст кэша роевой составляющей для SwarmTermCache.
+
+    Без swarm_period составляющая считается на каждом такте. С экстраполяцией
+    соседи движутся и между пакетами, поэтому она пересчитывается каждые
+    swarm_period, иначе — при новых данных и не реже раза в broadcast_interval.
+    """
+    if not swarm_period:
+        return 0.0
+    return swarm_period if max_extrapolation > 0 else max(swarm_period, broadcast_interval)
+
+
+class SwarmTermCache:
+    """
+    Роевая составляющая, которая пересчитывается только при новых данных соседей.
+
+    Соседи рассылают состояние раз в broadcast_interval, а ПИД работает на
+    частоте такта, поэтому между пакетами соседей взаимодействие не
+    меняется. Кэшируется результат swarm_interaction; ограничение по
+    ускорению и скорости применяется на каждом такте к текущей скорости.
+    """
+
+    def __init__(self, min_period: float = 0.0, max_age: float = float("inf")) -> None:
+        """
+        :param min_period: Минимальный интервал между пересчётами (1 / swarm_rate)
+        :param max_age: Пересчёт без новых данных, когда значение старше max_age:
+            собственная позиция дрона за это время меняется
+        """
+        self.min_period = min_period
+        self.max_age = max_age
+        self.value: Optional[np.ndarray] = None
+        self.updated_at = -float("inf")
+        self.updates = 0
+        self.reuses = 0
+        self._dirty = True
+
+    def invalidate(self) -> None:
+        """
+        Отмечает, что данные соседей изменились.
+        """
+        self._dirty = True
+
+    def expired(self, now: float) -> bool:
+        """
+        Нужно ли пересчитать составляющую на этом такте.
+        """
+        age = now - self.updated_at
+        if self.value is None or age >= self.max_age:
+            return True
+        if self._dirty and age >= self.min_period:
+            return True
+        self.reuses += 1
+        return False
+
+    def update(self, value: np.ndarray, now: float) -> None:
+        self.value = value
+        self.updated_at = now
+        self.updates += 1
+        self._dirty = False
+
+    def reset(self) -> None:
+        self.value = None
+        self.updated_at = -float("inf")
+        self._dirty = True
+
+
+class ControlBuffers:
+    """
+    Предвыделенные массивы такта Swarmc размерности d.
+
+    Такт без пересчёта роевой составляющей (многочастотный режим между
+    пакетами соседей) копирует входы в эти массивы через ndarray.take с out
+    (срез state_vector[0:d] тоже создаёт объект) и считает закон ufunc-ами
+    с out, поэтому в установившемся режиме не выделяет память. Ограничения
+    хранятся в 0-мерных массивах: скаляр Python в ufunc превращается во
+    временный массив.
+    """
+
+    def __init__(self, d: int = 2) -> None:
+        self.d = d
+        # BatchPIDController работает со строками (1, d), закон — с векторами d
+        self.target_row = np.zeros((1, d))
+        self.position_row = np.zeros((1, d))
+        self.pid_row = np.zeros((1, d))
+        self.target, self.position, self.pid_signal = self.target_row[0], self.position_row[0], self.pid_row[0]
+        self.velocity = np.zeros(d)
+        # Позиция x, y, z для телеметрии при любом d
+        self.xyz = np.zeros(3)
+        self.swarm_part = np.zeros(d)
+        self.change = np.zeros(d)
+        self.command = np.zeros(d)
+        self.upper, self.lower, self.scale, self.squared = np.zeros(()), np.zeros(()), np.zeros(()), np.zeros(())
+        self._position_index = np.arange(d)
+        self._xyz_index = np.arange(3)
+        self._velocity_index = np.arange(3, 3 + d)
+        # Команда t_speed чередуется между двумя массивами: объект управления
+        # читает из другого потока тот, что был присвоен на прошлом такте
+        self._t_speed = (np.zeros(4), np.zeros(4))
+        self._t_speed_heads = tuple(t_speed[0:d] for t_speed in self._t_speed)
+        self._t_speed_index = 0
+
+    def load(self, state_vector: Any, target_point: Any) -> None:
+        """
+        Копирует позицию и скорость дрона и целевую точку (первые d компонент).
+
+        :param state_vector: Вектор состояния [x, y, z, vx, vy, vz] (np.ndarray)
+        :param target_point: Целевая точка, np.ndarray или последовательность
+        """
+        # mode="clip" пишет сразу в out, "raise" — через временный массив
+        state_vector.take(self._position_index, out=self.position, mode="clip")
+        state_vector.take(self._velocity_index, out=self.velocity, mode="clip")
+        state_vector.take(self._xyz_index, out=self.xyz, mode="clip")
+        if isinstance(target_point, np.ndarray):
+            target_point.take(self._position_index, out=self.target, mode="clip")
+        else:
+            self.target[:] = target_point[0:self.d]
+
+    def clip_pid(self, max_speed: float) -> np.ndarray:
+        """
+        Ограничивает pid_signal по каждой оси: np.clip(pid_signal, -max_speed, max_speed).
+        """
+        self.upper.fill(max_speed)
+        self.lower.fill(-max_speed)
+        np.maximum(self.pid_signal, self.lower, out=self.pid_signal)
+        np.minimum(self.pid_signal, self.upper, out=self.pid_signal)
+        return self.pid_signal
+
+    def limit_swarm_velocity(self, interaction: np.ndarray, params: dict) -> np.ndarray:
+        """
+        limit_swarm_velocity(velocity, interaction) в swarm_part с тем же порядком операций.
+        """
+        new_velocity, change = self.swarm_part, self.change
+        np.add(self.velocity, interaction, out=new_velocity)
+        np.subtract(new_velocity, self.velocity, out=change)
+        norm = self._norm(change)
+        if norm > params["max_acceleration"]:
+            self._scale(change, norm, params["max_acceleration"])
+            np.add(self.velocity, change, out=new_velocity)
+        norm = self._norm(new_velocity)
+        if norm > params["max_speed"]:
+            self._scale(new_velocity, norm, params["max_speed"])
+        return new_velocity
+
+    def _norm(self, vector: np.ndarray) -> float:
+        # Как np.linalg.norm: sqrt(x·x), но скалярное произведение пишется в массив
+        np.dot(vector, vector, out=self.squared)
+        return math.sqrt(self.squared.item())
+
+    def _scale(self, vector: np.ndarray, norm: float, limit: float) -> None:
+        # vector / norm * limit
+        self.scale.fill(norm)
+        np.divide(vector, self.scale, out=vector)
+        self.scale.fill(limit)
+        np.multiply(vector, self.scale, out=vector)
+
+    def t_speed(self) -> np.ndarray:
+        """
+        Команда [vx, vy, vz, yaw_rate] из command; при d = 2 vz = 0.
+        """
+        self._t_speed_index ^= 1
+        np.copyto(self._t_speed_heads[self._t_speed_index], self.command)
+        return self._t_speed[self._t_speed_index]
+
+
+def control_step(buffers: ControlBuffers,
+                 pid_controller: Any,
+                 swarm_term: SwarmTermCache,
+                 state_vector: np.ndarray,
+                 target_point: Any,
+                 dt: float,
+                 now: float,
+                 neighbours: Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]],
+                 max_speed: float,
+                 params: dict) -> np.ndarray:
+    """
+    Такт закона Swarmc: ПИД до target_point плюс роевая составляющая.
+
+    Общий для Swarmc, AsyncSwarmc и swarm_sim.py. Соседи запрашиваются только
+    при пересчёте роевой составляющей (swarm_term.expired); без пересчёта
+    такт не выделяет память.
+
+    :param buffers: Массивы такта дрона
+    :param pid_controller: BatchPIDController позиции на один дрон
+    :param swarm_term: Кэш роевой составляющей дрона
+    :param state_vector: Вектор состояния дрона [x, y, z, vx, vy, vz]
+    :param target_point: Целевая точка (первые d компонент)
+    :param dt: Шаг времени ПИД
+    :param now: Время такта для swarm_term
+    :param neighbours: Позиции и скорости соседей (N, d) по позиции дрона (d,)
+    :param max_speed: Ограничение ПИД-сигнала по каждой оси
+    :param params: Параметры роя, см. params.py
+
+    :return: buffers.command; ПИД-сигнал и роевая составляющая — в
+        buffers.pid_signal и buffers.swarm_part
+    """
+    buffers.load(state_vector, target_point)
+    if swarm_term.expired(now):
+        positions, velocities = neighbours(buffers.position)
+        swarm_term.update(swarm_interaction(state_vector, positions, velocities,
+                                            buffers.target, params=params), now)
+    pid_controller.compute_control(buffers.target_row, buffers.position_row, dt, out=buffers.pid_row)
+    pid_signal = buffers.clip_pid(max_speed)
+    swarm_part = buffers.limit_swarm_velocity(swarm_term.value, params)
+    return np.add(pid_signal, swarm_part, out=buffers.command)
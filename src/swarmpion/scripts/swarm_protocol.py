@@ -0,0 +1,221 @@
+"""
+Компактный бинарный формат широковещательного состояния дрона.
+
+Пакет фиксированной длины (48 байт, little-endian):
+
++--------+-------+------------------------------------------+
+| offset | type  | поле                                     |
++========+=======+==========================================+
+| 0      | u8    | magic (0xA5), отличает пакет от protobuf |
+| 1      | u8    | version                                  |
+| 2      | u8    | flags (FLAG_TRACKING, FLAG_POINT_REACHED)|
+| 3      | u8    | reserved                                 |
+| 4      | u32   | seq — номер пакета                       |
+| 8      | u64   | id — numeric_id отправителя              |
+| 16     | f64   | timestamp — time.time() отправителя      |
+| 24     | 3×f32 | x, y, z                                  |
+| 36     | 3×f32 | vx, vy, vz                               |
++--------+-------+------------------------------------------+
+"""
+import socket
+import struct
+import time
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MAGIC = 0xA5
+VERSION = 1
+
+FLAG_TRACKING = 0x01
+FLAG_POINT_REACHED = 0x02
+
+# Пакет, отставший по seq больше чем на REORDER_WINDOW, не может быть просто
+# переупорядочен сетью: отправитель перезапущен и считает seq заново
+REORDER_WINDOW = 64
+
+STATE_STRUCT = struct.Struct("<BBBBIQd3f3f")
+STATE_SIZE = STATE_STRUCT.size
+
+STATE_DTYPE = np.dtype([
+    ("magic", "u1"),
+    ("version", "u1"),
+    ("flags", "u1"),
+    ("reserved", "u1"),
+    ("seq", "<u4"),
+    ("id", "<u8"),
+    ("timestamp", "<f8"),
+    ("position", "<f4", (3,)),
+    ("velocity", "<f4", (3,)),
+])
+assert STATE_DTYPE.itemsize == STATE_SIZE
+
+
+class BinaryState:
+    """
+    Декодированное состояние соседа.
+
+    Повторяет интерфейс датаграммы, с которой работает SwarmCommunicator:
+    data = [id, x, y, z, vx, vy, vz], команда и адресат пустые.
+    """
+    __slots__ = ("id", "seq", "timestamp", "flags", "data")
+
+    command = 0
+    target_id = ""
+    group_id = 0
+
+    def __init__(self, id: int, seq: int, timestamp: float, flags: int, data: List[float]) -> None:
+        self.id = id
+        self.seq = seq
+        self.timestamp = timestamp
+        self.flags = flags
+        self.data = data
+
+    @property
+    def tracking(self) -> bool:
+        return bool(self.flags & FLAG_TRACKING)
+
+    @property
+    def point_reached(self) -> bool:
+        return bool(self.flags & FLAG_POINT_REACHED)
+
+
+class BinaryStateEncoder:
+    """
+    Кодировщик состояния с собственным счётчиком пакетов.
+
+    Пакет собирается в заранее выделенный буфер.
+    """
+
+    def __init__(self, unique_id: int) -> None:
+        self.unique_id = unique_id
+        self.seq = 0
+        self._buffer = bytearray(STATE_SIZE)
+
+    def encode(self,
+               position: Iterable[float],
+               velocity: Iterable[float],
+               flags: int = 0,
+               timestamp: Optional[float] = None) -> bytes:
+        """
+        Кодирует состояние дрона.
+
+        :param position: Позиция x, y, z
+        :param velocity: Скорость vx, vy, vz
+        :param flags: Битовые флаги слежения
+        :param timestamp: Время отправки, по умолчанию time.time()
+
+        :return: Пакет длиной STATE_SIZE
+        :rtype: bytes
+        """
+        x, y, z = position
+        vx, vy, vz = velocity
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        STATE_STRUCT.pack_into(self._buffer, 0, MAGIC, VERSION, flags, 0, self.seq,
+                               self.unique_id,
+                               time.time() if timestamp is None else timestamp,
+                               x, y, z, vx, vy, vz)
+        return bytes(self._buffer)
+
+
+def seq_newer(seq: int, last: int) -> bool:
+    """
+    seq новее last с учётом переполнения u32.
+    """
+    return 0 < ((seq - last) & 0xFFFFFFFF) < 0x80000000
+
+
+def is_sender_restart(seq: int,
+                      timestamp: Optional[float],
+                      last_seq: int,
+                      last_timestamp: Optional[float]) -> bool:
+    """
+    Пакет с seq не новее принятого пришёл от перезапущенного отправителя:
+    seq отстаёт больше чем на REORDER_WINDOW или метка времени новее принятой.
+    """
+    if ((last_seq - seq) & 0xFFFFFFFF) > REORDER_WINDOW:
+        return True
+    return timestamp is not None and last_timestamp is not None and timestamp > last_timestamp
+
+
+def is_binary_state(payload: bytes) -> bool:
+    """
+    Проверяет, что пакет имеет бинарный формат поддерживаемой версии.
+    """
+    return len(payload) == STATE_SIZE and payload[0] == MAGIC and payload[1] == VERSION
+
+
+def decode_state(payload: bytes) -> Optional[BinaryState]:
+    """
+    Декодирует один пакет.
+
+    :return: Состояние соседа или None, если пакет не в бинарном формате
+    :rtype: Optional[BinaryState]
+    """
+    if not is_binary_state(payload):
+        return None
+    (_, _, flags, _, seq, peer_id, timestamp,
+     x, y, z, vx, vy, vz) = STATE_STRUCT.unpack(payload)
+    return BinaryState(peer_id, seq, timestamp, flags, [float(peer_id), x, y, z, vx, vy, vz])
+
+
+def decode_batch(payloads: Iterable[bytes]) -> np.ndarray:
+    """
+    Декодирует пачку пакетов одним вызовом numpy.frombuffer.
+
+    Пакеты чужого формата или версии отбрасываются.
+
+    :return: Структурированный массив с типом STATE_DTYPE
+    :rtype: np.ndarray
+    """
+    valid = [payload for payload in payloads if is_binary_state(payload)]
+    if not valid:
+        return np.empty(0, dtype=STATE_DTYPE)
+    return np.frombuffer(b"".join(valid), dtype=STATE_DTYPE)
+
+
+def open_broadcast_socket(port: int) -> socket.socket:
+    """
+    Открывает UDP-сокет, принимающий и рассылающий широковещательные пакеты на port.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+    sock.bind(("", port))
+    return sock
+
+
+class BinaryStateChannel:
+    """
+    UDP-канал для бинарных пакетов состояния.
+
+    Слушает порт port и рассылает пакеты широковещательно на него же.
+    """
+
+    def __init__(self, port: int, timeout: float = 0.5) -> None:
+        self.port = port
+        self.socket = open_broadcast_socket(port)
+        self.socket.settimeout(timeout)
+
+    def send(self, payload: bytes) -> None:
+        self.socket.sendto(payload, ("<broadcast>", self.port))
+
+    def update_position(self, position) -> bool:
+        """
+        Широковещательной рассылке позиция не нужна (см. swarm_transport).
+        """
+        return False
+
+    def receive(self) -> Optional[Tuple[bytes, Tuple[str, int]]]:
+        """
+        Ждёт один пакет не дольше timeout.
+
+        :return: Пакет и адрес отправителя, либо None по таймауту
+        """
+        try:
+            return self.socket.recvfrom(4096)
+        except socket.timeout:
+            return None
+
+    def close(self) -> None:
+        self.socket.close()
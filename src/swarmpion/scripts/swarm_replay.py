@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Детерминированное воспроизведение записи входа Swarmc (swarm_capture.py).
+
+По конфигурации из записи собирается Swarmc с объектом управления без
+MAVLink и с подставными часами; сокеты не открываются для приёма (start()
+не вызывается). События записи подаются по порядку: датаграммы — в
+process_incoming_state с временем приёма, такты — в update_swarm_control
+с записанными позицией, целью и dt. Команды из датаграмм protobuf
+пропускаются: их действие на цель уже есть в записанных тактах.
+
+При одной и той же записи и коде команды воспроизведения совпадают бит в бит
+от запуска к запуску, поэтому их можно сравнивать между версиями кода.
+С командами, выданными в полёте, они совпадают с точностью до округления
+разности часов (порядка 1e-7 с в экстраполяции соседей).
+
+    python swarm_replay.py capture.bin                      # как можно быстрее
+    python swarm_replay.py capture.bin --realtime           # в темпе записи
+    python swarm_replay.py capture.bin --save new.npz       # сохранить результат
+    python swarm_replay.py capture.bin --baseline old.npz   # сравнить с другой версией
+"""
+import argparse
+import time
+from typing import Optional
+
+import numpy as np
+
+from swarm_capture import KIND_BINARY, KIND_PROTOBUF, KIND_SESSION, KIND_TICK, Capture, load_capture
+from swarm_protocol import decode_state
+
+try:
+    from swarm_server.datagram_pb2 import Datagram
+except ImportError:  # без swarm_server воспроизводятся только бинарные пакеты
+    Datagram = None
+
+RESULT_FIELDS = ("time", "command", "duration", "recorded_command", "recorded_duration")
+
+
+class ReplayClock:
+    """
+    Подставные часы: монотонное время события и стенное со смещением такта.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.wall_offset = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def wall(self) -> float:
+        return self.now + self.wall_offset
+
+
+class ReplayDrone:
+    """
+    Объект управления без MAVLink: поля Pion, которые читает Swarmc.
+    """
+
+    def __init__(self) -> None:
+        self.name = "replay"
+        self.ip = "127.0.0.1"
+        self.mavlink_port = 0
+        self.position = np.zeros(6)
+        self.attitude = np.zeros(6)
+        self.t_speed = np.zeros(4)
+        self.target_point = np.zeros(4)
+        self.tracking = False
+        self.point_reached = False
+        self.threads = []
+
+    def set_v(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        self.tracking = False
+
+
+def build_swarm(config: dict, clock: ReplayClock, overrides: Optional[dict] = None):
+    """
+    Swarmc по конфигурации записи.
+
+    :param overrides: Параметры роя, заменяющие записанные
+    """
+    from main_radxa import Swarmc
+
+    swarm_params = dict(config["params"], **(overrides or {}))
+    swarm = Swarmc(control_object=ReplayDrone(),
+                   broadcast_port=0,
+                   broadcast_interval=config["broadcast_interval"],
+                   safety_radius=config["safety_radius"],
+                   max_speed=config["max_speed"],
+                   ip="localhost",
+                   time_sleep_update_velocity=config["time_sleep_update_velocity"],
+                   params=swarm_params,
+                   d=config["d"],
+                   peer_ttl=config["peer_ttl"],
+                   peer_capacity=config["peer_capacity"],
+                   clock=clock,
+                   wall_clock=clock.wall)
+    # Свои пакеты Swarmc отбрасывает по numeric_id
+    swarm.numeric_id = config["numeric_id"]
+    return swarm
+
+
+def replay(capture: Capture, realtime: bool = False, speed: float = 1.0,
+           overrides: Optional[dict] = None) -> dict:
+    """
+    Воспроизводит запись.
+
+    :param realtime: Выдерживать интервалы записи (делённые на speed),
+        иначе события подаются без пауз
+    :param overrides: Параметры роя, заменяющие записанные
+
+    :return: time, command (N, 4), duration — такты воспроизведения;
+        recorded_command, recorded_duration — те же такты в записи;
+        datagrams, skipped_commands, invalid — счётчики датаграмм
+    """
+    clock = ReplayClock()
+    swarm = build_swarm(capture.config, clock, overrides)
+    drone = swarm.control_object
+    ticks = capture.ticks
+    command = np.zeros((len(ticks), 4))
+    duration = np.zeros(len(ticks))
+    datagrams = skipped_commands = invalid = 0
+    tick = 0
+    first = capture.events[0][0] if capture.events else 0.0
+    started_at = time.monotonic()
+    try:
+        for timestamp, kind, body in capture.events:
+            if realtime:
+                time.sleep(max(0.0, started_at + (timestamp - first) / speed - time.monotonic()))
+            clock.now = timestamp
+            if kind == KIND_BINARY:
+                state = decode_state(body)
+                if state is None:
+                    invalid += 1
+                    continue
+                swarm.process_incoming_state(state)
+                datagrams += 1
+            elif kind == KIND_PROTOBUF:
+                if Datagram is None:
+                    invalid += 1
+                    continue
+                state = Datagram()
+                state.ParseFromString(body)
+                if state.command:
+                    skipped_commands += 1
+                    continue
+                swarm.process_incoming_state(state)
+                datagrams += 1
+            elif kind == KIND_SESSION:
+                swarm._pid_position_controller = swarm.new_position_controller()
+                swarm.swarm_term.reset()
+            elif kind == KIND_TICK:
+                # Запись могла начаться посреди слежения
+                if swarm._pid_position_controller is None:
+                    swarm._pid_position_controller = swarm.new_position_controller()
+                recorded = ticks[tick]
+                clock.wall_offset = recorded["wall_time"] - timestamp
+                drone.position[:] = recorded["position"]
+                drone.target_point = recorded["target"].copy()
+                tick_started = time.perf_counter()
+                swarm.update_swarm_control(drone.target_point, recorded["dt"])
+                duration[tick] = time.perf_counter() - tick_started
+                command[tick] = drone.t_speed
+                tick += 1
+    finally:
+        swarm.broadcast_client.socket.close()
+        swarm.broadcast_server.socket.close()
+    return {"time": capture.tick_time,
+            "command": command,
+            "duration": duration,
+            "recorded_command": ticks["t_speed"].copy(),
+            "recorded_duration": ticks["duration"].copy(),
+            "datagrams": datagrams,
+            "skipped_commands": skipped_commands,
+            "invalid": invalid}
+
+
+def compare(result: dict, baseline: dict, reference: str = "command") -> dict:
+    """
+    Расхождение команд и времени такта с другим воспроизведением той же записи.
+
+    :param reference: Поле baseline, с которым сравниваются команды:
+        command — команды другой версии, recorded_command — команды из полёта
+
+    :return: max_command_error — наибольшее отклонение команды (м/с),
+        differing_ticks — тактов с отличной командой, p50/p99 длительности
+        такта (мкс) и отношение медиан
+    """
+    if len(result["command"]) != len(baseline[reference]):
+        raise ValueError(f"Разное число тактов: {len(result['command'])} и {len(baseline[reference])}")
+    error = np.abs(result["command"] - baseline[reference]).max(axis=1) if len(result["command"]) else np.zeros(0)
+    duration_key = "recorded_duration" if reference == "recorded_command" else "duration"
+    duration_us, baseline_us = result["duration"] * 1e6, baseline[duration_key] * 1e6
+    return {"max_command_error": float(error.max()) if len(error) else 0.0,
+            "differing_ticks": int(np.count_nonzero(error)),
+            "p50_us": float(np.median(duration_us)),
+            "p99_us": float(np.quantile(duration_us, 0.99)),
+            "baseline_p50_us": float(np.median(baseline_us)),
+            "baseline_p99_us": float(np.quantile(baseline_us, 0.99)),
+            "p50_ratio": float(np.median(duration_us) / np.median(baseline_us))}
+
+
+def report(comparison: dict, name: str) -> str:
+    return (f"{name}: наибольшее отклонение команды {comparison['max_command_error']:.3g} м/с, "
+            f"отличаются {comparison['differing_ticks']} тактов; такт p50 "
+            f"{comparison['baseline_p50_us']:.0f} -> {comparison['p50_us']:.0f} мкс "
+            f"(x{comparison['p50_ratio']:.2f}), p99 {comparison['baseline_p99_us']:.0f} -> "
+            f"{comparison['p99_us']:.0f} мкс")
+
+
+def save_result(path: str, result: dict) -> None:
+    np.savez_compressed(path, **{field: result[field] for field in RESULT_FIELDS})
+
+
+def load_result(path: str) -> dict:
+    with np.load(path) as data:
+        return {field: data[field] for field in RESULT_FIELDS}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение записи входа Swarmc")
+    parser.add_argument("path", help="Файл записи (swarm_capture.py)")
+    parser.add_argument("--realtime", action="store_true", help="Выдерживать интервалы записи")
+    parser.add_argument("--speed", type=float, default=1.0, help="Ускорение в режиме --realtime")
+    parser.add_argument("--save", default=None, help="Сохранить команды и время тактов в .npz")
+    parser.add_argument("--baseline", default=None, help="Сравнить с результатом другой версии (.npz)")
+    args = parser.parse_args()
+
+    capture = load_capture(args.path)
+    started = time.monotonic()
+    result = replay(capture, realtime=args.realtime, speed=args.speed)
+    elapsed = time.monotonic() - started
+    print(f"Воспроизведено {len(result['command'])} тактов и {result['datagrams']} датаграмм "
+          f"за {elapsed:.2f} с (запись {capture.duration:.1f} с); пропущено команд "
+          f"{result['skipped_commands']}, битых пакетов {result['invalid']}")
+    if len(result["command"]):
+        print(report(compare(result, result, reference="recorded_command"), "С полётом"))
+    if args.baseline:
+        print(report(compare(result, load_result(args.baseline)), f"С {args.baseline}"))
+    if args.save:
+        save_result(args.save, result)
+        print(f"Сохранено в {args.save}")
+
+
+if __name__ == "__main__":
+    main()
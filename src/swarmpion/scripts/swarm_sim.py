@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Headless-симулятор роя в одном процессе.
+
+N виртуальных дронов — материальные точки, состояние которых хранится в
+одном массиве numpy (N, 6). Каждый дрон управляется тем же тактом, что и
+Swarmc (swarm_kernel.control_step со своими ControlBuffers, SwarmTermCache
+и ПИД, частоты такта и пересчёта роевой составляющей — control_rate и
+swarm_rate из params), а широковещательный канал заменён шиной в памяти
+без сокетов. Время модельное, поэтому симуляция может идти быстрее
+реального времени.
+
+Рассылка идёт с фиксированным broadcast_interval или адаптивно
+(adaptive_broadcast в params, --adaptive_broadcast). Сводка показывает,
+сколько пакетов сэкономлено относительно фиксированного интервала, и
+наибольшую ошибку позиции дрона, которую видят его соседи (с учётом
+экстраполяции, как у Swarmc).
+
+Запуск: python swarm_sim.py --agents 500 --duration 30
+        python swarm_sim.py --agents 100 --adaptive_broadcast
+"""
+import argparse
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from adaptive_broadcast import adaptive_broadcaster
+from batch_pid import BatchPIDController
+from neighbour_index import UniformGridIndex, min_pair_distance
+from params import params as default_params
+from swarm_kernel import (ControlBuffers, SwarmTermCache, control_periods, control_step, interaction_radius,
+                          position_pid_matrix, swarm_term_max_age)
+
+
+class InMemoryBus:
+    """
+    Широковещательная шина в памяти.
+
+    Все дроны находятся в одном широковещательном домене, поэтому таблица
+    соседей у всех одинакова: шина хранит последнее опубликованное состояние
+    каждого дрона в общем пространственном индексе, а дрон при запросе
+    исключает из ответа себя. Последние опубликованные состояния также
+    хранятся массивами для оценки ошибки, которую видят соседи.
+    """
+
+    def __init__(self, cell_size: float, n_agents: int, d: int = 2, max_extrapolation: float = 0.0,
+                 speed_limit: float = float("inf")) -> None:
+        self.index = UniformGridIndex(cell_size=cell_size, d=d, speed_limit=speed_limit)
+        self.max_extrapolation = max_extrapolation
+        self.positions = np.zeros((n_agents, 3))
+        self.velocities = np.zeros((n_agents, 3))
+        self.sample_time = np.full(n_agents, np.nan)
+        self.packets = 0
+
+    def publish(self, agent_id: int, position: np.ndarray, velocity: np.ndarray, now: float) -> None:
+        self.index.update(agent_id, position, velocity, now)
+        self.positions[agent_id] = position
+        self.velocities[agent_id] = velocity
+        self.sample_time[agent_id] = now
+        self.packets += 1
+
+    def neighbours(self, agent_id: int, position: np.ndarray, radius: float, now: float):
+        return self.index.query(position, radius, exclude=agent_id, at=now, max_age=self.max_extrapolation)
+
+    def believed_positions(self, now: float) -> np.ndarray:
+        """
+        Позиции дронов (N, 3) такими, какими их видят соседи в момент now.
+        """
+        age = np.nan_to_num(np.clip(now - self.sample_time, 0.0, self.max_extrapolation))
+        return self.positions + self.velocities * age[:, None]
+
+
+class SwarmSimulator:
+    """
+    Симулятор роя с точечной динамикой первого порядка по скорости.
+    """
+
+    def __init__(self,
+                 n_agents: int,
+                 params: Optional[dict] = None,
+                 d: int = 2,
+                 control_period: float = 0.1,
+                 broadcast_interval: float = 0.5,
+                 physics_dt: float = 0.02,
+                 velocity_tau: float = 0.3,
+                 max_speed: float = 1.,
+                 spacing: float = 2.,
+                 seed: int = 0) -> None:
+        """
+        :param n_agents: Количество дронов
+        :param params: Параметры роя, см. params.py
+        :param d: Размерность пространства управления
+        :param control_period: Период такта управления (time_sleep_update_velocity),
+            если в params нет control_rate
+        :param broadcast_interval: Интервал рассылки состояния каждым дроном
+        :param physics_dt: Шаг интегрирования динамики
+        :param velocity_tau: Постоянная времени отработки скорости автопилотом
+        :param max_speed: Ограничение ПИД-сигнала, как max_speed у Swarmc
+        :param spacing: Шаг начальной сетки расстановки дронов
+        :param seed: Зерно генератора случайных чисел
+        """
+        self.n_agents = n_agents
+        self.params = default_params if params is None else params
+        self.d = d
+        self.control_period, swarm_period = control_periods(self.params, control_period)
+        self.broadcast_interval = broadcast_interval
+        self.physics_dt = physics_dt
+        self.velocity_tau = velocity_tau
+        self.max_speed = max_speed
+        self.rng = np.random.default_rng(seed)
+        # Наибольшая скорость дрона: ПИД-сигнал плюс роевая составляющая
+        self.interaction_radius = interaction_radius(self.params, max_speed + self.params["max_speed"], d)
+        self.bus = InMemoryBus(cell_size=self.interaction_radius, n_agents=n_agents, d=d,
+                               max_extrapolation=self.params.get("max_extrapolation", 0.0),
+                               speed_limit=max_speed + self.params["max_speed"])
+        self.broadcaster = adaptive_broadcaster(self.params)
+        self.unstable_radius = self.params.get("unstable_radius", self.interaction_radius)
+
+        # Состояние [x, y, z, vx, vy, vz] всех дронов
+        self.state = np.zeros((n_agents, 6))
+        side = int(np.ceil(np.sqrt(n_agents)))
+        grid = np.indices((side, side)).reshape(2, -1).T[:n_agents] * spacing
+        self.state[:, 0:2] = grid + self.rng.uniform(-0.1, 0.1, (n_agents, 2))
+        self.state[:, 2] = 1.0
+        self.targets = self.state[:, 0:d].copy()
+        self.t_speed = np.zeros((n_agents, d))
+        # Такт каждого дрона — как у своего Swarmc
+        pid_matrix = position_pid_matrix(self.params, d)
+        self.pids = [BatchPIDController.from_matrix(pid_matrix, 1) for _ in range(n_agents)]
+        self.buffers = [ControlBuffers(d) for _ in range(n_agents)]
+        max_age = swarm_term_max_age(swarm_period, broadcast_interval, self.bus.max_extrapolation)
+        self.swarm_terms = [SwarmTermCache(min_period=swarm_period or 0.0, max_age=max_age)
+                            for _ in range(n_agents)]
+        self._neighbours = [self._neighbour_query(agent) for agent in range(n_agents)]
+        self._packets_seen = 0
+
+        self.time = 0.0
+        self._next_control = self.control_period
+        # Дроны рассылают состояние с независимыми фазами
+        self._next_broadcast = self.rng.uniform(0, broadcast_interval, n_agents)
+        self._last_broadcast = -self._next_broadcast
+        # Соседи внутри unstable_radius по последнему такту управления
+        self.nearby = np.zeros(n_agents, dtype=np.int64)
+        self.tick_times: List[float] = []
+        self.min_separation_seen = float("inf")
+        self.neighbour_error_max = 0.0
+
+    def set_targets(self, targets: np.ndarray) -> None:
+        """
+        Задаёт целевые точки (N, d) или одну общую точку (d,).
+        """
+        self.targets[:] = targets
+
+    def broadcast(self) -> None:
+        if self.broadcaster is None:
+            due = np.flatnonzero(self._next_broadcast <= self.time)
+            self._next_broadcast[due] += self.broadcast_interval
+        else:
+            speeds = np.linalg.norm(self.state[:, 3:3 + self.d], axis=1)
+            intervals = self.broadcaster.interval(speeds, self.nearby, self.n_agents - 1)
+            due = np.flatnonzero(self._last_broadcast + intervals <= self.time)
+            self._last_broadcast[due] = self.time
+        for agent in due:
+            self.bus.publish(int(agent), self.state[agent, 0:3], self.state[agent, 3:6], self.time)
+
+    def _neighbour_query(self, agent: int) -> Callable[[np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+        """
+        Запрос соседей дрона agent для control_step.
+
+        Заодно считает соседей внутри unstable_radius для адаптивной рассылки.
+        """
+        def neighbours(position: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+            positions, velocities = self.bus.neighbours(agent, position, self.interaction_radius, self.time)
+            offsets = positions - position
+            self.nearby[agent] = np.count_nonzero(
+                np.einsum("ij,ij->i", offsets, offsets) <= self.unstable_radius ** 2)
+            return positions, velocities
+        return neighbours
+
+    def control_tick(self) -> None:
+        """
+        Такт управления всех дронов: control_step, как update_swarm_control у Swarmc.
+        """
+        started = time.perf_counter()
+        # Как Swarmc после refresh_peers: новые пакеты на шине — пересчёт
+        # роевой составляющей, не чаще swarm_rate
+        received = self.bus.packets != self._packets_seen
+        self._packets_seen = self.bus.packets
+        for agent in range(self.n_agents):
+            swarm_term = self.swarm_terms[agent]
+            if received:
+                swarm_term.invalidate()
+            self.t_speed[agent] = control_step(self.buffers[agent], self.pids[agent], swarm_term, self.state[agent],
+                                               self.targets[agent], self.control_period, self.time,
+                                               self._neighbours[agent], self.max_speed, self.params)
+        self.tick_times.append(time.perf_counter() - started)
+        self.min_separation_seen = min(self.min_separation_seen, self.min_separation())
+        self.neighbour_error_max = max(self.neighbour_error_max, self.neighbour_error())
+
+    def neighbour_error(self) -> float:
+        """
+        Наибольшая ошибка позиции дрона в представлении соседей внутри unstable_radius.
+        """
+        watched = (self.nearby > 0) & ~np.isnan(self.bus.sample_time)
+        if not watched.any():
+            return 0.0
+        errors = self.bus.believed_positions(self.time)[watched, 0:self.d] - self.state[watched, 0:self.d]
+        return float(np.sqrt(np.einsum("ij,ij->i", errors, errors)).max())
+
+    def step(self) -> None:
+        """
+        Один шаг модельного времени: рассылка, такт управления, динамика.
+        """
+        self.broadcast()
+        if self.time >= self._next_control:
+            self.control_tick()
+            self._next_control += self.control_period
+        alpha = min(1.0, self.physics_dt / self.velocity_tau)
+        velocity = self.state[:, 3:3 + self.d]
+        velocity += (self.t_speed - velocity) * alpha
+        self.state[:, 0:3] += self.state[:, 3:6] * self.physics_dt
+        self.time += self.physics_dt
+
+    def run(self, duration: float, realtime_factor: Optional[float] = None) -> Dict[str, float]:
+        """
+        Прогоняет симуляцию на duration секунд модельного времени.
+
+        :param duration: Длительность в модельных секундах
+        :param realtime_factor: Во сколько раз быстрее реального времени идти;
+            None — без ожидания, с максимальной скоростью
+        :return: Сводка: время такта, минимальное расстояние, ошибка до цели,
+            пакеты относительно фиксированного интервала и ошибка позиций у соседей
+        """
+        started = time.perf_counter()
+        start_time = self.time
+        while self.time - start_time < duration:
+            self.step()
+            if realtime_factor is not None:
+                lag = (self.time - start_time) / realtime_factor - (time.perf_counter() - started)
+                if lag > 0:
+                    time.sleep(lag)
+        wall = time.perf_counter() - started
+        ticks = np.array(self.tick_times) if self.tick_times else np.zeros(1)
+        packets_fixed = self.n_agents * self.time / self.broadcast_interval
+        return {
+            "agents": self.n_agents,
+            "sim_time": duration,
+            "wall_time": wall,
+            "speedup": duration / wall,
+            "tick_mean": float(ticks.mean()),
+            "tick_p99": float(np.percentile(ticks, 99)),
+            "tick_per_agent": float(ticks.mean() / self.n_agents),
+            "min_separation": self.min_separation_seen,
+            "target_error_mean": float(self.target_errors().mean()),
+            "packets": self.bus.packets,
+            "packets_fixed": int(packets_fixed),
+            "packets_saved": 1.0 - self.bus.packets / packets_fixed,
+            "neighbour_error_max": self.neighbour_error_max,
+        }
+
+    def min_separation(self) -> float:
+        """
+        Минимальное расстояние между дронами в пределах радиуса взаимодействия.
+        """
+        return min_pair_distance(self.state[:, 0:self.d], self.interaction_radius)
+
+    def target_errors(self) -> np.ndarray:
+        return np.linalg.norm(self.state[:, 0:self.d] - self.targets, axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless-симуляция роя Swarmc")
+    parser.add_argument("--agents", type=int, default=100, help="Количество дронов")
+    parser.add_argument("--duration", type=float, default=30.0, help="Модельное время, с")
+    parser.add_argument("--realtime", type=float, default=None,
+                        help="Множитель реального времени; без параметра — максимально быстро")
+    parser.add_argument("--adaptive_broadcast", action="store_true",
+                        help="Адаптивная рассылка вместо фиксированного интервала")
+    args = parser.parse_args()
+
+    sim_params = dict(default_params, adaptive_broadcast=True) if args.adaptive_broadcast else default_params
+    sim = SwarmSimulator(args.agents, params=sim_params)
+    # Все дроны летят к центру строя — плотная сцена для отталкивания
+    sim.set_targets(sim.state[:, 0:2].mean(axis=0))
+    summary = sim.run(args.duration, realtime_factor=args.realtime)
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
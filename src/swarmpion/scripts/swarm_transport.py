@@ -0,0 +1,401 @@
+"""
+Транспорт бинарных пакетов состояния роя.
+
+По умолчанию состояние рассылается широковещательно (BinaryStateChannel):
+каждый дрон принимает пакеты всего роя, нагрузка приёма растёт как O(N), а
+рой не выходит за пределы одной подсети.
+
+MulticastCellTransport делит плоскость xy на ячейки cell_size, у каждой
+ячейки своя группа multicast (cell_group). Дрон отправляет пакет в группу
+своей ячейки и подписан на группы блока 3×3 вокруг неё: при cell_size не
+меньше радиуса взаимодействия в этот блок попадают все соседи в радиусе.
+Подписки меняются только при переходе дрона в другую ячейку.
+
+StateRelay пересылает пакеты состояния между подсетями. Сторона
+ретранслятора — multicast-сеть на интерфейсе (MulticastSide) или UDP-туннель
+до ретрансляторов других подсетей (TunnelSide). Повторы и петли отсекаются
+по (id, seq) пакета; запись о дроне забывается через ttl, а перезапуск
+дрона (seq начался заново) распознаётся как в PeerTable. Команды protobuf
+не пересылаются.
+
+Транспорт для Swarmc — объект с методами send(payload), receive() ->
+(payload, address) или None, update_position(position) и close(), как у
+BinaryStateChannel; выбирается параметром state_transport (state_transport()).
+"""
+import argparse
+import math
+import selectors
+import socket
+import struct
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from swarm_protocol import BinaryStateChannel, is_binary_state, is_sender_restart, seq_newer
+
+# Linux: сокет получает только группы, в которые вступил сам, а не все группы
+# своего порта, в которые вступил любой сокет хоста. В модуле socket константы нет.
+IP_MULTICAST_ALL = getattr(socket, "IP_MULTICAST_ALL", 49)
+# Ограничение ядра на число групп одного сокета (net.ipv4.igmp_max_memberships)
+MAX_MEMBERSHIPS = 20
+# Administratively scoped диапазон 239.255.0.0/16
+GROUP_PREFIX = "239.255"
+
+# seq, id и x, y из пакета состояния (см. swarm_protocol)
+SEQ_ID_STRUCT = struct.Struct("<IQ")
+SEQ_ID_OFFSET = 4
+TIMESTAMP_STRUCT = struct.Struct("<d")
+TIMESTAMP_OFFSET = 16
+XY_STRUCT = struct.Struct("<2f")
+XY_OFFSET = 24
+
+Cell = Tuple[int, int]
+
+
+def cell_of(position: Sequence[float], cell_size: float) -> Cell:
+    """
+    Ячейка точки в плоскости xy.
+    """
+    return math.floor(position[0] / cell_size), math.floor(position[1] / cell_size)
+
+
+def cell_group(cell: Cell, prefix: str = GROUP_PREFIX) -> str:
+    """
+    Адрес группы multicast ячейки.
+
+    Ячейки, отстоящие на 256 по любой оси, делят группу; лишние пакеты
+    отбрасывает радиус запроса соседей.
+    """
+    return f"{prefix}.{cell[0] % 256}.{cell[1] % 256}"
+
+
+def block_cells(cell: Cell, reach: int = 1) -> List[Cell]:
+    """
+    Ячейки квадрата (2 * reach + 1)² с центром в cell.
+    """
+    cx, cy = cell
+    return [(cx + dx, cy + dy) for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)]
+
+
+def area_cells(low: Sequence[float], high: Sequence[float], cell_size: float) -> List[Cell]:
+    """
+    Ячейки, покрывающие прямоугольник low–high в плоскости xy.
+    """
+    (x0, y0), (x1, y1) = cell_of(low, cell_size), cell_of(high, cell_size)
+    return [(cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1)]
+
+
+def open_multicast_socket(port: int, interface: str = "0.0.0.0", loopback: bool = True,
+                          ttl: int = 1) -> socket.socket:
+    """
+    UDP-сокет на port, отправляющий multicast через interface.
+
+    :param loopback: Доставлять отправленные пакеты сокетам этого же хоста
+    :param ttl: TTL multicast; 1 — пакеты не выходят за подсеть
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, IP_MULTICAST_ALL, 0)
+    except OSError:
+        pass
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1 if loopback else 0)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    sock.bind(("", port))
+    return sock
+
+
+def _membership(group: str, interface: str) -> bytes:
+    return socket.inet_aton(group) + socket.inet_aton(interface)
+
+
+class MulticastCellTransport:
+    """
+    Рассылка состояния по группам multicast пространственных ячеек.
+
+    Ячейка отправителя определяется по позиции в самом пакете, поэтому
+    подписка обновляется при отправке; update_position нужен, только если
+    дрон слушает, не отправляя.
+    """
+
+    def __init__(self,
+                 port: int,
+                 cell_size: float,
+                 interface: str = "0.0.0.0",
+                 timeout: float = 0.5,
+                 ttl: int = 1,
+                 group_prefix: str = GROUP_PREFIX) -> None:
+        """
+        :param port: Порт пакетов состояния
+        :param cell_size: Сторона ячейки (м), не меньше радиуса взаимодействия
+        :param interface: Адрес интерфейса multicast, 0.0.0.0 — по маршруту по умолчанию
+        :param timeout: Наибольшее ожидание в receive (с), 0 — без ожидания
+        :param ttl: TTL multicast
+        :param group_prefix: Первые два октета адресов групп
+        """
+        self.port = port
+        self.cell_size = cell_size
+        self.interface = interface
+        self.group_prefix = group_prefix
+        self.socket = open_multicast_socket(port, interface, ttl=ttl)
+        self.socket.settimeout(timeout)
+        self.cell: Optional[Cell] = None
+        self.groups: Set[str] = set()
+        self.resubscriptions = 0
+        self._destination: Optional[Tuple[str, int]] = None
+
+    def update_position(self, position: Sequence[float]) -> bool:
+        """
+        Переподписывается на блок 3×3 вокруг ячейки position, если ячейка сменилась.
+
+        :return: True, если подписка изменилась
+        """
+        cell = cell_of(position, self.cell_size)
+        if cell == self.cell:
+            return False
+        wanted = {cell_group(neighbour, self.group_prefix) for neighbour in block_cells(cell)}
+        # Сначала новые группы, потом выход из старых: пакеты при переходе не теряются
+        for group in wanted - self.groups:
+            self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+                                   _membership(group, self.interface))
+        for group in self.groups - wanted:
+            self.socket.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP,
+                                   _membership(group, self.interface))
+        self.cell = cell
+        self.groups = wanted
+        self._destination = (cell_group(cell, self.group_prefix), self.port)
+        self.resubscriptions += 1
+        return True
+
+    def send(self, payload: bytes) -> None:
+        if is_binary_state(payload):
+            self.update_position(XY_STRUCT.unpack_from(payload, XY_OFFSET))
+        if self._destination is None:
+            raise RuntimeError("Позиция неизвестна: вызовите update_position или отправьте пакет состояния")
+        self.socket.sendto(payload, self._destination)
+
+    def receive(self) -> Optional[Tuple[bytes, Tuple[str, int]]]:
+        """
+        Ждёт один пакет не дольше timeout.
+
+        :return: Пакет и адрес отправителя, либо None
+        """
+        try:
+            return self.socket.recvfrom(4096)
+        except (socket.timeout, BlockingIOError):
+            return None
+
+    def close(self) -> None:
+        self.socket.close()
+
+
+def state_transport(params: dict, port: int, radius: float, timeout: float = 0.5):
+    """
+    Транспорт состояния по параметрам роя.
+
+    state_transport: "broadcast" (по умолчанию) или "multicast";
+    multicast_cell_size — сторона ячейки (по умолчанию radius);
+    multicast_interface — адрес интерфейса.
+
+    :param radius: Радиус взаимодействия Swarmc
+    """
+    kind = params.get("state_transport") or "broadcast"
+    if kind == "broadcast":
+        return BinaryStateChannel(port, timeout=timeout)
+    if kind == "multicast":
+        cell_size = params.get("multicast_cell_size") or radius
+        if cell_size < radius:
+            raise ValueError(f"multicast_cell_size {cell_size} меньше радиуса взаимодействия {radius}")
+        return MulticastCellTransport(port, cell_size, interface=params.get("multicast_interface") or "0.0.0.0",
+                                      timeout=timeout)
+    raise ValueError(f"Неизвестный транспорт состояния: {kind}")
+
+
+class MulticastSide:
+    """
+    Сторона ретранслятора в multicast-сети: все группы ячеек cells на interface.
+
+    Групп может быть больше MAX_MEMBERSHIPS, поэтому сокетов несколько.
+    """
+
+    def __init__(self,
+                 port: int,
+                 cell_size: float,
+                 cells: Iterable[Cell],
+                 interface: str = "0.0.0.0",
+                 ttl: int = 1,
+                 group_prefix: str = GROUP_PREFIX) -> None:
+        self.port = port
+        self.cell_size = cell_size
+        self.group_prefix = group_prefix
+        groups = sorted({cell_group(cell, group_prefix) for cell in cells})
+        self.sockets: List[socket.socket] = []
+        for start in range(0, max(len(groups), 1), MAX_MEMBERSHIPS):
+            sock = open_multicast_socket(port, interface, ttl=ttl)
+            sock.setblocking(False)
+            for group in groups[start:start + MAX_MEMBERSHIPS]:
+                sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, _membership(group, interface))
+            self.sockets.append(sock)
+
+    def forward(self, payload: bytes) -> None:
+        cell = cell_of(XY_STRUCT.unpack_from(payload, XY_OFFSET), self.cell_size)
+        self.sockets[0].sendto(payload, (cell_group(cell, self.group_prefix), self.port))
+
+    def close(self) -> None:
+        for sock in self.sockets:
+            sock.close()
+
+
+class TunnelSide:
+    """
+    Сторона ретранслятора — UDP-туннель до ретрансляторов других подсетей.
+    """
+
+    def __init__(self, port: int, peers: Iterable[Tuple[str, int]], bind: str = "0.0.0.0") -> None:
+        self.peers = list(peers)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        sock.bind((bind, port))
+        sock.setblocking(False)
+        self.sockets = [sock]
+
+    def forward(self, payload: bytes) -> None:
+        for peer in self.peers:
+            self.sockets[0].sendto(payload, peer)
+
+    def close(self) -> None:
+        self.sockets[0].close()
+
+
+class StateRelay:
+    """
+    Пересылает пакеты состояния между сторонами.
+
+    Пакет пересылается на все стороны, кроме той, откуда пришёл, если его seq
+    новее последнего пересланного от этого дрона: свои пересланные пакеты,
+    вернувшиеся по петле, и пакеты, пришедшие разными путями, отбрасываются.
+    Пакет перезапущенного дрона (is_sender_restart) пересылается сразу, а
+    дрон, не слышанный дольше ttl, забывается.
+    """
+
+    def __init__(self, sides: Sequence, ttl: float = 4.0, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param sides: Стороны ретранслятора (MulticastSide, TunnelSide)
+        :param ttl: Время, через которое забывается молчащий дрон (как peer_ttl Swarmc)
+        :param clock: Монотонные часы
+        """
+        self.sides = list(sides)
+        self.ttl = ttl
+        self.clock = clock
+        self.selector = selectors.DefaultSelector()
+        for side in self.sides:
+            for sock in side.sockets:
+                self.selector.register(sock, selectors.EVENT_READ, side)
+        # id дрона -> (seq, метка времени, момент пересылки) последнего пересланного пакета
+        self.last_seq: Dict[int, Tuple[int, float, float]] = {}
+        self.forwarded = 0
+        self.duplicates = 0
+        self.restarts = 0
+        self.invalid = 0
+        self._expired_at = clock()
+
+    def handle(self, payload: bytes, source) -> bool:
+        """
+        Пересылает один пакет.
+
+        :return: True, если пакет переслан
+        """
+        if not is_binary_state(payload):
+            self.invalid += 1
+            return False
+        seq, peer_id = SEQ_ID_STRUCT.unpack_from(payload, SEQ_ID_OFFSET)
+        timestamp = TIMESTAMP_STRUCT.unpack_from(payload, TIMESTAMP_OFFSET)[0]
+        now = self.clock()
+        last = self.last_seq.get(peer_id)
+        if last is not None and now - last[2] <= self.ttl and not seq_newer(seq, last[0]):
+            if not is_sender_restart(seq, timestamp, last[0], last[1]):
+                self.duplicates += 1
+                return False
+            self.restarts += 1
+        self.last_seq[peer_id] = (seq, timestamp, now)
+        for side in self.sides:
+            if side is not source:
+                side.forward(payload)
+        self.forwarded += 1
+        return True
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """
+        Забывает дронов, не слышанных дольше ttl.
+
+        :return: Количество забытых дронов
+        """
+        now = self.clock() if now is None else now
+        self._expired_at = now
+        stale = [peer_id for peer_id, (_, _, seen) in self.last_seq.items() if now - seen > self.ttl]
+        for peer_id in stale:
+            del self.last_seq[peer_id]
+        return len(stale)
+
+    def poll(self, timeout: Optional[float] = None) -> int:
+        """
+        Ждёт пакеты не дольше timeout и пересылает всё, что накопилось в сокетах.
+
+        :return: Количество принятых пакетов
+        """
+        received = 0
+        for key, _ in self.selector.select(timeout):
+            while True:
+                try:
+                    payload = key.fileobj.recv(4096)
+                except BlockingIOError:
+                    break
+                received += 1
+                self.handle(payload, key.data)
+        if self.clock() - self._expired_at > self.ttl:
+            self.expire()
+        return received
+
+    def close(self) -> None:
+        self.selector.close()
+        for side in self.sides:
+            side.close()
+
+
+def parse_peer(value: str) -> Tuple[str, int]:
+    host, port = value.rsplit(":", 1)
+    return host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ретранслятор пакетов состояния роя между подсетями")
+    parser.add_argument("--port", type=int, default=37021, help="Порт пакетов состояния")
+    parser.add_argument("--cell-size", type=float, required=True, help="Сторона ячейки multicast (м)")
+    parser.add_argument("--area", type=float, nargs=4, metavar=("X0", "Y0", "X1", "Y1"), required=True,
+                        help="Область полёта: ячейки, группы которых пересылаются")
+    parser.add_argument("--interface", action="append", default=[],
+                        help="Адрес интерфейса подсети, можно указать несколько раз")
+    parser.add_argument("--tunnel-port", type=int, default=None, help="Порт туннеля до других ретрансляторов")
+    parser.add_argument("--peer", action="append", default=[], type=parse_peer,
+                        help="Ретранслятор другой подсети host:port, можно указать несколько раз")
+    parser.add_argument("--ttl", type=float, default=4.0,
+                        help="Через сколько секунд забывается молчащий дрон (как peer_ttl Swarmc)")
+    args = parser.parse_args()
+
+    cells = area_cells(args.area[0:2], args.area[2:4], args.cell_size)
+    sides = [MulticastSide(args.port, args.cell_size, cells, interface=interface)
+             for interface in args.interface or ["0.0.0.0"]]
+    if args.tunnel_port is not None or args.peer:
+        sides.append(TunnelSide(args.tunnel_port or args.port, args.peer))
+    relay = StateRelay(sides, ttl=args.ttl)
+    print(f"Ретранслятор: {len(cells)} ячеек, сторон {len(sides)}")
+    try:
+        while True:
+            relay.poll(1.0)
+    except KeyboardInterrupt:
+        print(f"Переслано {relay.forwarded}, повторов {relay.duplicates}")
+    finally:
+        relay.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Бинарная телеметрия полёта в кольцевом файле, отображённом в память.
+
+Файл создаётся один раз фиксированного размера: заголовок и capacity
+записей по RECORD_DTYPE. Запись такта — копирование 80 байт в mmap без
+системных вызовов и выделения памяти (единицы микросекунд); на SD-карту
+страницы сбрасывает ядро, а размер файла не растёт, поэтому износ ограничен.
+После заполнения новые записи затирают самые старые. При повторном открытии (перезапуск сервиса в
+полёте) запись продолжается с того же места.
+
+Чтение полёта в массивы numpy:
+    python telemetry.py telemetry.bin
+    python telemetry.py telemetry.bin --npz flight.npz
+"""
+import argparse
+import mmap
+import os
+import struct
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+
+MAGIC = b"SPTL"
+VERSION = 1
+# magic, версия, размер записи, ёмкость, всего записано, время создания
+HEADER = struct.Struct("<4sHHIQd")
+HEADER_SIZE = 64
+HEAD_OFFSET = 12
+
+RECORD_DTYPE = np.dtype([
+    ("time", "<f8"),          # time.time() такта
+    ("seq", "<u4"),           # номер записи с создания файла
+    ("peers", "<u2"),         # соседей в таблице
+    ("flags", "<u2"),         # зарезервировано
+    ("xyz", "<f4", (3,)),
+    ("target", "<f4", (3,)),
+    ("pid", "<f4", (3,)),     # ПИД-сигнал скорости
+    ("swarm", "<f4", (3,)),   # роевая составляющая
+    ("t_speed", "<f4", (4,)),  # команда скорости vx, vy, vz, yaw_rate
+])
+RECORD_SIZE = RECORD_DTYPE.itemsize
+# Запись копируется в файл 4-байтовыми словами
+RECORD_WORDS = RECORD_SIZE // 4
+
+
+class TelemetryRecorder:
+    """
+    Запись телеметрии такта в кольцевой файл.
+
+    Такт собирается в одной предвыделенной записи и копируется в mmap
+    через ndarray.put с переносом по ёмкости кольца; номер записи хранится
+    в массиве индексов слов. Запись из массивов numpy не выделяет память.
+    """
+
+    def __init__(self, path: str, capacity: int = 1 << 17) -> None:
+        """
+        :param path: Путь к файлу; существующий совместимый файл дописывается
+        :param capacity: Ёмкость в записях (по умолчанию 131072 — около 1.8 ч при 20 Гц)
+        """
+        self.path = path
+        size = HEADER_SIZE + capacity * RECORD_SIZE
+        header = read_header(path) if os.path.exists(path) else None
+        if header is None or header["capacity"] != capacity or os.path.getsize(path) != size:
+            with open(path, "wb") as file:
+                file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, capacity, 0, time.time()))
+                file.truncate(size)
+            header = read_header(path)
+        self.capacity = capacity
+        self._file = open(path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._words = np.ndarray((capacity * RECORD_WORDS,), dtype="<u4", buffer=self._map, offset=HEADER_SIZE)
+        self._head_word = np.ndarray((1,), dtype="<u8", buffer=self._map, offset=HEAD_OFFSET)
+        # Индексы слов следующей записи (номер записи * RECORD_WORDS + 0..RECORD_WORDS-1)
+        # и номер записи в каждом элементе counts
+        self._step = np.full(RECORD_WORDS, RECORD_WORDS, dtype=np.intp)
+        self._indices = np.arange(RECORD_WORDS, dtype=np.intp) + header["head"] * RECORD_WORDS
+        self._counts = np.full(RECORD_WORDS, header["head"], dtype=np.intp)
+        self._head = self._counts[0:1]
+        # Запись такта и представления её полей; векторы — по длине входа
+        self._record = np.zeros(1, dtype=RECORD_DTYPE)
+        self._record_words = self._record.view("<u4")
+        self._time, self._seq, self._peers = self._record["time"], self._record["seq"], self._record["peers"]
+        self._vectors = np.ndarray((12,), dtype="<f4", buffer=self._record, offset=RECORD_DTYPE.fields["xyz"][1])
+        self._xyz, self._target, self._pid, self._swarm = (
+            tuple(self._record[name][0][0:size] for size in range(4)) for name in ("xyz", "target", "pid", "swarm"))
+        self._t_speed = self._record["t_speed"][0]
+
+    @property
+    def head(self) -> int:
+        """
+        Всего записей с создания файла.
+        """
+        return int(self._head[0])
+
+    def record(self,
+               timestamp: float,
+               xyz: Iterable[float],
+               target: Iterable[float],
+               pid: Iterable[float],
+               swarm: Iterable[float],
+               t_speed: Iterable[float],
+               peers: int) -> None:
+        """
+        Записывает такт. Векторы размерности d < 3 дополняются нулями.
+        """
+        # Скаляр Python через fill: присваивание срезу создаёт временный массив
+        self._time.fill(timestamp)
+        self._peers.fill(min(peers, 0xFFFF))
+        self._seq[...] = self._head
+        self._vectors.fill(0.0)
+        self._xyz[len(xyz)][...] = xyz
+        self._target[len(target)][...] = target
+        self._pid[len(pid)][...] = pid
+        self._swarm[len(swarm)][...] = swarm
+        self._t_speed[...] = t_speed
+        # mode позиционно: ключевой аргумент put выделяет память
+        self._words.put(self._indices, self._record_words, "wrap")
+        np.add(self._indices, self._step, out=self._indices)
+        np.floor_divide(self._indices, self._step, out=self._counts)
+        # Счётчик в заголовке обновляется после записи, чтобы читатель не видел неполную запись
+        self._head_word[...] = self._head
+
+    def close(self) -> None:
+        if not self._map.closed:
+            # mmap нельзя закрыть, пока на него ссылаются представления numpy
+            del self._words, self._head_word
+            self._map.flush()
+            self._map.close()
+            self._file.close()
+
+
+def read_header(path: str) -> Optional[dict]:
+    with open(path, "rb") as file:
+        data = file.read(HEADER.size)
+    if len(data) < HEADER.size:
+        return None
+    magic, version, record_size, capacity, head, created = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+        return None
+    return {"capacity": capacity, "head": head, "created": created}
+
+
+def load_telemetry(path: str) -> np.ndarray:
+    """
+    Загружает полёт в структурированный массив по RECORD_DTYPE в порядке записи.
+
+    Поля доступны как массивы: flight["time"], flight["xyz"] (N, 3) и т.д.
+    """
+    header = read_header(path)
+    if header is None:
+        raise ValueError(f"{path}: не файл телеметрии sPion версии {VERSION}")
+    capacity, head = header["capacity"], header["head"]
+    records = np.fromfile(path, dtype=RECORD_DTYPE, count=capacity, offset=HEADER_SIZE)
+    if head <= capacity:
+        return records[:head].copy()
+    start = head % capacity
+    return np.concatenate([records[start:], records[:start]])
+
+
+def summary(flight: np.ndarray) -> str:
+    if not len(flight):
+        return "Записей нет"
+    duration = flight["time"][-1] - flight["time"][0]
+    steps = np.diff(flight["time"])
+    path = np.linalg.norm(np.diff(flight["xyz"], axis=0), axis=1).sum()
+    return (f"Записей {len(flight)} за {duration:.1f} с "
+            f"(такт p50 {np.median(steps) * 1e3 if len(steps) else 0:.1f} мс), "
+            f"путь {path:.1f} м, соседей до {flight['peers'].max()}, "
+            f"наибольшая команда {np.abs(flight['t_speed'][:, 0:3]).max():.2f} м/с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Чтение телеметрии полёта sPion")
+    parser.add_argument("path", help="Файл телеметрии")
+    parser.add_argument("--npz", default=None, help="Сохранить поля в .npz для анализа")
+    args = parser.parse_args()
+
+    flight = load_telemetry(args.path)
+    print(summary(flight))
+    if args.npz:
+        np.savez_compressed(args.npz, **{name: flight[name] for name in RECORD_DTYPE.names})
+        print(f"Сохранено в {args.npz}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Подбор параметров роя на headless-симуляторе.
+
+Каждый кандидат — набор параметров закона Swarmc (веса отталкивания,
+выведения из равновесия и прогноза конфликтов, радиусы, ограничения
+скорости и ускорения, коэффициенты ПИД позиции) — прогоняется в swarm_sim.SwarmSimulator на сцене
+перестроения: дроны меняются местами через центр строя. Оценка складывается
+из времени до построения, нарушения минимального расстояния и затрат
+управления. Кандидаты считаются параллельно в пуле процессов.
+
+Поиск случайный или байесовский (гауссовский процесс на numpy с ожидаемым
+улучшением). Результаты кэшируются в файл по хешу параметров и сцены, поэтому
+повторный запуск продолжает поиск, не пересчитывая уже прогнанное.
+
+Веса attraction, cohesion и alignment в законе Swarmc не участвуют
+(притяжение к цели отрабатывает ПИД), поэтому не подбираются.
+
+Результат — готовый словарь params в формате params.py:
+    python tune_params.py --trials 80 --search bayes --output tuned_params.py
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from params import params as default_params
+from swarm_sim import SwarmSimulator
+
+# Имя: нижняя граница, верхняя граница, логарифмическая шкала
+SEARCH_SPACE: Dict[str, Tuple[float, float, bool]] = {
+    "repulsion_weight": (0.5, 20.0, True),
+    "unstable_weight": (0.0, 3.0, False),
+    "safety_radius": (0.6, 2.0, False),
+    "unstable_radius": (1.0, 3.0, False),
+    "max_speed": (0.2, 1.5, False),
+    "max_acceleration": (0.2, 3.0, True),
+    "conflict_horizon": (0.0, 4.0, False),
+    "conflict_weight": (0.1, 10.0, True),
+    "pid_kp": (0.01, 1.0, True),
+    "pid_kd": (0.0, 2.0, False),
+}
+
+DEFAULT_SCENARIO = {
+    "agents": 16,
+    "duration": 40.0,
+    "spacing": 2.0,
+    # Ограничение ПИД-сигнала (max_speed Swarmc)
+    "speed_limit": 1.0,
+    "tolerance": 0.3,
+    "required_separation": 0.8,
+    "separation_weight": 10.0,
+    "effort_weight": 0.1,
+    "seeds": 2,
+}
+
+
+def apply_candidate(candidate: Dict[str, float], base: Optional[dict] = None) -> dict:
+    """
+    Параметры роя с подставленными значениями кандидата.
+
+    pid_kp и pid_kd задают position_pid_matrix (одинаково по всем осям, ki = 0).
+    """
+    tuned = dict(default_params if base is None else base)
+    tuned.update({name: value for name, value in candidate.items() if not name.startswith("pid_")})
+    if "pid_kp" in candidate or "pid_kd" in candidate:
+        tuned["position_pid_matrix"] = [[candidate.get("pid_kp", 0.05)] * 3,
+                                        [0.0] * 3,
+                                        [candidate.get("pid_kd", 0.7)] * 3]
+    return tuned
+
+
+def baseline_candidate() -> Dict[str, float]:
+    """
+    Текущие параметры из params.py и коэффициенты ПИД Swarmc по умолчанию.
+    """
+    candidate = {name: float(default_params[name]) for name in SEARCH_SPACE if name in default_params}
+    candidate.update(pid_kp=0.05, pid_kd=0.7)
+    return candidate
+
+
+def simulate(candidate: Dict[str, float], scenario: Dict[str, Any], seed: int) -> Dict[str, float]:
+    """
+    Один прогон сцены перестроения.
+
+    :return: formation_time (inf, если строй не собран), min_separation,
+        effort — среднее по дронам ∫|u|² dt, final_error — средняя ошибка до цели в конце
+    """
+    n = scenario["agents"]
+    sim = SwarmSimulator(n, params=apply_candidate(candidate), max_speed=scenario["speed_limit"],
+                         spacing=scenario["spacing"], seed=seed)
+    # Каждый дрон летит в точку, симметричную своей относительно центра строя
+    start = sim.state[:, 0:2].copy()
+    center = start.mean(axis=0)
+    sim.set_targets(2 * center - start)
+    formation_time = float("inf")
+    effort = 0.0
+    while sim.time < scenario["duration"]:
+        sim.step()
+        effort += float(np.einsum("ij,ij->", sim.t_speed, sim.t_speed)) * sim.physics_dt
+        if formation_time == float("inf") and sim.target_errors().max() <= scenario["tolerance"]:
+            formation_time = sim.time
+    return {
+        "formation_time": formation_time,
+        "min_separation": float(min(sim.min_separation_seen, sim.min_separation())),
+        "effort": effort / n,
+        "final_error": float(sim.target_errors().mean()),
+    }
+
+
+def score(runs: List[Dict[str, float]], scenario: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Оценка кандидата по прогонам с разными зёрнами (меньше — лучше).
+
+    Время до построения нормируется на длительность сцены; несобранный строй
+    штрафуется длительностью и остаточной ошибкой. Минимальное расстояние
+    берётся худшее по прогонам.
+    """
+    duration = scenario["duration"]
+    formation = np.mean([run["formation_time"] if np.isfinite(run["formation_time"])
+                         else duration * (1.0 + run["final_error"]) for run in runs]) / duration
+    min_separation = min(run["min_separation"] for run in runs)
+    required = scenario["required_separation"]
+    separation_penalty = max(0.0, required - min_separation) / required
+    effort = float(np.mean([run["effort"] for run in runs])) / duration
+    return {
+        "cost": float(formation + scenario["separation_weight"] * separation_penalty
+                      + scenario["effort_weight"] * effort),
+        "formation_time": float(formation * duration),
+        "formed": int(sum(np.isfinite(run["formation_time"]) for run in runs)),
+        "min_separation": float(min_separation),
+        "effort": effort,
+    }
+
+
+def evaluate(candidate: Dict[str, float], scenario: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Прогоны кандидата на всех зёрнах сцены; выполняется в процессе пула.
+    """
+    runs = [simulate(candidate, scenario, seed) for seed in range(scenario["seeds"])]
+    return score(runs, scenario)
+
+
+def candidate_key(candidate: Dict[str, float], scenario: Dict[str, Any]) -> str:
+    """
+    Хеш кандидата и сцены для кэша; значения округляются до 6 значащих цифр.
+    """
+    rounded = {name: float(f"{value:.6g}") for name, value in candidate.items()}
+    payload = json.dumps({"candidate": rounded, "scenario": scenario}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Результаты прогонов в файле JSON Lines: строка на кандидата.
+    """
+
+    def __init__(self, path: Optional[str]) -> None:
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # оборванная последняя строка после прерывания
+                    self.entries[entry["key"]] = entry
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self.entries.get(key)
+
+    def put(self, key: str, candidate: Dict[str, float], result: Dict[str, float]) -> None:
+        entry = {"key": key, "candidate": candidate, "result": result}
+        self.entries[key] = entry
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry) + "\n")
+
+
+def to_unit(candidate: Dict[str, float], space: Dict[str, Tuple[float, float, bool]] = SEARCH_SPACE) -> np.ndarray:
+    """
+    Кандидат в точку единичного куба (логарифмические параметры — в логарифме).
+    """
+    unit = []
+    for name, (low, high, log) in space.items():
+        value = min(max(candidate[name], low), high)
+        unit.append(np.log(value / low) / np.log(high / low) if log else (value - low) / (high - low))
+    return np.array(unit)
+
+
+def from_unit(unit: np.ndarray, space: Dict[str, Tuple[float, float, bool]] = SEARCH_SPACE) -> Dict[str, float]:
+    candidate = {}
+    for u, (name, (low, high, log)) in zip(np.clip(unit, 0.0, 1.0), space.items()):
+        candidate[name] = float(low * (high / low) ** u if log else low + (high - low) * u)
+    return candidate
+
+
+class GaussianProcess:
+    """
+    Гауссовский процесс с RBF-ядром на единичном кубе.
+
+    Длина корреляции выбирается из сетки по правдоподобию, отклики нормируются.
+    """
+
+    LENGTH_SCALES = (0.1, 0.2, 0.35, 0.6, 1.0)
+
+    def __init__(self, noise: float = 1e-3) -> None:
+        self.noise = noise
+
+    @staticmethod
+    def _kernel(a: np.ndarray, b: np.ndarray, length_scale: float) -> np.ndarray:
+        squared = (np.einsum("ij,ij->i", a, a)[:, None] + np.einsum("ij,ij->i", b, b)[None, :] - 2 * a @ b.T)
+        return np.exp(-0.5 * np.maximum(squared, 0.0) / length_scale ** 2)
+
+    def fit(self, x: np.ndarray, y: np.ndarray) -> "GaussianProcess":
+        self.x = x
+        self.mean, self.std = y.mean(), y.std() or 1.0
+        target = (y - self.mean) / self.std
+        best = None
+        for length_scale in self.LENGTH_SCALES:
+            kernel = self._kernel(x, x, length_scale) + self.noise * np.eye(len(x))
+            try:
+                factor = np.linalg.cholesky(kernel)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = np.linalg.solve(factor.T, np.linalg.solve(factor, target))
+            likelihood = -0.5 * target @ alpha - np.log(np.diag(factor)).sum()
+            if best is None or likelihood > best[0]:
+                best = (likelihood, length_scale, factor, alpha)
+        _, self.length_scale, self.factor, self.alpha = best
+        return self
+
+    def predict(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        cross = self._kernel(x, self.x, self.length_scale)
+        mean = cross @ self.alpha
+        v = np.linalg.solve(self.factor, cross.T)
+        variance = np.maximum(1.0 - np.einsum("ij,ij->j", v, v), 1e-12)
+        return self.mean + self.std * mean, self.std * np.sqrt(variance)
+
+
+def expected_improvement(mean: np.ndarray, sigma: np.ndarray, best: float, xi: float = 0.01) -> np.ndarray:
+    """
+    Ожидаемое улучшение для минимизации.
+    """
+    improvement = best - mean - xi
+    z = improvement / sigma
+    # Нормальные cdf и pdf без scipy
+    cdf = 0.5 * _erfc(-z / np.sqrt(2.0))
+    pdf = np.exp(-0.5 * z * z) / np.sqrt(2 * np.pi)
+    return improvement * cdf + sigma * pdf
+
+
+def _erfc(x: np.ndarray) -> np.ndarray:
+    """
+    Дополнительная функция ошибок (приближение Чебышёва, погрешность < 1.2e-7).
+    """
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.5 * z)
+    r = t * np.exp(-z * z - 1.26551223 + t * (1.00002368 + t * (0.37409196 + t * (0.09678418 + t * (
+        -0.18628806 + t * (0.27886807 + t * (-1.13520398 + t * (1.48851587 + t * (
+            -0.82215223 + t * 0.17087277)))))))))
+    return np.where(x >= 0, r, 2.0 - r)
+
+
+def propose_bayes(observed_x: np.ndarray, observed_y: np.ndarray, count: int,
+                  rng: np.random.Generator, candidates: int = 4000) -> np.ndarray:
+    """
+    count новых точек по ожидаемому улучшению.
+
+    Пачка для пула набирается «постоянным лжецом»: выбранная точка добавляется
+    в выборку с лучшим найденным значением, и модель переобучается.
+    """
+    x, y = observed_x.copy(), observed_y.copy()
+    best_x = x[np.argmin(y)]
+    chosen = []
+    for _ in range(count):
+        model = GaussianProcess().fit(x, y)
+        # Случайные точки и окрестность лучшего кандидата
+        pool = np.vstack([rng.random((candidates // 2, x.shape[1])),
+                          np.clip(best_x + rng.normal(0, 0.05, (candidates // 2, x.shape[1])), 0.0, 1.0)])
+        mean, sigma = model.predict(pool)
+        point = pool[np.argmax(expected_improvement(mean, sigma, y.min()))]
+        chosen.append(point)
+        x = np.vstack([x, point])
+        y = np.append(y, y.min())
+    return np.array(chosen)
+
+
+def tune(trials: int = 60,
+         search: str = "bayes",
+         scenario: Optional[Dict[str, Any]] = None,
+         workers: Optional[int] = None,
+         cache_path: Optional[str] = "tune_cache.jsonl",
+         seed: int = 0,
+         initial: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Поиск параметров.
+
+    :param trials: Число новых кандидатов (кэшированные не считаются)
+    :param search: "random" или "bayes"
+    :param scenario: Настройки сцены и оценки, по умолчанию DEFAULT_SCENARIO
+    :param workers: Размер пула процессов, по умолчанию число ядер
+    :param cache_path: Файл кэша результатов; None — без кэша
+    :param seed: Зерно генератора кандидатов
+    :param initial: Случайных кандидатов перед байесовским поиском, по умолчанию 2 * размерность
+    :return: Все оценённые кандидаты этой сцены, лучшие первыми: {candidate, result}
+    """
+    scenario = dict(DEFAULT_SCENARIO, **(scenario or {}))
+    workers = workers or os.cpu_count() or 1
+    initial = initial or 2 * len(SEARCH_SPACE)
+    cache = ResultCache(cache_path)
+    rng = np.random.default_rng(seed)
+    evaluated: Dict[str, Dict[str, Any]] = {}
+
+    def known(candidate: Dict[str, float]) -> Optional[Dict[str, Any]]:
+        entry = cache.get(candidate_key(candidate, scenario))
+        if entry is not None:
+            evaluated[entry["key"]] = entry
+        return entry
+
+    # Кэш этой сцены участвует в поиске: модель обучается и на прошлых запусках
+    for entry in cache.entries.values():
+        if entry["key"] == candidate_key(entry["candidate"], scenario):
+            evaluated[entry["key"]] = entry
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = [baseline_candidate()]
+        done = 0
+        while done < trials:
+            batch = min(workers, trials - done)
+            if not pending:
+                if search == "bayes" and len(evaluated) >= initial:
+                    entries = list(evaluated.values())
+                    units = np.array([to_unit(entry["candidate"]) for entry in entries])
+                    costs = np.array([entry["result"]["cost"] for entry in entries])
+                    pending = [from_unit(unit) for unit in propose_bayes(units, costs, batch, rng)]
+                else:
+                    pending = [from_unit(unit) for unit in rng.random((batch, len(SEARCH_SPACE)))]
+            fresh = [candidate for candidate in pending if known(candidate) is None]
+            pending = []
+            started = time.perf_counter()
+            for candidate, result in zip(fresh, pool.map(evaluate, fresh, [scenario] * len(fresh))):
+                key = candidate_key(candidate, scenario)
+                cache.put(key, candidate, result)
+                evaluated[key] = cache.get(key)
+            done += len(fresh) or batch
+            best = min(evaluated.values(), key=lambda entry: entry["result"]["cost"])["result"]
+            print(f"[{done}/{trials}] {len(fresh)} кандидатов за {time.perf_counter() - started:.1f} с, "
+                  f"лучшая оценка {best['cost']:.3f} (построение {best['formation_time']:.1f} с, "
+                  f"мин. расстояние {best['min_separation']:.2f} м)")
+    return sorted(evaluated.values(), key=lambda entry: entry["result"]["cost"])
+
+
+def format_params(params: dict) -> str:
+    """
+    Словарь параметров как исходный код модуля в формате params.py.
+    """
+    lines = ["import numpy as np", "", "", "params = {"]
+    for name, value in params.items():
+        if isinstance(value, np.ndarray):
+            text = f"np.array({value.tolist()!r})" if value.size else f"np.zeros({value.shape!r})"
+        else:
+            text = repr(value)
+        lines.append(f"    {name!r}: {text},")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Подбор параметров роя sPion на симуляторе")
+    parser.add_argument("--trials", type=int, default=60, help="Число новых кандидатов")
+    parser.add_argument("--search", default="bayes", choices=("bayes", "random"), help="Способ поиска")
+    parser.add_argument("--workers", type=int, default=None, help="Процессов в пуле, по умолчанию число ядер")
+    parser.add_argument("--agents", type=int, default=DEFAULT_SCENARIO["agents"], help="Дронов в сцене")
+    parser.add_argument("--duration", type=float, default=DEFAULT_SCENARIO["duration"], help="Длительность сцены, с")
+    parser.add_argument("--seeds", type=int, default=DEFAULT_SCENARIO["seeds"], help="Прогонов на кандидата")
+    parser.add_argument("--required_separation", type=float, default=DEFAULT_SCENARIO["required_separation"],
+                        help="Минимально допустимое расстояние между дронами, м")
+    parser.add_argument("--cache", default="tune_cache.jsonl", help="Файл кэша результатов")
+    parser.add_argument("--output", default=None, help="Записать лучший словарь params в файл .py")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора кандидатов")
+    args = parser.parse_args()
+
+    scenario = {"agents": args.agents, "duration": args.duration, "seeds": args.seeds,
+                "required_separation": args.required_separation}
+    ranked = tune(args.trials, args.search, scenario, args.workers, args.cache, args.seed)
+    best = ranked[0]
+    baseline = next((entry for entry in ranked
+                     if entry["key"] == candidate_key(baseline_candidate(), dict(DEFAULT_SCENARIO, **scenario))),
+                    None)
+    if baseline is not None:
+        print(f"Исходные параметры: оценка {baseline['result']['cost']:.3f}")
+    print(f"Лучшие параметры: оценка {best['result']['cost']:.3f}, {best['result']}")
+    # Четырёх значащих цифр достаточно: оценка на таком шаге не меняется
+    source = format_params(apply_candidate({name: float(f"{value:.4g}")
+                                            for name, value in best["candidate"].items()}))
+    print(source)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(source)
+        print(f"Записано в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Проверка закреплённой версии кода при старте сервиса.
+
+remote_installer/code_sync.py кладёт в корень кода манифест с sha256
+каждого файла и общей версией. При старте манифест ищется вверх от
+каталога скрипта, и файлы сверяются с ним: если передача была прервана
+или файлы изменены вручную, сервис не запускается со смешанной версией.
+Без манифеста (установка через git) проверка пропускается.
+
+Запуск вручную: python version_check.py
+"""
+import hashlib
+import json
+import os
+import sys
+from typing import List, Optional
+
+# То же имя, что и в remote_installer/code_sync.py
+MANIFEST_NAME = ".spion_manifest.json"
+
+
+def find_manifest(start: str) -> Optional[str]:
+    """
+    Ищет манифест в start и выше.
+    """
+    directory = os.path.abspath(start)
+    while True:
+        path = os.path.join(directory, MANIFEST_NAME)
+        if os.path.isfile(path):
+            return path
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_manifest(path: str) -> List[str]:
+    """
+    Сверяет файлы с манифестом.
+
+    :return: Описания расхождений, пустой список — код совпадает с версией
+    """
+    with open(path, encoding="utf-8") as file:
+        manifest = json.load(file)
+    files = manifest.get("files", {})
+    expected = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()
+    problems = []
+    if manifest.get("digest") != expected:
+        problems.append("манифест повреждён")
+    root = os.path.dirname(path)
+    for relative, digest in sorted(files.items()):
+        local = os.path.join(root, *relative.split("/"))
+        if not os.path.isfile(local):
+            problems.append(f"нет файла {relative}")
+        elif _sha256(local) != digest:
+            problems.append(f"изменён {relative}")
+    return problems
+
+
+def check_version(start: Optional[str] = None, strict: bool = True) -> Optional[str]:
+    """
+    Проверяет версию кода перед запуском.
+
+    :param start: Каталог, от которого ищется манифест, по умолчанию каталог скрипта
+    :param strict: Завершить процесс при расхождении
+    :return: Версия кода или None, если манифеста нет
+    """
+    path = find_manifest(start or os.path.dirname(os.path.abspath(__file__)))
+    if path is None:
+        print("Версия кода не закреплена: манифест code_sync не найден")
+        return None
+    with open(path, encoding="utf-8") as file:
+        manifest = json.load(file)
+    problems = verify_manifest(path)
+    if problems:
+        print(f"Код не совпадает с версией {manifest.get('digest', '?')[:12]}:")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        if strict:
+            sys.exit(1)
+    print(f"Версия кода {manifest['digest'][:12]} ({manifest.get('revision', 'без ревизии')})")
+    return manifest["digest"]
+
+
+if __name__ == "__main__":
+    check_version()
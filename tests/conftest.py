@@ -0,0 +1,59 @@
+"""
+Скрипты sPion и remote_installer импортируют друг друга по имени модуля,
+как при запуске на борту и на машине оператора.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SCRIPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src", "swarmpion", "scripts"))
+INSTALLER_DIR = os.path.join(SCRIPTS_DIR, "remote_installer")
+
+for path in (INSTALLER_DIR, SCRIPTS_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+class Drone:
+    """
+    Объект управления без MAVLink: поля Pion, которые читает Swarmc.
+    """
+    name = "test"
+    ip = "127.0.0.1"
+    mavlink_port = 0
+
+    def __init__(self) -> None:
+        self.position = np.array([0.0, 0.0, 1.0, 0.0, 0.0, 0.0])
+        self.attitude = np.zeros(6)
+        self.t_speed = np.zeros(4)
+        self.target_point = np.zeros(4)
+        self.tracking = False
+        self.point_reached = False
+        self.threads = []
+
+
+@pytest.fixture
+def make_swarmc():
+    """
+    Создаёт Swarmc без запуска (start() не вызывается) и закрывает его сокеты и телеметрию.
+    """
+    from main_radxa import Swarmc
+    from params import params
+
+    created = []
+
+    def make(swarm_params=None, **kwargs):
+        swarm = Swarmc(control_object=Drone(), broadcast_port=0, ip="localhost",
+                       params=params if swarm_params is None else swarm_params, **kwargs)
+        swarm._pid_position_controller = swarm.new_position_controller()
+        created.append(swarm)
+        return swarm
+
+    yield make
+    for swarm in created:
+        swarm.broadcast_client.socket.close()
+        swarm.broadcast_server.socket.close()
+        if swarm.telemetry is not None:
+            swarm.telemetry.close()
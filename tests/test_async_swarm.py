@@ -0,0 +1,38 @@
+import numpy as np
+
+from async_swarm import AsyncSwarmc, get_numeric_id, get_unique_instance_id
+from params import params
+from swarm_protocol import BinaryStateEncoder, decode_state
+
+
+class Drone:
+    position = np.zeros(6)
+
+
+def test_default_params_match_swarmc():
+    swarm = AsyncSwarmc(Drone(), unique_id=5)
+    try:
+        assert swarm.params is params
+        assert swarm.interaction_radius > 0
+        assert swarm.position_pid_matrix.shape == (3, 2)
+    finally:
+        swarm.executor.shutdown()
+
+
+def test_env_is_bounded_without_tracking():
+    swarm = AsyncSwarmc(Drone(), unique_id=5, peer_capacity=2, peer_ttl=3600.0)
+    try:
+        for peer_id in (1, 2, 3):
+            swarm.ingest(decode_state(BinaryStateEncoder(peer_id).encode((peer_id, 0.0, 1.0), (0.0, 0.0, 0.0))))
+        assert set(swarm.env) == {2, 3}
+    finally:
+        swarm.executor.shutdown()
+
+
+def test_unique_id_matches_swarmc_scheme():
+    swarm = AsyncSwarmc(Drone(), ip="10.0.2.5", instance_number=3)
+    try:
+        assert swarm.unique_id == get_unique_instance_id("10.0.2.5", instance_number=3)
+        assert swarm.numeric_id == get_numeric_id(swarm.unique_id)
+    finally:
+        swarm.executor.shutdown()
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from pion.cython_pid import PIDController
+
+from batch_pid import BatchPIDController
+from swarm_kernel import default_position_pid_matrix
+
+N = 12
+STEPS = 100
+
+
+def scalar_step(controllers, targets, positions, dt) -> np.ndarray:
+    dt = np.broadcast_to(dt, (len(controllers),))
+    return np.array([controller.compute_control(targets[agent], positions[agent].copy(), float(dt[agent]))
+                     for agent, controller in enumerate(controllers)])
+
+
+@pytest.mark.parametrize("d", [1, 2, 3])
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_pid_controller_step_by_step(seed, d):
+    rng = np.random.default_rng(seed)
+    gains = rng.uniform(0.0, 1.0, (3, N, d))
+    scalar = [PIDController(*gains[:, agent].copy()) for agent in range(N)]
+    batch = BatchPIDController(*gains)
+    targets = rng.uniform(-5, 5, (N, d))
+    positions = rng.uniform(-5, 5, (N, d))
+    out = np.zeros((N, d))
+    for step in range(STEPS):
+        positions += rng.normal(0, 0.1, (N, d))
+        # Общий шаг и свой у каждого дрона, в том числе нулевой
+        dt = rng.choice([0.0, 0.05, 0.1], N) if step % 2 else 0.05
+        expected = scalar_step(scalar, targets, positions, dt)
+        assert np.array_equal(batch.compute_control(targets, positions, dt, out=out), expected), step
+        if step == STEPS // 2:
+            # Накопленный интеграл у части дронов сбрасывается, как новый PIDController
+            reset = rng.random(N) < 0.5
+            batch.reset(reset)
+            for agent in np.flatnonzero(reset):
+                scalar[agent] = PIDController(*gains[:, agent].copy())
+            targets = rng.uniform(-5, 5, (N, d))
+
+
+@pytest.mark.parametrize("d", [2, 3])
+def test_matches_clipped_pid_controller_with_shared_gains(d):
+    rng = np.random.default_rng(d)
+    matrix = default_position_pid_matrix(d)
+    scalar = [PIDController(*matrix) for _ in range(N)]
+    # Ограничение сигнала без антивиндапа: совпадает с np.clip скалярного сигнала
+    batch = BatchPIDController.from_matrix(matrix, N)
+    targets = rng.uniform(-5, 5, (N, d))
+    positions = rng.uniform(-5, 5, (N, d))
+    for step in range(STEPS):
+        signal = np.clip(batch.compute_control(targets, positions, 0.05), -0.4, 0.4)
+        expected = np.clip(scalar_step(scalar, targets, positions, 0.05), -0.4, 0.4)
+        assert np.array_equal(signal, expected), step
+        positions += signal * 0.05
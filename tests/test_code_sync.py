@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from code_sync import REMOTE_ROOT, push_code
+from installer import RemoteServiceInstaller
+from ssh_standin import start_hosts
+from version_check import check_version
+
+
+@pytest.fixture
+def board(tmp_path):
+    host = start_hosts(1, latency=0.0, root=str(tmp_path / "boards"))[0]
+    yield host
+    host.stop()
+
+
+def connected(host) -> RemoteServiceInstaller:
+    installer = RemoteServiceInstaller("127.0.0.1", "pi", "raspberry", host.port)
+    installer.connect()
+    return installer
+
+
+def test_git_update_after_code_sync_unpins_version(board, tmp_path):
+    local = tmp_path / "local"
+    local.mkdir()
+    (local / "main.py").write_text("print('v1')\n")
+    installer = connected(board)
+    try:
+        push_code(installer, str(local))
+        code = os.path.join(board.root, *REMOTE_ROOT.split("/"))
+        assert check_version(code) is not None
+        # git pull поверх переданного кода меняет файлы под прежним манифестом
+        with open(os.path.join(code, "main.py"), "w") as file:
+            file.write("print('v2')\n")
+        with pytest.raises(SystemExit):
+            check_version(code)
+        installer.install_dependencies(clone=True)
+    finally:
+        installer.ssh.close()
+    assert any("git pull" in command for command in board.commands)
+    assert check_version(code) is None
@@ -0,0 +1,81 @@
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from params import params
+from swarm_protocol import BinaryStateEncoder, decode_state
+from telemetry import TelemetryRecorder, load_telemetry
+
+# Роевая составляющая считается один раз и дальше берётся из кэша
+CACHED = dict(params, swarm_rate=1e-9)
+
+
+def add_peers(swarm, d: int) -> None:
+    rng = np.random.default_rng(d)
+    for peer in range(20):
+        payload = BinaryStateEncoder(100 + peer).encode((*rng.uniform(-3, 3, 2), 1.0), (0.1, 0.0, 0.0))
+        swarm.process_incoming_state(decode_state(payload))
+
+
+def wait_for_other_threads(timeout: float = 2.0) -> None:
+    """
+    tracemalloc считает выделения всех потоков: потоки, оставленные другими
+    тестами (SSH-заглушки, приём), попали бы в замер такта.
+    """
+    deadline = time.monotonic() + timeout
+    while threading.active_count() > 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    others = [thread.name for thread in threading.enumerate() if thread is not threading.current_thread()]
+    assert not others, f"Во время замера работают другие потоки: {others}"
+
+
+def peak_allocated(function, calls: int = 200) -> int:
+    wait_for_other_threads()
+    for _ in range(10):
+        function()
+
+    def series(call):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(calls):
+            call()
+        return tracemalloc.get_traced_memory()[1] - before
+
+    tracemalloc.start()
+    try:
+        baseline = series(lambda: None)
+        return series(function) - baseline
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("d", [2, 3])
+@pytest.mark.parametrize("telemetry", [False, True])
+def test_cached_tick_does_not_allocate(make_swarmc, tmp_path, d, telemetry):
+    swarm = make_swarmc(CACHED, d=d, peer_ttl=3600.0, telemetry_capacity=64,
+                        telemetry_path=str(tmp_path / "telemetry.bin") if telemetry else None)
+    add_peers(swarm, d)
+    swarm.swarm_term.max_age = float("inf")
+    # Дрон движется: ограничения ускорения и скорости срабатывают на каждом такте
+    swarm.control_object.position[3:5] = 0.6, 0.2
+    target = np.array([3.0, 1.0, 2.0])
+    assert peak_allocated(lambda: swarm.update_swarm_control(target, 0.05)) == 0
+    assert swarm.swarm_term.updates == 1
+
+
+def test_telemetry_ring_continues_after_reopen(tmp_path):
+    path = str(tmp_path / "telemetry.bin")
+    for start, stop in ((0, 50), (50, 90)):
+        recorder = TelemetryRecorder(path, capacity=64)
+        for i in range(start, stop):
+            recorder.record(float(i), np.array([i, 0.0, 1.0]), np.array([1.0, 2.0]), np.zeros(2), np.zeros(2),
+                            np.array([0.1, 0.2, 0.0, 0.0]), i)
+        recorder.close()
+    flight = load_telemetry(path)
+    assert flight["seq"].tolist() == list(range(26, 90))
+    assert flight["xyz"][:, 0].tolist() == list(range(26, 90))
+    assert flight["target"][-1].tolist() == [1.0, 2.0, 0.0]
+    assert flight["peers"][-1] == 89
@@ -0,0 +1,44 @@
+import io
+
+from rich.console import Console
+
+from fleet import FleetHost, FleetRunner, install_host
+from ssh_standin import start_hosts
+
+RETRIES = 2
+
+
+def test_install_with_failing_commands_is_retried(tmp_path):
+    # Отказы по зерну каждой «платы» детерминированы: при seed=0 есть повторы,
+    # успешные установки и хост, исчерпавший попытки
+    hosts = start_hosts(6, latency=0.0, fail_rate=0.1, seed=0, root=str(tmp_path / "boards"))
+    try:
+        runner = FleetRunner([FleetHost("127.0.0.1", "pi", "raspberry", port=host.port) for host in hosts],
+                             install_host, workers=3, retries=RETRIES, retry_delay=0.0,
+                             log_dir=str(tmp_path / "logs"), console=Console(file=io.StringIO()))
+        results = runner.run()
+    finally:
+        for host in hosts:
+            host.stop()
+
+    assert [result.attempts for result in results] == [1, 3, 2, 2, 1, 2]
+    for host, result in zip(hosts, results):
+        with open(result.log_path, encoding="utf-8") as file:
+            log = file.read()
+        name = result.host.name
+        assert [f"=== {name}: попытка {attempt}" in log for attempt in range(1, 5)] == \
+            [attempt <= result.attempts for attempt in range(1, 5)]
+        assert log.count("неудачна: Критическая ошибка:") == result.attempts - int(result.ok)
+        assert ("успешно установлен" in log) == result.ok
+        if result.ok:
+            assert result.error == "" and result.state == "готово"
+            assert host.commands[-1] == "sudo systemctl start pion_server.service"
+        else:
+            assert result.attempts == RETRIES + 1 and result.state == "ошибка"
+            assert result.error.startswith("Критическая ошибка:") and result.error in log
+
+    assert runner.summary() == {"hosts": 6,
+                                "ok": sum(result.ok for result in results),
+                                "failed": sum(not result.ok for result in results),
+                                "retried": sum(result.attempts > 1 for result in results)}
+    assert runner.summary()["failed"] == 1 and runner.summary()["retried"] == 4
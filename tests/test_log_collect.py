@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from installer import RemoteServiceInstaller
+from log_collect import collect_from
+from ssh_standin import start_hosts
+
+
+@pytest.fixture
+def board(tmp_path):
+    host = start_hosts(1, latency=0.0, root=str(tmp_path / "boards"))[0]
+    code = os.path.join(host.root, "code", "sPion")
+    os.makedirs(code)
+    yield host, code
+    host.stop()
+
+
+def collect(host, out: str) -> dict:
+    installer = RemoteServiceInstaller("127.0.0.1", "pi", "raspberry", host.port)
+    return collect_from(installer, out, journal=False)
+
+
+def test_appended_log_is_resumed(board, tmp_path):
+    host, code = board
+    out = str(tmp_path / "out")
+    remote = os.path.join(code, "pion_server.log")
+    with open(remote, "wb") as file:
+        file.write(b"a" * 1000)
+    collect(host, out)
+    with open(remote, "ab") as file:
+        file.write(b"b" * 6000)
+    stats = collect(host, out)
+    assert stats["resumed"] == 1 and stats["bytes"] == 6000
+    with open(os.path.join(out, "pion_server.log"), "rb") as file, open(remote, "rb") as original:
+        assert file.read() == original.read()
+
+
+def test_truncated_and_regrown_log_is_fetched_again(board, tmp_path):
+    host, code = board
+    out = str(tmp_path / "out")
+    remote = os.path.join(code, "pion_server.log")
+    with open(remote, "wb") as file:
+        file.write(b"old line\n" * 111)
+    collect(host, out)
+    # Переустановка: лог начат заново и до следующего сбора вырос больше старой копии
+    with open(remote, "wb") as file:
+        file.write(b"new line\n" * 222)
+    stats = collect(host, out)
+    assert stats["fetched"] == 1 and stats["resumed"] == 0
+    local = os.path.join(out, "pion_server.log")
+    with open(local, "rb") as file, open(remote, "rb") as original:
+        assert file.read() == original.read()
+    with open(local + ".old", "rb") as file:
+        assert file.read() == b"old line\n" * 111
@@ -0,0 +1,42 @@
+import re
+import sys
+import threading
+
+from metrics import SwarmMetrics
+
+THREADS = 4
+OBSERVATIONS = 20000
+
+
+def check_histogram(text: str, metric: str) -> int:
+    buckets = [int(value) for value in re.findall(rf'^{metric}_bucket{{le="[^"]+"}} (\d+)$', text, re.M)]
+    count = int(re.search(rf"^{metric}_count (\d+)$", text, re.M).group(1))
+    assert buckets == sorted(buckets) and buckets[-1] == count
+    return count
+
+
+def test_concurrent_updates_and_render_are_consistent():
+    metrics = SwarmMetrics()
+    metrics.observe("stage", 0.0)
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        def work(seed: int) -> None:
+            for i in range(OBSERVATIONS):
+                metrics.observe("stage", ((seed + i) % 7) * 1e-4)
+                metrics.increment("packets")
+
+        threads = [threading.Thread(target=work, args=(seed,)) for seed in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            check_histogram(metrics.render_prometheus(), "spion_stage_seconds")
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+
+    text = metrics.render_prometheus()
+    assert check_histogram(text, "spion_stage_seconds") == THREADS * OBSERVATIONS + 1
+    assert f"spion_packets_total {THREADS * OBSERVATIONS}" in text
+    assert metrics.snapshot()["stage"]["count"] == THREADS * OBSERVATIONS + 1
@@ -0,0 +1,29 @@
+from neighbour_index import UniformGridIndex
+
+
+def query_max_speed(index: UniformGridIndex) -> float:
+    index.query((0.0, 0.0), 1.0, at=0.0, max_age=0.5)
+    return index.max_speed
+
+
+def test_max_speed_follows_live_peers():
+    index = UniformGridIndex(cell_size=2.0)
+    index.update(1, (0.0, 0.0, 1.0), (1.0, 0.0, 0.0), sample_time=0.0)
+    index.update(2, (1.0, 0.0, 1.0), (4.0, 0.0, 0.0), sample_time=0.0)
+    assert query_max_speed(index) == 4.0
+    # Самый быстрый сосед замедлился
+    index.update(2, (1.0, 0.0, 1.0), (2.0, 0.0, 0.0), sample_time=0.1)
+    assert query_max_speed(index) == 2.0
+    index.remove(2)
+    assert query_max_speed(index) == 1.0
+    index.remove(1)
+    assert query_max_speed(index) == 0.0
+
+
+def test_max_speed_is_clamped_to_speed_limit():
+    index = UniformGridIndex(cell_size=2.0, speed_limit=3.0)
+    index.update(1, (50.0, 0.0, 1.0), (1e6, 0.0, 0.0), sample_time=0.0)
+    assert query_max_speed(index) == 3.0
+    # Запас поиска ограничен: далёкий сосед не попадает в ответ
+    positions, _ = index.query((0.0, 0.0), 1.0, at=1e-5, max_age=0.5)
+    assert len(positions) == 0
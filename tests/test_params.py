@@ -0,0 +1,24 @@
+from adaptive_broadcast import adaptive_broadcaster
+from neighbour_index import UniformGridIndex
+from params import params
+from swarm_kernel import control_periods
+
+
+def test_default_control_is_single_rate():
+    assert control_periods(params, 0.1) == (0.1, None)
+
+
+def test_default_neighbours_are_not_extrapolated():
+    index = UniformGridIndex(cell_size=5.0)
+    index.update(1, (1.0, 0.0, 1.0), (1.0, 0.0, 0.0), sample_time=0.0)
+    positions, _ = index.query((0.0, 0.0), 5.0, at=0.5, max_age=params["max_extrapolation"])
+    assert positions.tolist() == [[1.0, 0.0]]
+    assert not params["estimate_clock_offset"]
+
+
+def test_default_broadcast_interval_is_fixed():
+    assert adaptive_broadcaster(params) is None
+
+
+def test_default_conflict_screen_is_off():
+    assert not params["conflict_horizon"]
@@ -0,0 +1,104 @@
+import sys
+import threading
+
+import numpy as np
+
+from peer_table import PeerTable
+from swarm_protocol import REORDER_WINDOW, BinaryStateEncoder, decode_state
+
+
+def send(table: PeerTable, encoder: BinaryStateEncoder, x: float, now: float, timestamp: float) -> bool:
+    return table.ingest(decode_state(encoder.encode((x, 0.0, 1.0), (0.0, 0.0, 0.0), timestamp=timestamp)), now)
+
+
+def test_reordered_packet_is_rejected():
+    table = PeerTable(capacity=4, ttl=5.0, clock=lambda: 0.0, wall_clock=lambda: 0.0)
+    encoder = BinaryStateEncoder(7)
+    late = encoder.encode((1.0, 0.0, 1.0), (0.0, 0.0, 0.0), timestamp=1.0)
+    assert send(table, encoder, 2.0, 1.1, 1.1)
+    assert not table.ingest(decode_state(late), 1.2)
+    assert table.positions[table.get(7).slot, 0] == 2.0
+    assert table.restarts == 0
+
+
+def test_restarted_sender_is_accepted_immediately():
+    table = PeerTable(capacity=4, ttl=5.0, clock=lambda: 0.0, wall_clock=lambda: 0.0)
+    encoder = BinaryStateEncoder(7)
+    for step in range(10):
+        assert send(table, encoder, 1.0, step * 0.1, step * 0.1)
+    # Перезагрузка: новый кодировщик снова начинает seq с 1
+    restarted = BinaryStateEncoder(7)
+    assert send(table, restarted, 3.0, 1.5, 1.5)
+    assert send(table, restarted, 3.5, 1.6, 1.6)
+    record = table.get(7)
+    assert record.seq == 2
+    assert table.positions[record.slot, 0] == 3.5
+    assert table.restarts == 1
+
+
+def test_large_backward_seq_jump_is_restart_without_timestamps():
+    table = PeerTable(capacity=4, ttl=5.0, clock=lambda: 0.0, wall_clock=lambda: 0.0)
+    assert table.upsert(7, (1.0, 0.0, 1.0), (0.0, 0.0, 0.0), 0.0, seq=REORDER_WINDOW + 10)
+    assert not table.upsert(7, (2.0, 0.0, 1.0), (0.0, 0.0, 0.0), 0.1, seq=REORDER_WINDOW)
+    assert table.upsert(7, (3.0, 0.0, 1.0), (0.0, 0.0, 0.0), 0.2, seq=1)
+    assert np.array_equal(table.positions[table.get(7).slot], [3.0, 0.0, 1.0])
+
+
+def test_capacity_eviction_is_reported_once():
+    table = PeerTable(capacity=2, ttl=5.0, clock=lambda: 0.0, wall_clock=lambda: 0.0)
+    for peer_id, now in ((1, 0.0), (2, 0.1), (3, 0.2)):
+        assert table.upsert(peer_id, (float(peer_id), 0.0, 1.0), (0.0, 0.0, 0.0), now)
+    assert table.ids() == [2, 3]
+    assert table.evict_stale(0.3) == [1]
+    assert table.evict_stale(0.4) == []
+    assert table.evicted == 1
+
+
+def binary_state(peer_id: int, x: float = 0.0):
+    return decode_state(BinaryStateEncoder(peer_id).encode((x, 0.0, 1.0), (0.0, 0.0, 0.0)))
+
+
+def test_swarmc_forgets_peers_evicted_at_capacity(make_swarmc):
+    swarm = make_swarmc(peer_capacity=2, peer_ttl=3600.0)
+    for peer_id in (1, 2, 3):
+        swarm.process_incoming_state(binary_state(peer_id, peer_id))
+    assert set(swarm.env) == {2, 3}
+    swarm.refresh_peers()
+    assert set(swarm.peer_table.ids()) == {2, 3}
+
+
+def test_swarmc_forgets_stale_peers_without_tracking(make_swarmc):
+    clock = [0.0]
+    swarm = make_swarmc(peer_ttl=1.0, clock=lambda: clock[0])
+    swarm.process_incoming_state(binary_state(1))
+    clock[0] = 0.5
+    swarm.process_incoming_state(binary_state(2))
+    # Такт не идёт: env ограничивается при приёме
+    clock[0] = 1.2
+    swarm.process_incoming_state(binary_state(3))
+    assert set(swarm.env) == {2, 3}
+
+
+def test_concurrent_receive_threads_share_env(make_swarmc):
+    swarm = make_swarmc(peer_capacity=8, peer_ttl=3600.0)
+    states = [binary_state(peer_id) for peer_id in range(1, 65)]
+    errors = []
+
+    def receive(offset: int) -> None:
+        try:
+            for i in range(2000):
+                swarm.process_incoming_state(states[(offset + i) % len(states)])
+        except Exception as error:
+            errors.append(error)
+
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        threads = [threading.Thread(target=receive, args=(offset,)) for offset in (0, 32)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(switch_interval)
+    assert errors == [] and len(swarm.env) <= 8
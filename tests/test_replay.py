@@ -0,0 +1,54 @@
+import numpy as np
+
+from swarm_capture import KIND_BINARY, KIND_TICK, load_capture
+from swarm_protocol import BinaryStateEncoder, decode_state
+from swarm_replay import ReplayClock, compare, replay
+
+RATE = 20
+WALL_OFFSET = 1.7e9
+
+
+def record_flight(make_swarmc, path: str, peers: int = 6, steps: int = 60) -> None:
+    """
+    Полёт к цели среди соседей на окружностях: пакет каждого соседа между тактами.
+    """
+    clock = ReplayClock()
+    clock.now, clock.wall_offset = 100.0, WALL_OFFSET
+    swarm = make_swarmc(peer_ttl=1.0, capture_path=path, clock=clock, wall_clock=clock.wall)
+    drone = swarm.control_object
+    drone.target_point = np.array([6.0, 4.0, 1.0, 0.0])
+    drone.tracking = True
+    swarm.capture.session(clock.now)
+    encoders = [BinaryStateEncoder(10 + peer) for peer in range(peers)]
+    dt = 1 / RATE
+    try:
+        for step in range(steps):
+            start = clock.now
+            for peer, encoder in enumerate(encoders):
+                clock.now = start + (peer + 1) * dt / (peers + 2)
+                angle = peer + 0.3 * clock.now
+                position = (3.0 + 2.0 * np.cos(angle), 2.0 + 2.0 * np.sin(angle), 1.0)
+                payload = encoder.encode(position, (-0.6 * np.sin(angle), 0.6 * np.cos(angle), 0.0),
+                                         timestamp=clock.wall() - 0.005)
+                swarm.process_incoming_state(decode_state(payload), payload=payload)
+            clock.now = start + dt
+            swarm.update_swarm_control(drone.target_point, dt)
+            drone.position[0:3] += drone.t_speed[0:3] * dt
+            drone.position[3:6] = drone.t_speed[0:3]
+    finally:
+        swarm.capture.close()
+
+
+def test_replay_repeats_recorded_commands(make_swarmc, tmp_path):
+    path = str(tmp_path / "capture.bin")
+    record_flight(make_swarmc, path)
+    capture = load_capture(path)
+    assert capture.count(KIND_TICK) == 60 and capture.count(KIND_BINARY) == 360
+    first, second = replay(capture), replay(capture)
+    assert first["invalid"] == 0 and first["datagrams"] == 360
+    assert np.abs(first["command"]).max() > 0
+    assert compare(first, first, reference="recorded_command")["max_command_error"] == 0
+    assert np.array_equal(first["command"], second["command"])
+    # Соседи влияют на команды: без роевой составляющей воспроизведение другое
+    alone = replay(capture, overrides={"repulsion_weight": 0.0, "unstable_weight": 0.0})
+    assert compare(alone, first)["differing_ticks"]
@@ -0,0 +1,52 @@
+import contextlib
+import io
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from params import params
+from swarm_kernel import ControlBuffers, compute_swarm_velocity_vec, limit_swarm_velocity, pack_env
+
+try:
+    from pion.functions import compute_swarm_velocity_pid
+except ImportError:  # в новых версиях pion функции вынесены в pionfunc
+    from pionfunc.functions import compute_swarm_velocity_pid
+
+
+def random_env(n: int, rng: np.random.Generator, spread: float = 3.0) -> dict:
+    # Половина соседей неподвижна, чтобы срабатывал вектор выведения из равновесия
+    env = {}
+    for i in range(n):
+        xyz = rng.uniform(-spread, spread, 3)
+        speed = rng.uniform(-0.3, 0.3, 3) if rng.random() < 0.5 else np.zeros(3)
+        env[i] = SimpleNamespace(data=[float(i), *xyz, *speed, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0])
+    return env
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_compute_swarm_velocity_pid(seed):
+    rng = np.random.default_rng(seed)
+    # Прогноза конфликтов в pion нет
+    swarm_params = dict(params, conflict_horizon=0.0)
+    for _ in range(50):
+        env = random_env(int(rng.integers(0, 40)), rng)
+        state_vector = np.hstack([rng.uniform(-3, 3, 3), rng.uniform(-0.4, 0.4, 3)])
+        target_point = rng.uniform(-5, 5, 2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = compute_swarm_velocity_pid(state_vector, env, target_point, params=swarm_params)
+        positions, velocities = pack_env(env, 2)
+        result = compute_swarm_velocity_vec(state_vector, positions, velocities, target_point, swarm_params)
+        np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("d", [2, 3])
+def test_control_buffers_limit_matches_limit_swarm_velocity(d):
+    rng = np.random.default_rng(d)
+    buffers = ControlBuffers(d)
+    for _ in range(200):
+        state_vector = np.hstack([rng.uniform(-3, 3, 3), rng.uniform(-0.6, 0.6, 3)])
+        interaction = rng.uniform(-2, 2, d)
+        buffers.load(state_vector, np.zeros(d))
+        expected = limit_swarm_velocity(state_vector[3:3 + d], interaction, params)
+        assert np.array_equal(buffers.limit_swarm_velocity(interaction, params), expected)
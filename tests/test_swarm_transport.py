@@ -0,0 +1,70 @@
+from swarm_protocol import BinaryStateEncoder
+from swarm_transport import StateRelay
+
+
+class RecordingSide:
+    """
+    Сторона ретранслятора без сокетов: запоминает пересланные пакеты.
+    """
+
+    def __init__(self) -> None:
+        self.sockets = []
+        self.forwarded = []
+
+    def forward(self, payload: bytes) -> None:
+        self.forwarded.append(payload)
+
+    def close(self) -> None:
+        pass
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_relay(ttl: float = 4.0):
+    clock = Clock()
+    source, target = RecordingSide(), RecordingSide()
+    return StateRelay([source, target], ttl=ttl, clock=clock), source, target, clock
+
+
+def packet(encoder: BinaryStateEncoder, timestamp: float) -> bytes:
+    return encoder.encode((0.0, 0.0, 1.0), (0.0, 0.0, 0.0), timestamp=timestamp)
+
+
+def test_relay_drops_duplicates_and_loops():
+    relay, source, target, _ = make_relay()
+    payload = packet(BinaryStateEncoder(5), 10.0)
+    assert relay.handle(payload, source)
+    assert not relay.handle(payload, target)
+    assert target.forwarded == [payload] and source.forwarded == []
+    assert relay.duplicates == 1
+
+
+def test_relay_forwards_restarted_drone_immediately():
+    relay, source, target, clock = make_relay()
+    encoder = BinaryStateEncoder(5)
+    for step in range(20):
+        clock.now = step * 0.1
+        assert relay.handle(packet(encoder, 100.0 + step * 0.1), source)
+    clock.now = 2.5
+    restarted = packet(BinaryStateEncoder(5), 102.5)
+    assert relay.handle(restarted, source)
+    assert target.forwarded[-1] == restarted
+    assert relay.restarts == 1
+
+
+def test_relay_forgets_silent_drone_after_ttl():
+    relay, source, target, clock = make_relay(ttl=1.0)
+    encoder = BinaryStateEncoder(5)
+    old = packet(encoder, 100.0)
+    assert relay.handle(packet(encoder, 100.1), source)
+    assert not relay.handle(old, source)
+    clock.now = 1.5
+    assert relay.expire() == 1
+    assert relay.last_seq == {}
+    assert relay.handle(old, source)